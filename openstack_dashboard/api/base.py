@@ -18,15 +18,25 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 from collections import Sequence  # noqa
+import datetime
+import functools
+import hashlib
 import logging
+import thread
+import threading
+import time
 
 from django.conf import settings
+from django.core.cache import cache
 
 from horizon import exceptions
 
+from openstack_dashboard.utils import concurrency
 
-__all__ = ('APIResourceWrapper', 'APIDictWrapper',
+
+__all__ = ('APIResourceWrapper', 'APIDictWrapper', 'ServiceCatalogIndex',
            'get_service_from_catalog', 'url_for',)
 
 
@@ -66,26 +76,36 @@ class APIVersionManager(object):
         return self.supported[self._active]
 
 
+class APIWrapperMetaclass(type):
+    """Freezes the ``_attrs`` of every wrapper class into ``_attr_set``,
+    so that the fallback lookups are set membership tests.
+    """
+    def __new__(mcs, name, bases, attrs):
+        cls = super(APIWrapperMetaclass, mcs).__new__(mcs, name, bases, attrs)
+        cls._attr_set = frozenset(cls._attrs)
+        return cls
+
+
 class APIResourceWrapper(object):
     """Simple wrapper for api objects.
 
     Define _attrs on the child class and pass in the
     api object as the only argument to the constructor
     """
+    __metaclass__ = APIWrapperMetaclass
+    __slots__ = ('_apiresource', '__dict__', '__weakref__')
     _attrs = []
-    _apiresource = None  # Make sure _apiresource is there even in __init__.
 
     def __init__(self, apiresource):
         self._apiresource = apiresource
 
-    def __getattribute__(self, attr):
-        try:
-            return object.__getattribute__(self, attr)
-        except AttributeError:
-            if attr not in self._attrs:
-                raise
-            # __getattr__ won't find properties
-            return getattr(self._apiresource, attr)
+    def __getattr__(self, attr):
+        # Only called once the regular lookup (instance attributes,
+        # properties, ...) has failed.
+        if attr not in self._attr_set:
+            raise AttributeError("'%s' object has no attribute '%s'"
+                                 % (self.__class__.__name__, attr))
+        return getattr(self._apiresource, attr)
 
     def __repr__(self):
         return "<%s: %s>" % (self.__class__.__name__,
@@ -104,19 +124,20 @@ class APIDictWrapper(object):
     Attribute access is the preferred method of access, to be
     consistent with api resource objects from novaclient.
     """
-
-    _apidict = {}  # Make sure _apidict is there even in __init__.
+    __slots__ = ('_apidict', '__dict__', '__weakref__')
 
     def __init__(self, apidict):
         self._apidict = apidict
 
-    def __getattribute__(self, attr):
-        try:
-            return object.__getattribute__(self, attr)
-        except AttributeError:
-            if attr not in self._apidict:
-                raise
-            return self._apidict[attr]
+    def __getattr__(self, attr):
+        # Guard against recursing when _apidict itself is not set yet.
+        if attr != '_apidict':
+            try:
+                return self._apidict[attr]
+            except KeyError:
+                pass
+        raise AttributeError("'%s' object has no attribute '%s'"
+                             % (self.__class__.__name__, attr))
 
     def __getitem__(self, item):
         try:
@@ -137,6 +158,8 @@ class APIDictWrapper(object):
 
 class Quota(object):
     """Wrapper for individual limits in a quota."""
+    __slots__ = ('name', 'limit')
+
     def __init__(self, name, limit):
         self.name = name
         self.limit = limit
@@ -153,9 +176,13 @@ class QuotaSet(Sequence):
     the bracket notiation (`qs["my_quota"] = 0`) to add new quota values, and
     use the `get` method to retrieve a specific quota, but otherwise it
     behaves much like a list or tuple, particularly in supporting iteration.
+
+    Quotas keep the order in which they were first added. Setting a quota
+    which already exists replaces it in place.
     """
     def __init__(self, apiresource=None):
         self.items = []
+        self._index = {}
         if apiresource:
             if hasattr(apiresource, '_info'):
                 items = apiresource._info.items()
@@ -168,9 +195,16 @@ class QuotaSet(Sequence):
                 self[k] = v
 
     def __setitem__(self, k, v):
-            v = int(v) if v is not None else v
-            q = Quota(k, v)
-            self.items.append(q)
+        v = int(v) if v is not None else v
+        self._set(Quota(k, v))
+
+    def _set(self, quota):
+        position = self._index.get(quota.name)
+        if position is None:
+            self._index[quota.name] = len(self.items)
+            self.items.append(quota)
+        else:
+            self.items[position] = quota
 
     def __getitem__(self, index):
         return self.items[index]
@@ -186,7 +220,7 @@ class QuotaSet(Sequence):
 
         for item in other:
             if self.get(item.name).limit is None:
-                self.items.append(item)
+                self._set(item)
         return self
 
     def __len__(self):
@@ -196,14 +230,95 @@ class QuotaSet(Sequence):
         return repr(self.items)
 
     def get(self, key, default=None):
-        match = [quota for quota in self.items if quota.name == key]
-        return match.pop() if len(match) else Quota(key, default)
+        position = self._index.get(key)
+        if position is None:
+            return Quota(key, default)
+        return self.items[position]
 
     def add(self, other):
         return self.__add__(other)
 
 
+QUOTA_USAGES_CACHE_PREFIX = 'quota_usages:'
+
+
+def quota_usages_cache_key(tenant_id):
+    return QUOTA_USAGES_CACHE_PREFIX + tenant_id
+
+
+def invalidate_quota_usages(request, tenant_id=None):
+    """Drops the cached ``usage.quotas.tenant_quota_usages`` of a project.
+
+    Called by the API calls which change the usage or the limits of a
+    project; ``tenant_id`` defaults to the current project.
+    """
+    cache.delete(quota_usages_cache_key(tenant_id or request.user.tenant_id))
+
+
+# The extensions a service endpoint supports only change when the cloud is
+# upgraded, so they are cached across requests per service and endpoint for
+# EXTENSION_CACHE_TTL seconds (0 disables the cache). Entries older than
+# EXTENSION_CACHE_REFRESH seconds are still used, but refreshed in the
+# background. The flush_extension_cache command bumps the generation.
+EXTENSION_CACHE_PREFIX = 'extensions:'
+EXTENSION_GENERATION_KEY = 'extensions:generation'
+EXTENSION_GENERATION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _extensions_cache_key(service, endpoint):
+    generation = cache.get(EXTENSION_GENERATION_KEY, 0)
+    if isinstance(endpoint, unicode):
+        endpoint = endpoint.encode('utf-8')
+    return '%s%s:%s:%s' % (EXTENSION_CACHE_PREFIX, generation, service,
+                           hashlib.md5(endpoint).hexdigest())
+
+
+def _refresh_extensions(request, key, list_names, ttl):
+    try:
+        cache.set(key, (frozenset(list_names(request)), time.time()), ttl)
+    except Exception:
+        LOG.exception("Unable to refresh the extensions cached as %s." % key)
+    finally:
+        cache.delete(key + ':refreshing')
+
+
+def supported_extensions(request, service, endpoint, list_names):
+    """Returns the frozenset of extensions supported by a service endpoint.
+
+    ``list_names(request)`` lists the names (or aliases) of the extensions
+    and is only called when they are not cached yet.
+    """
+    ttl = getattr(settings, 'EXTENSION_CACHE_TTL', 60 * 60 * 24)
+    if not ttl:
+        return frozenset(list_names(request))
+    key = _extensions_cache_key(service, endpoint)
+    cached = cache.get(key)
+    if cached is None:
+        names = frozenset(list_names(request))
+        cache.set(key, (names, time.time()), ttl)
+        return names
+    names, fetched_at = cached
+    refresh = getattr(settings, 'EXTENSION_CACHE_REFRESH', 60 * 60)
+    # cache.add only succeeds for the first process to get here.
+    if (time.time() - fetched_at > refresh and
+            cache.add(key + ':refreshing', True, 60)):
+        concurrency.shared_pool('extensions', 1).submit(
+            functools.partial(_refresh_extensions, request, key, list_names,
+                              ttl))
+    return names
+
+
+def invalidate_extensions():
+    """Drops every cached extension set."""
+    try:
+        cache.incr(EXTENSION_GENERATION_KEY)
+    except ValueError:
+        cache.set(EXTENSION_GENERATION_KEY, 1, EXTENSION_GENERATION_TIMEOUT)
+
+
 def get_service_from_catalog(catalog, service_type):
+    if isinstance(catalog, ServiceCatalogIndex):
+        return catalog.service(service_type)
     if catalog:
         for service in catalog:
             if service['type'] == service_type:
@@ -247,40 +362,236 @@ def get_url_for_service(service, region, endpoint_type):
     return None
 
 
+class ServiceCatalogIndex(object):
+    """Lookup tables compiled from a keystone service catalog.
+
+    Answers the same questions as ``get_service_from_catalog``,
+    ``get_url_for_service`` and ``is_service_enabled`` with dict lookups
+    keyed by service type, region and endpoint type (or v3 interface).
+    The identity service is indexed under the region None, since its
+    region is ignored.
+    """
+
+    def __init__(self, catalog):
+        self._services = {}
+        # (service type, region) -> v2 endpoint dict or {v3 interface: url}
+        self._endpoints = {}
+        for service in catalog or ():
+            service_type = service['type']
+            if service_type in self._services:
+                continue
+            self._services[service_type] = service
+            version = get_version_from_service(service)
+            for endpoint in service['endpoints']:
+                region = (None if service_type == 'identity'
+                          else endpoint.get('region'))
+                key = (service_type, region)
+                if version < 3:
+                    # Only the first endpoint of a region is ever used.
+                    self._endpoints.setdefault(key, endpoint)
+                else:
+                    urls = self._endpoints.setdefault(key, {})
+                    urls.setdefault(endpoint.get('interface'),
+                                    endpoint.get('url'))
+
+    def _region_key(self, service_type, region):
+        return (service_type,
+                None if service_type == 'identity' else region)
+
+    def service(self, service_type):
+        return self._services.get(service_type)
+
+    def url(self, service_type, region, endpoint_type):
+        service = self._services.get(service_type)
+        if not service:
+            return None
+        endpoints = self._endpoints.get(self._region_key(service_type,
+                                                         region))
+        if not endpoints:
+            return None
+        if get_version_from_service(service) < 3:
+            return endpoints.get(endpoint_type)
+        return endpoints.get(ENDPOINT_TYPE_TO_INTERFACE.get(endpoint_type,
+                                                            ''))
+
+    def is_enabled(self, service_type, region, service_name=None):
+        service = self._services.get(service_type)
+        if (not service or self._region_key(service_type, region)
+                not in self._endpoints):
+            return False
+        if service_name:
+            return service['name'] == service_name
+        return True
+
+
+# Catalog indexes are kept per token, since a token's catalog never
+# changes. SERVICE_CATALOG_INDEX_CACHE_SIZE bounds the number of tokens
+# (0 only reuses an index within a request).
+_catalog_indexes = collections.OrderedDict()
+_catalog_indexes_lock = threading.Lock()
+
+
+def catalog_index(request):
+    """Returns the ``ServiceCatalogIndex`` of the request's token."""
+    user = request.user
+    catalog = user.service_catalog
+    cached = getattr(user, '_catalog_index', None)
+    if cached is not None and cached[0] is catalog:
+        return cached[1]
+
+    size = getattr(settings, 'SERVICE_CATALOG_INDEX_CACHE_SIZE', 1000)
+    token_id = getattr(getattr(user, 'token', None), 'id', None)
+    key = hashlib.md5(token_id).hexdigest() if size and token_id else None
+    index = None
+    if key:
+        with _catalog_indexes_lock:
+            index = _catalog_indexes.pop(key, None)
+            if index is not None:
+                # Re-insert to mark the entry as most recently used.
+                _catalog_indexes[key] = index
+    if index is None:
+        index = ServiceCatalogIndex(catalog)
+        if key:
+            with _catalog_indexes_lock:
+                _catalog_indexes[key] = index
+                while len(_catalog_indexes) > size:
+                    _catalog_indexes.popitem(last=False)
+    user._catalog_index = (catalog, index)
+    return index
+
+
 def url_for(request, service_type, endpoint_type=None, region=None):
     endpoint_type = endpoint_type or getattr(settings,
                                              'OPENSTACK_ENDPOINT_TYPE',
                                              'publicURL')
     fallback_endpoint_type = getattr(settings, 'SECONDARY_ENDPOINT_TYPE', None)
 
-    catalog = request.user.service_catalog
-    service = get_service_from_catalog(catalog, service_type)
-    if service:
-        if not region:
-            region = request.user.services_region
-        url = get_url_for_service(service,
-                                  region,
-                                  endpoint_type)
-        if not url and fallback_endpoint_type:
-            url = get_url_for_service(service,
-                                      region,
-                                      fallback_endpoint_type)
-        if url:
-            return url
+    index = catalog_index(request)
+    if not region:
+        region = request.user.services_region
+    url = index.url(service_type, region, endpoint_type)
+    if not url and fallback_endpoint_type:
+        url = index.url(service_type, region, fallback_endpoint_type)
+    if url:
+        return url
     raise exceptions.ServiceCatalogException(service_type)
 
 
 def is_service_enabled(request, service_type, service_name=None):
-    service = get_service_from_catalog(request.user.service_catalog,
-                                       service_type)
-    if service:
-        region = request.user.services_region
-        for endpoint in service['endpoints']:
-            # ignore region for identity
-            if service['type'] == 'identity' or \
-               endpoint['region'] == region:
-                if service_name:
-                    return service['name'] == service_name
-                else:
-                    return True
-    return False
+    return catalog_index(request).is_enabled(service_type,
+                                             request.user.services_region,
+                                             service_name)
+
+
+# Clients built by the ``*client(request)`` factories are kept on the
+# request, so that all of the API calls of one page share them. The hit and
+# miss counts per service are kept for the whole process.
+_client_stats = collections.defaultdict(lambda: {'hits': 0, 'misses': 0})
+_client_lock = threading.Lock()
+
+
+def cached_client(service):
+    """Decorator caching the clients of a ``*client(request)`` factory.
+
+    Clients are cached on the request per token, service, region, endpoint
+    type and factory arguments. They are also cached per thread, since
+    calls running concurrently on the ``utils.concurrency`` pools must not
+    share a client's HTTP connection.
+    """
+    def decorator(factory):
+        @functools.wraps(factory)
+        def wrapper(request, *args, **kwargs):
+            user = request.user
+            key = (service,
+                   getattr(getattr(user, 'token', None), 'id', None),
+                   getattr(user, 'services_region', None),
+                   getattr(settings, 'OPENSTACK_ENDPOINT_TYPE', 'publicURL'),
+                   thread.get_ident(), args, tuple(sorted(kwargs.items())))
+            with _client_lock:
+                clients = getattr(request, '_api_clients', None)
+                if clients is None:
+                    clients = {}
+                    request._api_clients = clients
+                client = clients.get(key)
+                _client_stats[service]['misses' if client is None
+                                       else 'hits'] += 1
+            if client is None:
+                client = factory(request, *args, **kwargs)
+                clients[key] = client
+            return client
+        return wrapper
+    return decorator
+
+
+def client_stats():
+    """Returns ``{service: {'hits': n, 'misses': n}}`` for this process."""
+    with _client_lock:
+        return dict((service, dict(counts))
+                    for service, counts in _client_stats.items())
+
+
+# Listings kept current through ``changes-since`` queries are cached per
+# project for CHANGES_SINCE_CACHE_TTL seconds (0 disables them); older
+# snapshots are listed again in full. Deltas ask for the changes since
+# shortly before the previous query, so that clock skew between the
+# dashboard and the service loses none. The services only report changes
+# to the resources' own rows (e.g. nova's instances.updated_at), so the
+# API calls which change anything else drop the snapshots with
+# invalidate_changes_since.
+CHANGES_SINCE_CACHE_PREFIX = 'changes_since:'
+CHANGES_SINCE_MARGIN = 60
+
+
+def changes_since_enabled():
+    return bool(getattr(settings, 'CHANGES_SINCE_CACHE_TTL', 60 * 10))
+
+
+def _changes_since_cache_key(request, name, tenant_id=None):
+    region = getattr(request.user, 'services_region', None) or ''
+    if isinstance(region, unicode):
+        region = region.encode('utf-8')
+    return '%s%s:%s:%s' % (CHANGES_SINCE_CACHE_PREFIX, name,
+                           hashlib.md5(region).hexdigest(),
+                           tenant_id or request.user.tenant_id)
+
+
+def invalidate_changes_since(request, name, tenant_id=None):
+    """Drops the ``name`` snapshot of a project.
+
+    ``tenant_id`` defaults to the current project.
+    """
+    cache.delete(_changes_since_cache_key(request, name, tenant_id))
+
+
+def list_changes_since(request, name, list_infos, is_deleted):
+    """Returns a listing of the current project kept in a cached snapshot.
+
+    ``list_infos(since)`` returns the attribute dicts of the resources
+    changed since the ISO 8601 timestamp ``since``, deleted ones included,
+    or of all of them when ``since`` is ``None``; ``is_deleted(info)``
+    tells the deleted ones apart. The snapshot is cached per ``name``,
+    region and project, and the infos are returned in no particular order.
+    """
+    ttl = getattr(settings, 'CHANGES_SINCE_CACHE_TTL', 60 * 10)
+    key = _changes_since_cache_key(request, name)
+    # Taken before listing, so that the next delta covers the changes
+    # made while this one runs.
+    now = time.time()
+    snapshot = cache.get(key)
+    if snapshot is not None and now - snapshot[0] > ttl:
+        snapshot = None
+    if snapshot is None:
+        created = now
+        infos = dict((info['id'], info) for info in list_infos(None)
+                     if not is_deleted(info))
+    else:
+        created, listed_at, infos = snapshot
+        since = datetime.datetime.utcfromtimestamp(
+            listed_at - CHANGES_SINCE_MARGIN).isoformat()
+        for info in list_infos(since):
+            if is_deleted(info):
+                infos.pop(info['id'], None)
+            else:
+                infos[info['id']] = info
+    cache.set(key, (created, now, infos), ttl)
+    return infos.values()
@@ -12,10 +12,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
+import functools
 import logging
-import threading
+import Queue
+import sys
 
 from ceilometerclient import client as ceilometer_client
+from ceilometerclient import exc as ceilometer_exc
 from django.conf import settings
 from django.utils import datastructures
 from django.utils.translation import ugettext_lazy as _
@@ -25,6 +29,7 @@ from horizon import exceptions
 from openstack_dashboard.api import base
 from openstack_dashboard.api import keystone
 from openstack_dashboard.api import nova
+from openstack_dashboard.utils import concurrency
 
 LOG = logging.getLogger(__name__)
 
@@ -251,9 +256,10 @@ class Statistic(base.APIResourceWrapper):
 
     _attrs = ['period', 'period_start', 'period_end',
               'count', 'min', 'max', 'sum', 'avg',
-              'duration', 'duration_start', 'duration_end']
+              'duration', 'duration_start', 'duration_end', 'groupby']
 
 
+@base.cached_client('metering')
 def ceilometerclient(request):
     """Initialization of Ceilometer client."""
 
@@ -288,78 +294,179 @@ def meter_list(request, query=None):
     return [Meter(m) for m in meters]
 
 
-def statistic_list(request, meter_name, query=None, period=None):
-    """List of statistics."""
+def statistic_list(request, meter_name, query=None, period=None,
+                   groupby=None):
+    """List of statistics.
+
+    With ``groupby``, a list of field names such as ``['project_id']``,
+    every statistic is computed per group and its ``groupby`` attribute
+    holds the values of the fields.
+    """
+    kwargs = {'groupby': groupby} if groupby else {}
     statistics = ceilometerclient(request).\
-        statistics.list(meter_name=meter_name, q=query, period=period)
+        statistics.list(meter_name=meter_name, q=query, period=period,
+                        **kwargs)
     return [Statistic(s) for s in statistics]
 
 
-class ThreadedUpdateResourceWithStatistics(threading.Thread):
-    """Multithread wrapper for update_with_statistics method of
-    resource_usage.
+def _groupby_unsupported(exc):
+    # Clients without group-by support reject the argument, APIs without
+    # it reject the query parameter.
+    return (isinstance(exc, TypeError) or
+            (isinstance(exc, ceilometer_exc.HTTPException) and
+             getattr(exc, 'code', None) == 400))
+
 
-    A join logic is placed in process_list class method. All resources
-    will have its statistics attribute filled in separate threads.
+def project_statistics(request, meter_names, project_ids, period=None,
+                       additional_query=None):
+    """Yields ``(meter_name, project_id, statistics)`` for many projects.
 
-    The resource_usage object is shared between threads. Each thread is
-    updating one Resource.
+    Every meter is one task on the shared ``ceilometer`` pool which gets
+    the statistics of all of the projects in a single call, grouped by
+    ``project_id``. Where Ceilometer cannot group statistics, the meter is
+    listed again with one task per project. Results are yielded as the
+    tasks finish.
+
+    There is no overall deadline, since the fallback can queue many
+    tasks; only when no task at all finishes for
+    ``CEILOMETER_STATISTICS_TIMEOUT`` seconds are the pending ones given
+    up. The statistics which failed or were given up are logged and
+    yielded last, as None.
+    """
+    project_ids = list(project_ids)
+    query = list(additional_query or [])
+    pool = concurrency.shared_pool(
+        'ceilometer',
+        getattr(settings, 'CEILOMETER_STATISTICS_CONCURRENCY', 10))
+    queue = pool.queue()
+    timeout = getattr(settings, 'CEILOMETER_STATISTICS_TIMEOUT', 60)
+    finished = Queue.Queue()
+    tasks = []
+    missing = set((meter, project_id) for meter in meter_names
+                  for project_id in project_ids)
+
+    def grouped(meter):
+        by_project = collections.defaultdict(list)
+        for statistic in statistic_list(request, meter, query=query,
+                                        period=period,
+                                        groupby=['project_id']):
+            groupby = getattr(statistic, 'groupby', None) or {}
+            by_project[groupby.get('project_id')].append(statistic)
+        return [(project_id, by_project.get(project_id, []))
+                for project_id in project_ids]
+
+    def single(meter, project_id):
+        project_query = [{'field': 'project_id',
+                          'op': 'eq',
+                          'value': project_id}] + query
+        return [(project_id, statistic_list(request, meter,
+                                            query=project_query,
+                                            period=period))]
+
+    def submit(func, meter, *args):
+        def task():
+            try:
+                finished.put((func, meter, func(meter, *args), None))
+            except Exception:
+                finished.put((func, meter, None, sys.exc_info()))
+        tasks.append(queue.submit(task))
+
+    for meter in meter_names:
+        submit(grouped, meter)
+    received = failures = 0
+    while received < len(tasks):
+        try:
+            func, meter, results, exc_info = finished.get(timeout=timeout)
+        except Queue.Empty:
+            LOG.warning("%d of %d statistics calls timed out"
+                        % (len(tasks) - received, len(tasks)))
+            for task in tasks:
+                task.cancel()
+            break
+        received += 1
+        if exc_info is None:
+            for project_id, statistics in results:
+                missing.discard((meter, project_id))
+                yield meter, project_id, statistics
+        elif func is grouped and _groupby_unsupported(exc_info[1]):
+            for project_id in project_ids:
+                submit(single, meter, project_id)
+        else:
+            failures += 1
+            LOG.warning("Unable to retrieve the statistics of %s: %s"
+                        % (meter, exc_info[1]))
+    if failures:
+        LOG.warning("%d of %d statistics calls failed"
+                    % (failures, len(tasks)))
+    for meter, project_id in sorted(missing):
+        yield meter, project_id, None
+
+
+class ThreadedUpdateResourceWithStatistics(object):
+    """Fills the statistics of many resources on a shared worker pool.
+
+    Every (resource, meter) pair is one task on the process-wide
+    ``ceilometer`` pool, so the number of concurrent calls to the
+    Ceilometer API is bounded by ``CEILOMETER_STATISTICS_CONCURRENCY``
+    however many resources are listed. Statistics still missing after
+    ``CEILOMETER_STATISTICS_TIMEOUT`` seconds, or whose call failed, are
+    left as None on the resource and logged.
 
     :Parameters:
-      - `resource`: Resource or ResourceAggregate object, that will
-                    be filled by statistic data.
-      - `resources`: List of Resource or ResourceAggregate object,
-                     that will be filled by statistic data.
       - `resource_usage`: Wrapping resource usage object, that holds
                           all statistics data.
+      - `resources`: List of Resource or ResourceAggregate object,
+                     that will be filled by statistic data.
       - `meter_names`: List of meter names of the statistics we want.
       - `period`: In seconds. If no period is given, only one aggregate
                   statistic is returned. If given, a faceted result will be
                   returned, divided into given periods. Periods with no
                   data are ignored.
       - `stats_attr`: String representing the attribute name of the stats.
-                      E.g. (avg, max, min...) If None is given, whole
-                      statistic object is returned,
+                      E.g. (avg, max, min...) If None is given,
+                      whole statistic object is returned,
       - `additional_query`: Additional query for the statistics.
                             E.g. timespan, etc.
     """
-    # TODO(lsmola) Can be removed once Ceilometer supports sample-api
-    # and group-by, so all of this optimization will not be necessary.
-    # It is planned somewhere to I.
-
-    def __init__(self, resource_usage, resource, meter_names=None,
-                 period=None, filter_func=None, stats_attr=None,
-                 additional_query=None):
-        super(ThreadedUpdateResourceWithStatistics, self).__init__()
-        self.resource_usage = resource_usage
-        self.resource = resource
-        self.meter_names = meter_names
-        self.period = period
-        self.stats_attr = stats_attr
-        self.additional_query = additional_query
-
-    def run(self):
-        # Run the job
-        self.resource_usage.update_with_statistics(self.resource,
-            meter_names=self.meter_names, period=self.period,
-            stats_attr=self.stats_attr, additional_query=self.additional_query)
 
     @classmethod
     def process_list(cls, resource_usage, resources, meter_names=None,
                  period=None, filter_func=None, stats_attr=None,
                  additional_query=None):
-        threads = []
-
-        for resource in resources:
-            # add statistics data into resource
-            thread = cls(resource_usage, resource, meter_names=meter_names,
-                period=period, stats_attr=stats_attr,
-                additional_query=additional_query)
-            thread.start()
-            threads.append(thread)
+        if not meter_names:
+            raise ValueError("meter_names and resource must be defined to be"
+                             "able to obtain the statistics.")
 
-        for thread in threads:
-            thread.join()
+        request = resource_usage._request
+        calls = {}
+        for index, resource in enumerate(resources):
+            query = resource_usage._statistics_query(resource,
+                                                     additional_query)
+            for meter in meter_names:
+                calls[(index, meter)] = functools.partial(
+                    statistic_list, request, meter, query=query,
+                    period=period)
+
+        pool = concurrency.shared_pool(
+            'ceilometer',
+            getattr(settings, 'CEILOMETER_STATISTICS_CONCURRENCY', 10))
+        outcome = pool.run(
+            calls, timeout=getattr(settings, 'CEILOMETER_STATISTICS_TIMEOUT',
+                                   60))
+
+        for (index, meter), statistics in outcome.results.items():
+            resource_usage._set_statistics(resources[index], meter,
+                                           statistics, stats_attr)
+        for index, meter in list(outcome.errors) + list(outcome.pending):
+            resource_usage._set_statistics(resources[index], meter, None,
+                                           stats_attr)
+        if outcome.errors:
+            exc_info = outcome.errors.values()[0]
+            LOG.warning("%d of %d statistics calls failed, e.g. with: %s"
+                        % (len(outcome.errors), len(calls), exc_info[1]))
+        if outcome.pending:
+            LOG.warning("%d of %d statistics calls timed out"
+                        % (len(outcome.pending), len(calls)))
 
 
 class CeilometerUsage(object):
@@ -545,6 +652,15 @@ class CeilometerUsage(object):
             raise ValueError("meter_names and resource must be defined to be"
                              "able to obtain the statistics.")
 
+        query = self._statistics_query(resource, additional_query)
+        for meter in meter_names:
+            statistics = statistic_list(self._request, meter,
+                                        query=query, period=period)
+            self._set_statistics(resource, meter, statistics, stats_attr)
+
+        return resource
+
+    def _statistics_query(self, resource, additional_query=None):
         # query for identifying one resource in meters
         query = resource.query
         if additional_query:
@@ -552,28 +668,20 @@ class CeilometerUsage(object):
                 raise ValueError("Additional query must be list of"
                                  " conditions. See the docs for format.")
             query = query + additional_query
-
-        # TODO(lsmola) thread for each meter will be probably overkill
-        # but I should test lets say thread pool with 100 of threads
-        # and apply it only to this code.
-        # Though I do expect Ceilometer will support bulk requests,
-        # so all of this optimization will not be necessary.
-        for meter in meter_names:
-            statistics = statistic_list(self._request, meter,
-                                        query=query, period=period)
-            meter = meter.replace(".", "_")
-            if statistics:
-                if stats_attr:
-                    # I want to load only a specific attribute
-                    setattr(resource, meter,
-                            getattr(statistics[0], stats_attr, None))
-                else:
-                    # I want a dictionary of all statistics
-                    setattr(resource, meter, statistics)
+        return query
+
+    def _set_statistics(self, resource, meter, statistics, stats_attr=None):
+        meter = meter.replace(".", "_")
+        if statistics:
+            if stats_attr:
+                # I want to load only a specific attribute
+                setattr(resource, meter,
+                        getattr(statistics[0], stats_attr, None))
             else:
-                setattr(resource, meter, None)
-
-        return resource
+                # I want a dictionary of all statistics
+                setattr(resource, meter, statistics)
+        else:
+            setattr(resource, meter, None)
 
     def resources(self, query=None, filter_func=None,
                   with_users_and_tenants=False):
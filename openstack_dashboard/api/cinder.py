@@ -91,6 +91,7 @@ class VolumeSnapshot(BaseCinderAPIResourceWrapper):
               'os-extended-snapshot-attributes:project_id']
 
 
+@base.cached_client('volume')
 def cinderclient(request):
     api_version = VERSIONS.get_active_version()
 
@@ -144,9 +145,33 @@ def volume_list(request, search_opts=None):
     c_client = cinderclient(request)
     if c_client is None:
         return []
+    if (not search_opts and base.changes_since_enabled() and
+            getattr(settings, 'CINDER_CHANGES_SINCE', False)):
+        return _volume_list_incremental(request, c_client)
     return [Volume(v) for v in c_client.volumes.list(search_opts=search_opts)]
 
 
+def _volume_list_incremental(request, c_client):
+    """Lists the volumes of the current project from a cached snapshot.
+
+    Only used when ``CINDER_CHANGES_SINCE`` says the volume service
+    honours the ``changes-since`` filter, which this cinder release lacks.
+    """
+    manager = c_client.volumes
+
+    def list_infos(since):
+        search_opts = {'changes-since': since} if since else None
+        return [v._info for v in manager.list(search_opts=search_opts)]
+
+    infos = base.list_changes_since(
+        request, 'volumes', list_infos,
+        lambda info: info.get('status') in ('deleted', 'DELETED'))
+    infos.sort(key=lambda info: (info.get('created_at'), info['id']),
+               reverse=True)
+    return [Volume(manager.resource_class(manager, info, loaded=True))
+            for info in infos]
+
+
 def volume_get(request, volume_id):
     volume_data = cinderclient(request).volumes.get(volume_id)
 
@@ -176,15 +201,20 @@ def volume_create(request, size, name, description, volume_type,
     data = _replace_v2_parameters(data)
 
     volume = cinderclient(request).volumes.create(size, **data)
+    base.invalidate_quota_usages(request)
     return Volume(volume)
 
 
 def volume_extend(request, volume_id, new_size):
-    return cinderclient(request).volumes.extend(volume_id, new_size)
+    result = cinderclient(request).volumes.extend(volume_id, new_size)
+    base.invalidate_quota_usages(request)
+    return result
 
 
 def volume_delete(request, volume_id):
-    return cinderclient(request).volumes.delete(volume_id)
+    result = cinderclient(request).volumes.delete(volume_id)
+    base.invalidate_quota_usages(request)
+    return result
 
 
 def volume_update(request, volume_id, name, description):
@@ -214,12 +244,16 @@ def volume_snapshot_create(request, volume_id, name,
             'force': force}
     data = _replace_v2_parameters(data)
 
-    return VolumeSnapshot(cinderclient(request).volume_snapshots.create(
+    snapshot = VolumeSnapshot(cinderclient(request).volume_snapshots.create(
         volume_id, **data))
+    base.invalidate_quota_usages(request)
+    return snapshot
 
 
 def volume_snapshot_delete(request, snapshot_id):
-    return cinderclient(request).volume_snapshots.delete(snapshot_id)
+    result = cinderclient(request).volume_snapshots.delete(snapshot_id)
+    base.invalidate_quota_usages(request)
+    return result
 
 
 def tenant_quota_get(request, tenant_id):
@@ -230,7 +264,9 @@ def tenant_quota_get(request, tenant_id):
 
 
 def tenant_quota_update(request, tenant_id, **kwargs):
-    return cinderclient(request).quotas.update(tenant_id, **kwargs)
+    result = cinderclient(request).quotas.update(tenant_id, **kwargs)
+    base.invalidate_quota_usages(request, tenant_id)
+    return result
 
 
 def default_quota_get(request, tenant_id):
@@ -275,8 +311,8 @@ def list_extensions(request):
 def extension_supported(request, extension_name):
     """This method will determine if Cinder supports a given extension name.
     """
-    extensions = list_extensions(request)
-    for extension in extensions:
-        if extension.name == extension_name:
-            return True
-    return False
+    extensions = base.supported_extensions(
+        request, 'volume-v%s' % VERSIONS.get_active_version()['version'],
+        base.url_for(request, 'volume'),
+        lambda request: [ext.name for ext in list_extensions(request)])
+    return extension_name in extensions
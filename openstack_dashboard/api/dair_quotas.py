@@ -0,0 +1,248 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Backends for the DAIR custom quotas (``images`` and ``object_mb``).
+
+These quotas are not known to any OpenStack service API. They are read
+and written by shelling out to ``novac`` (``NovacQuotaBackend``, the
+default). The backend is chosen with the ``DAIR_QUOTA_BACKEND`` setting,
+which takes a dotted path to one of the classes below;
+``SQLQuotaBackend`` is opt-in, for deployments where novac is known to
+keep these quotas in nova's own quota tables.
+"""
+
+import logging
+import subprocess
+
+from django.conf import settings
+from django.utils.importlib import import_module  # noqa
+
+
+LOG = logging.getLogger(__name__)
+
+CUSTOM_QUOTA_RESOURCES = ('images', 'object_mb')
+DEFAULT_BACKEND = 'openstack_dashboard.api.dair_quotas.NovacQuotaBackend'
+
+
+def _defaults():
+    # Limits of the projects without a quota of their own. There are none
+    # unless configured, since they are the storage's business.
+    return dict(getattr(settings, 'DAIR_QUOTA_DEFAULTS', {}))
+
+
+class QuotaBackend(object):
+    """Interface of a DAIR custom quota backend."""
+
+    def get_quota(self, project_id, resource):
+        return self.get_quotas_many([project_id], [resource])[project_id][
+            resource]
+
+    def get_quotas(self, project_id, resources=CUSTOM_QUOTA_RESOURCES):
+        return self.get_quotas_many([project_id], resources)[project_id]
+
+    def get_quotas_many(self, project_ids,
+                        resources=CUSTOM_QUOTA_RESOURCES):
+        """Returns ``{project_id: {resource: limit}}`` for every project."""
+        raise NotImplementedError
+
+    def set_quota(self, project_id, resource, limit):
+        raise NotImplementedError
+
+    def get_usage(self, project_id, resource):
+        return self.get_used_resources(project_id).get(resource, 0)
+
+    def get_used_resources(self, project_id):
+        """Returns ``{resource: in_use}`` for the project."""
+        raise NotImplementedError
+
+
+class SQLQuotaBackend(QuotaBackend):
+    """Reads and writes the nova ``quotas`` and ``quota_usages`` tables.
+
+    This assumes that the quotas are stored like nova's own: the limit of
+    each project in a ``quotas`` row (``project_id``, ``resource``,
+    ``hard_limit``, ``deleted``) whose ``resource`` is ``images`` or
+    ``object_mb``, and the usage in ``quota_usages`` rows (``project_id``,
+    ``resource``, ``in_use``, ``deleted``) of the same resource names, in
+    the ``DAIR_QUOTA_DATABASE`` database (``nova``). Only enable it with
+    ``DAIR_QUOTA_BACKEND`` where novac is known to use this schema.
+
+    Projects without a ``quotas`` row get the limit configured in
+    ``DAIR_QUOTA_DEFAULTS``, or None (with a warning) when there is none.
+
+    Every call checks a connection out of the ``api.jt`` MySQL pool, and
+    ``get_quotas_many`` answers any number of projects with one query.
+    """
+    batch_size = 500
+
+    def _connect(self):
+        # Imported here since api.jt imports this module.
+        from openstack_dashboard.api import jt
+        return jt._dbconnect(getattr(settings, 'DAIR_QUOTA_DATABASE',
+                                     'nova'))
+
+    def get_quotas_many(self, project_ids,
+                        resources=CUSTOM_QUOTA_RESOURCES):
+        project_ids = list(set(project_ids))
+        resources = list(resources)
+        result = dict((project_id, {}) for project_id in project_ids)
+        if not project_ids or not resources:
+            return result
+
+        db = self._connect()
+        try:
+            c = db.cursor()
+            for i in range(0, len(project_ids), self.batch_size):
+                batch = project_ids[i:i + self.batch_size]
+                query = ("SELECT project_id, resource, hard_limit "
+                         "FROM quotas WHERE deleted = 0 "
+                         "AND project_id IN (%s) AND resource IN (%s)"
+                         % (', '.join(['%s'] * len(batch)),
+                            ', '.join(['%s'] * len(resources))))
+                c.execute(query, tuple(batch) + tuple(resources))
+                for project_id, resource, hard_limit in c.fetchall():
+                    result[project_id][resource] = int(hard_limit)
+        finally:
+            db.close()
+
+        defaults = _defaults()
+        for project_id, limits in result.items():
+            for resource in resources:
+                if resource in limits:
+                    continue
+                if defaults.get(resource) is None:
+                    LOG.warning("No %s quota found for project %s."
+                                % (resource, project_id))
+                limits[resource] = defaults.get(resource)
+        return result
+
+    def set_quota(self, project_id, resource, limit):
+        db = self._connect()
+        try:
+            c = db.cursor()
+            c.execute("UPDATE quotas SET hard_limit = %s, "
+                      "updated_at = UTC_TIMESTAMP() "
+                      "WHERE project_id = %s AND resource = %s "
+                      "AND deleted = 0",
+                      (limit, project_id, resource))
+            if c.rowcount == 0:
+                c.execute("INSERT INTO quotas (created_at, project_id, "
+                          "resource, hard_limit, deleted) "
+                          "VALUES (UTC_TIMESTAMP(), %s, %s, %s, 0)",
+                          (project_id, resource, limit))
+            db.commit()
+        finally:
+            db.close()
+
+    def get_used_resources(self, project_id):
+        db = self._connect()
+        try:
+            c = db.cursor()
+            c.execute("SELECT resource, SUM(in_use) FROM quota_usages "
+                      "WHERE project_id = %s AND deleted = 0 "
+                      "GROUP BY resource",
+                      (project_id,))
+            return dict((resource, int(used or 0))
+                        for resource, used in c.fetchall())
+        finally:
+            db.close()
+
+
+class NovacQuotaBackend(QuotaBackend):
+    """Runs the ``novac`` command line tool for every call.
+
+    ``DAIR_NOVAC_COMMAND`` overrides the command prefix.
+    """
+    # novac names the images quota in the singular.
+    command_names = {'images': 'image'}
+
+    def _command(self, resource, action):
+        return 'quota-%s-%s' % (self.command_names.get(resource, resource),
+                                action)
+
+    def _novac(self, *args):
+        cmd = list(getattr(settings, 'DAIR_NOVAC_COMMAND',
+                           ['sudo', '/root/novac/bin/novac']))
+        cmd.extend(str(arg) for arg in args)
+        return subprocess.check_output(cmd)
+
+    def get_quotas_many(self, project_ids,
+                        resources=CUSTOM_QUOTA_RESOURCES):
+        result = {}
+        for project_id in set(project_ids):
+            result[project_id] = dict(
+                (r, int(self._novac(self._command(r, 'get'),
+                                    project_id).strip()))
+                for r in resources)
+        return result
+
+    def set_quota(self, project_id, resource, limit):
+        self._novac(self._command(resource, 'set'), project_id, limit)
+
+    def get_usage(self, project_id, resource):
+        return int(self._novac(self._command(resource, 'usage'),
+                               project_id).strip())
+
+    def get_used_resources(self, project_id):
+        resources = {}
+        output = self._novac('quota-get-used-resources', project_id)
+        for line in output.split("\n"):
+            line = line.strip()
+            if line:
+                (resource, used) = line.split(' ')
+                resources[resource] = int(used)
+        return resources
+
+
+class FakeQuotaBackend(QuotaBackend):
+    """In-memory backend for tests and offline development."""
+
+    def __init__(self, quotas=None, usages=None):
+        self.quotas = quotas or {}
+        self.usages = usages or {}
+
+    def get_quotas_many(self, project_ids,
+                        resources=CUSTOM_QUOTA_RESOURCES):
+        defaults = _defaults()
+        return dict((project_id,
+                     dict((r, self.quotas.get(project_id, {}).get(
+                         r, defaults.get(r))) for r in resources))
+                    for project_id in set(project_ids))
+
+    def set_quota(self, project_id, resource, limit):
+        self.quotas.setdefault(project_id, {})[resource] = int(limit)
+
+    def get_used_resources(self, project_id):
+        return dict(self.usages.get(project_id, {}))
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    path = getattr(settings, 'DAIR_QUOTA_BACKEND', DEFAULT_BACKEND)
+    if _backend is None or _backend[0] != path:
+        module_name, class_name = path.rsplit('.', 1)
+        backend_class = getattr(import_module(module_name), class_name)
+        _backend = (path, backend_class())
+    return _backend[1]
+
+
+def set_backend(backend):
+    """Replaces the active backend, e.g. with a ``FakeQuotaBackend``."""
+    global _backend
+    path = getattr(settings, 'DAIR_QUOTA_BACKEND', DEFAULT_BACKEND)
+    _backend = (path, backend)
@@ -20,23 +20,30 @@
 
 from __future__ import absolute_import
 
+import collections
+import functools
 import itertools
 import logging
 import thread
+import threading
+import time
 
 from django.conf import settings
 import six.moves.urllib.parse as urlparse
 
 import glanceclient as glance_client
+from glanceclient import exc as glance_exceptions
 
 from horizon.utils import functions as utils
 
 from openstack_dashboard.api import base
+from openstack_dashboard.utils import concurrency
 
 
 LOG = logging.getLogger(__name__)
 
 
+@base.cached_client('image')
 def glanceclient(request):
     o = urlparse.urlparse(base.url_for(request, 'image'))
     url = "://".join((o.scheme, o.netloc))
@@ -62,6 +69,112 @@ def image_get(request, image_id):
     return image
 
 
+class ImageNameCache(object):
+    """Process-wide LRU cache of image names.
+
+    Holds at most ``size`` entries, each for ``ttl`` seconds. Images which
+    no longer exist are cached with a name of None.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, image_ids):
+        """Returns ``{image_id: name}`` for the ids found in the cache.
+
+        The ids may be any hashable key, e.g. scoped to a project.
+        """
+        now = time.time()
+        found = {}
+        with self._lock:
+            for image_id in image_ids:
+                entry = self._entries.pop(image_id, None)
+                if entry is None or entry[1] < now:
+                    continue
+                # Re-insert to mark the entry as most recently used.
+                self._entries[image_id] = entry
+                found[image_id] = entry[0]
+        return found
+
+    def set_many(self, names):
+        expires = time.time() + self.ttl
+        with self._lock:
+            for image_id, name in names.items():
+                self._entries.pop(image_id, None)
+                self._entries[image_id] = (name, expires)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_image_names = None
+
+
+def image_name_cache():
+    global _image_names
+    if _image_names is None:
+        _image_names = ImageNameCache(
+            getattr(settings, 'IMAGE_NAME_CACHE_SIZE', 1000),
+            getattr(settings, 'IMAGE_NAME_CACHE_TTL', 300))
+    return _image_names
+
+
+def _image_name(request, image_id):
+    try:
+        return image_get(request, image_id).name
+    except glance_exceptions.HTTPNotFound:
+        return None
+
+
+def _image_name_scope(request):
+    # Whether an image can be seen, and so its name, depends on the
+    # project (private and shared images), so names are cached per region
+    # and project.
+    return (getattr(request.user, 'services_region', None),
+            request.user.tenant_id)
+
+
+def image_names(request, image_ids):
+    """Returns ``{image_id: name}`` for the given image ids.
+
+    Only the distinct ids missing from the ``ImageNameCache`` are fetched,
+    one ``image_get`` each on the shared ``glance`` pool, since the v1 API
+    cannot filter a listing by id. Images which do not exist, or which the
+    project cannot see, map to None; ids which could not be looked up for
+    any other reason are left out.
+    """
+    image_ids = set(image_id for image_id in image_ids if image_id)
+    cache = image_name_cache()
+    scope = _image_name_scope(request)
+    names = {}
+    if cache.ttl:
+        cached = cache.get_many([scope + (image_id,)
+                                 for image_id in image_ids])
+        names = dict((key[-1], name) for key, name in cached.items())
+    missing = image_ids - set(names)
+    if missing:
+        pool = concurrency.shared_pool(
+            'glance', getattr(settings, 'GLANCE_LOOKUP_CONCURRENCY', 10))
+        outcome = pool.run(dict(
+            (image_id, functools.partial(_image_name, request, image_id))
+            for image_id in missing),
+            timeout=getattr(settings, 'GLANCE_LOOKUP_TIMEOUT', 30))
+        for image_id, exc_info in outcome.errors.items():
+            LOG.debug("Unable to look up image %s: %s"
+                      % (image_id, exc_info[1]))
+        if cache.ttl:
+            cache.set_many(dict((scope + (image_id,), name)
+                                for image_id, name in outcome.results.items()))
+        names.update(outcome.results)
+    return names
+
+
 def image_list_detailed(request, marker=None, filters=None, paginate=False):
     limit = getattr(settings, 'API_RESULT_LIMIT', 1000)
     page_size = utils.get_page_size(request)
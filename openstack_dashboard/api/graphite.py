@@ -0,0 +1,182 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client for the DAIR Graphite render API.
+
+All requests go through one ``requests.Session`` per process so that
+connections to Graphite are kept alive and reused, and every request has a
+timeout (``DAIR_GRAPHITE_TIMEOUT``, in seconds).
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+import requests
+from requests import adapters
+
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8180
+DEFAULT_TIMEOUT = 10
+POOL_SIZE = 10
+
+# The dashboard charts summarize every series into 5 minute buckets, so a
+# rendered chart cannot change before the next bucket boundary.
+CHART_BUCKET = 300
+CHART_CACHE_PREFIX = 'dair:graphite:chart:'
+
+_session = None
+_session_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = adapters.HTTPAdapter(pool_connections=1,
+                                               pool_maxsize=POOL_SIZE)
+                s.mount('http://', adapter)
+                s.mount('https://', adapter)
+                _session = s
+    return _session
+
+
+def render_url():
+    server = getattr(settings, 'DAIR_GRAPHITE_SERVER')
+    port = getattr(settings, 'DAIR_GRAPHITE_PORT', DEFAULT_PORT)
+    return 'http://%s:%s/render' % (server, port)
+
+
+def render(targets, timeout=None, **params):
+    """Issues a single ``/render`` call for one or more targets.
+
+    ``targets`` is a target string or a list of them; each becomes its own
+    ``target=`` parameter. Any other keyword (``format``, ``from``
+    passed as ``from_``, ``until``, ...) is sent as a query parameter.
+    Returns the ``requests`` response.
+    """
+    if isinstance(targets, basestring):
+        targets = [targets]
+    query = [('target', target) for target in targets]
+    for key, value in params.items():
+        if value is not None:
+            query.append((key.rstrip('_'), value))
+    if timeout is None:
+        timeout = getattr(settings, 'DAIR_GRAPHITE_TIMEOUT', DEFAULT_TIMEOUT)
+    response = session().get(render_url(), params=query, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def render_series(targets, **params):
+    """Renders several named targets in one request.
+
+    ``targets`` maps a name to a target expression. Each expression is
+    wrapped in ``alias()`` so the returned series can be matched back to
+    their names; the result maps each name to its list of datapoints
+    (``None`` for targets which returned no series).
+    """
+    aliased = ['alias(%s, "%s")' % (target, name)
+               for name, target in targets.items()]
+    params['format'] = 'json'
+    series = render(aliased, **params).json()
+    result = dict((name, None) for name in targets)
+    for s in series:
+        result[s['target']] = s['datapoints']
+    return result
+
+
+def last_value(datapoints):
+    """Returns the value of the last datapoint of a series."""
+    return datapoints[-1][0]
+
+
+class ChartResult(object):
+    """Raw body of a rendered chart and the ETag derived from it."""
+    def __init__(self, content):
+        self.content = content
+        self.etag = '"%s"' % hashlib.md5(content).hexdigest()
+
+
+class _Flight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+def chart_timeout(now=None):
+    """Seconds left until the next summarize bucket boundary."""
+    if now is None:
+        now = time.time()
+    return int(CHART_BUCKET - now % CHART_BUCKET) or CHART_BUCKET
+
+
+def _chart_key(key_parts):
+    key = '|'.join(unicode(part) for part in key_parts).encode('utf-8')
+    return CHART_CACHE_PREFIX + hashlib.md5(key).hexdigest()
+
+
+def _fetch_chart(url):
+    timeout = getattr(settings, 'DAIR_GRAPHITE_TIMEOUT', DEFAULT_TIMEOUT)
+    response = session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return ChartResult(response.content)
+
+
+def get_chart(key_parts, url):
+    """Returns the ``ChartResult`` for a chart render ``url``.
+
+    Results are cached under ``key_parts`` until the end of the current
+    summarize bucket. Concurrent requests for the same key within this
+    process are coalesced into a single Graphite request. Errors are never
+    cached; if the leading request fails the waiting callers retry on
+    their own.
+    """
+    key = _chart_key(key_parts)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        flight.event.wait(getattr(settings, 'DAIR_GRAPHITE_TIMEOUT',
+                                  DEFAULT_TIMEOUT))
+        if flight.result is not None:
+            return flight.result
+        return _fetch_chart(url)
+
+    try:
+        result = _fetch_chart(url)
+        cache.set(key, result, chart_timeout())
+        flight.result = result
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        flight.event.set()
+    return result
@@ -29,6 +29,7 @@ def format_parameters(params):
     return parameters
 
 
+@base.cached_client('orchestration')
 def heatclient(request, password=None):
     api_version = "1"
     insecure = getattr(settings, 'OPENSTACK_SSL_NO_VERIFY', False)
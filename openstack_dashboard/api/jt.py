@@ -1,12 +1,18 @@
 from dateutil import parser
 from django.conf import settings
+from django.core.cache import cache
 from horizon import conf
 import mysql.connector
 from django import http
 
 import glance
-import requests
-import datetime
+from openstack_dashboard.api import dair_quotas
+from openstack_dashboard.api import graphite
+from openstack_dashboard.api import showback
+from openstack_dashboard.api import showback_rollup
+from openstack_dashboard.utils import concurrency
+import functools
+import hashlib
 
 def _dbconnect(db=None):
     username = getattr(settings, 'DAIR_MYSQL_USERNAME')
@@ -27,15 +33,10 @@ def _dbconnect(db=None):
     return mysql.connector.connect(pool_name=db, pool_size=3, **dbconfig)
 
 def get_image_quota(project_id):
-    import subprocess
-    cmd = 'sudo /root/novac/bin/novac quota-image-get %s' % project_id
-    image_limit = subprocess.check_output(cmd, shell=True)
-    return int(image_limit.strip())
+    return dair_quotas.get_backend().get_quota(project_id, 'images')
 
 def set_image_quota(project_id, quota):
-    import subprocess
-    cmd = 'sudo /root/novac/bin/novac quota-image-set %s %s' % (project_id, quota)
-    subprocess.check_call(cmd, shell=True)
+    dair_quotas.get_backend().set_quota(project_id, 'images', quota)
 
 def get_image_count(project_id, request):
     (all_images, more_images) = glance.image_list_detailed(request)
@@ -43,221 +44,226 @@ def get_image_count(project_id, request):
     return len(images)
 
 def get_object_mb_quota(project_id):
-    import subprocess
-    cmd = 'sudo /root/novac/bin/novac quota-object_mb-get %s' % project_id
-    object_mb = subprocess.check_output(cmd, shell=True)
-    return int(object_mb.strip())
+    return dair_quotas.get_backend().get_quota(project_id, 'object_mb')
 
 def set_object_mb_quota(project_id, quota):
-    import subprocess
-    cmd = 'sudo /root/novac/bin/novac quota-object_mb-set %s %s' % (project_id, quota)
-    subprocess.check_call(cmd, shell=True)
+    dair_quotas.get_backend().set_quota(project_id, 'object_mb', quota)
 
 def get_object_mb_usage(project_id):
-    import subprocess
-    cmd = 'sudo /root/novac/bin/novac quota-object_mb-usage %s' % project_id
-    object_mb_usage = subprocess.check_output(cmd, shell=True)
-    return int(object_mb_usage.strip())
-
-def get_expiration_date(project_id):
-    try:
-        #print("get_expiration_date")
+    return dair_quotas.get_backend().get_usage(project_id, 'object_mb')
+
+def get_custom_quotas(project_id):
+    """Returns the images and object_mb quotas of a project in one call."""
+    return dair_quotas.get_backend().get_quotas(project_id)
+
+def get_custom_quotas_many(project_ids):
+    return dair_quotas.get_backend().get_quotas_many(project_ids)
+
+# Columns of project_information exposed through ProjectInformation. Dates
+# are formatted by MySQL so the wrappers below keep returning the exact
+# strings the forms and templates have always displayed. The connector
+# applies % formatting to the statement, so the placeholder list is
+# appended to it rather than formatted into it.
+PROJECT_INFORMATION_QUERY = ("SELECT project_id, "
+                             "date_format(expiration_date, '%%M %%d, %%Y'), "
+                             "date_format(start_date, '%%M %%d, %%Y'), "
+                             "notice, notice_link, research_participant "
+                             "FROM project_information "
+                             "WHERE project_id IN (")
+PROJECT_INFORMATION_BATCH_SIZE = 500
+PROJECT_INFORMATION_CACHE_PREFIX = 'dair:project_information:'
+
+
+class ProjectInformation(object):
+    """A single row of the DAIR ``project_information`` table.
+
+    ``exists`` is False for projects which have no row at all, so that
+    missing rows can be cached just like present ones.
+    """
+    def __init__(self, project_id, expiration_date=None, start_date=None,
+                 notice=None, notice_link=None, research_participant=None,
+                 exists=True):
+        self.project_id = project_id
+        self.expiration_date = expiration_date
+        self.start_date = start_date
+        self.notice = notice
+        self.notice_link = notice_link
+        self.research_participant = research_participant
+        self.exists = exists
+
+    def __repr__(self):
+        return "<ProjectInformation: %s>" % self.project_id
+
+
+class ProjectInformationStore(object):
+    """Cached, batched access to ``project_information``.
+
+    Rows are loaded whole, many projects per query, and kept in Django's
+    cache for ``DAIR_PROJECT_INFORMATION_CACHE_TTL`` seconds. The ``set_*``
+    writers in this module call ``invalidate`` after every write.
+    """
+
+    def _cache_key(self, project_id):
+        return PROJECT_INFORMATION_CACHE_PREFIX + project_id
+
+    def _timeout(self):
+        return getattr(settings, 'DAIR_PROJECT_INFORMATION_CACHE_TTL', 300)
+
+    def _load(self, project_ids):
+        rows = {}
         db = _dbconnect()
-        c = db.cursor()
-        query = "SELECT date_format(expiration_date, '%%M %%d, %%Y') from project_information where project_id = %s"
-        data = (project_id,)
-        c.execute(query, data)
-        date = c.fetchone()
-        if date is not None:
-            return date[0]
-        return "Information not available."
-    except mysql.connector.Error, e:
-        print(str(e))
-        return "Information not available..."
-    finally:
-        db.close()
-
-def set_expiration_date(project_id, expiration_date):
-    #print("set_expiration_date")
+        try:
+            c = db.cursor()
+            for i in range(0, len(project_ids),
+                           PROJECT_INFORMATION_BATCH_SIZE):
+                batch = project_ids[i:i + PROJECT_INFORMATION_BATCH_SIZE]
+                query = (PROJECT_INFORMATION_QUERY +
+                         ', '.join(['%s'] * len(batch)) + ')')
+                c.execute(query, tuple(batch))
+                for row in c.fetchall():
+                    rows[row[0]] = ProjectInformation(*row)
+        finally:
+            db.close()
+        for project_id in project_ids:
+            if project_id not in rows:
+                rows[project_id] = ProjectInformation(project_id,
+                                                      exists=False)
+        return rows
+
+    def get(self, project_id):
+        return self.get_many([project_id])[project_id]
+
+    def get_many(self, project_ids):
+        """Returns a dict of project id to ``ProjectInformation``.
+
+        Only the ids missing from the cache are fetched, in as few
+        queries as ``PROJECT_INFORMATION_BATCH_SIZE`` allows.
+        """
+        project_ids = list(set(project_ids))
+        keys = dict((self._cache_key(p), p) for p in project_ids)
+        cached = cache.get_many(keys.keys())
+        result = dict((keys[k], v) for k, v in cached.items())
+        missing = [p for p in project_ids if p not in result]
+        if missing:
+            loaded = self._load(missing)
+            cache.set_many(dict((self._cache_key(p), info)
+                                for p, info in loaded.items()),
+                           self._timeout())
+            result.update(loaded)
+        return result
+
+    def invalidate(self, project_id):
+        cache.delete(self._cache_key(project_id))
+
+
+project_information = ProjectInformationStore()
+
+
+def get_project_information(project_id):
+    return project_information.get(project_id)
+
+
+def get_project_information_many(project_ids):
+    return project_information.get_many(project_ids)
+
+
+def _set_project_information(project_id, column, value, is_date=False):
+    db = None
     try:
+        if is_date:
+            value = parser.parse(value)
         db = _dbconnect()
         c = db.cursor()
-        expiration_date = parser.parse(expiration_date)
-        query = "INSERT INTO project_information (project_id, expiration_date) VALUES (%s, %s) ON DUPLICATE KEY UPDATE expiration_date = %s"
-        data = (project_id, expiration_date, expiration_date)
+        query = ("INSERT INTO project_information (project_id, %(col)s) "
+                 "VALUES (%%s, %%s) ON DUPLICATE KEY UPDATE %(col)s = %%s"
+                 % {'col': column})
+        data = (project_id, value, value)
         c.execute(query, data)
         db.commit()
     except Exception as e:
         print(str(e))
     finally:
-        db.close()
+        if db is not None:
+            db.close()
+        project_information.invalidate(project_id)
+        if project_id == 'admin':
+            invalidate_branding()
 
-def get_start_date(project_id):
-    #print("get_start_date")
+
+def get_expiration_date(project_id):
     try:
-        db = _dbconnect()
-        c = db.cursor()
-        query = "SELECT date_format(start_date, '%%M %%d, %%Y') from project_information where project_id = %s"
-        data = (project_id,)
-        c.execute(query, data)
-        date = c.fetchone()
-        if date is not None:
-            return date[0]
-        return "Information not available."
-    except mysql.connector.Error, e:
+        info = project_information.get(project_id)
+    except mysql.connector.Error as e:
         print(str(e))
         return "Information not available..."
-    finally:
-        db.close()
+    if info.exists:
+        return info.expiration_date
+    return "Information not available."
 
-def set_start_date(project_id, start_date):
-    #print("set_start_date")
+def set_expiration_date(project_id, expiration_date):
+    _set_project_information(project_id, 'expiration_date',
+                             expiration_date, is_date=True)
+
+def get_start_date(project_id):
     try:
-        db = _dbconnect()
-        c = db.cursor()
-        start_date = parser.parse(start_date)
-        query = "INSERT INTO project_information (project_id, start_date) VALUES (%s, %s) ON DUPLICATE KEY UPDATE start_date = %s"
-        data = (project_id, start_date, start_date)
-        c.execute(query, data)
-        db.commit()
-    except Exception as e:
+        info = project_information.get(project_id)
+    except mysql.connector.Error as e:
         print(str(e))
-    finally:
-        db.close()
+        return "Information not available..."
+    if info.exists:
+        return info.start_date
+    return "Information not available."
+
+def set_start_date(project_id, start_date):
+    _set_project_information(project_id, 'start_date', start_date,
+                             is_date=True)
 
 def get_dair_notice(project_id):
-    #print("get_dair_notice")
     try:
-        db = _dbconnect()
-        c = db.cursor()
-        query = "SELECT notice from project_information where project_id = %s"
-        data = (project_id,)
-        c.execute(query, data)
-        notice = c.fetchone()
-        if notice is not None:
-            return notice[0]
-        return None
-    except mysql.connector.Error, e:
+        return project_information.get(project_id).notice
+    except mysql.connector.Error as e:
         print(str(e))
         return "Information not available..."
-    finally:
-        db.close()
 
 def get_research_participant(project_id):
-    #print("get_research_participant")
     try:
-        db = _dbconnect()
-        c = db.cursor()
-        query = "SELECT research_participant from project_information where project_id = %s"
-        data = (project_id,)
-        c.execute(query, data)
-        research_participant = c.fetchone()
-        if research_participant is not None:
-            return research_participant[0]
-        return None
-    except mysql.connector.Error, e:
+        return project_information.get(project_id).research_participant
+    except mysql.connector.Error as e:
         print(str(e))
         return "Information not available..."
-    finally:
-        db.close()
 
-def set_dair_notice(project_id, notice, is_admin_notice):
-    #print("set_dair_notice")
-    try:
-        if is_admin_notice:
-            project_id = 'admin'
-        db = _dbconnect()
-        c = db.cursor()
-        query = "INSERT INTO project_information (project_id, notice) VALUES (%s, %s) ON DUPLICATE KEY UPDATE notice = %s"
-        data = (project_id, notice, notice)
-        c.execute(query, data)
-        db.commit()
-    except Exception as e:
-        print(str(e))
-    finally:
-        db.close()
+def set_dair_notice(project_id, notice, is_admin_notice=False):
+    if is_admin_notice:
+        project_id = 'admin'
+    _set_project_information(project_id, 'notice', notice)
 
 def set_research_participant(project_id, research_participant):
-    #print("set_research_participant")
-    try:
-        db = _dbconnect()
-        c = db.cursor()
-        query = "INSERT INTO project_information (project_id, research_participant) VALUES (%s, %s) ON DUPLICATE KEY UPDATE research_participant = %s"
-        data = (project_id, research_participant, research_participant)
-        c.execute(query, data)
-        db.commit()
-    except Exception as e:
-        print(str(e))
-    finally:
-        db.close()
+    _set_project_information(project_id, 'research_participant',
+                             research_participant)
 
 def get_dair_notice_link(project_id):
-    #print("get_dair_notice_link")
     try:
-        db = _dbconnect()
-        c = db.cursor()
-        query = "SELECT notice_link from project_information where project_id = %s"
-        data = (project_id,)
-        c.execute(query, data)
-        notice_link = c.fetchone()
-        if notice_link is not None:
-            return notice_link[0]
-        return ""
-    except mysql.connector.Error, e:
+        info = project_information.get(project_id)
+    except mysql.connector.Error as e:
         print(str(e))
         return "Information not available..."
-    finally:
-        db.close()
+    if info.exists:
+        return info.notice_link
+    return ""
 
-def set_dair_notice_link(project_id, link, is_admin_notice):
-    #print("set_dair_notice_link")
-    try:
-        if is_admin_notice:
-            project_id = 'admin'
-        db = _dbconnect()
-        c = db.cursor()
-        query = "INSERT INTO project_information (project_id, notice_link) VALUES (%s, %s) ON DUPLICATE KEY UPDATE notice_link = %s"
-        data = (project_id, link, link)
-        c.execute(query, data)
-        db.commit()
-    except Exception as e:
-        print(str(e))
-    finally:
-        db.close()
+def set_dair_notice_link(project_id, link, is_admin_notice=False):
+    if is_admin_notice:
+        project_id = 'admin'
+    _set_project_information(project_id, 'notice_link', link)
 
 def get_dair_admin_notice():
-    #print("get_dair_admin_notice")
-    try:
-        db = _dbconnect()
-        c = db.cursor()
-        query = "SELECT notice from project_information where project_id = 'admin'"
-        c.execute(query)
-        notice = c.fetchone()
-        if notice is not None:
-            return notice[0]
-        return None
-    except mysql.connector.Error, e:
-        print(str(e))
-        return "Information not available..."
-    finally:
-        db.close()
+    return get_dair_notice('admin')
 
 def get_dair_admin_notice_link():
-    #print("get_dair_admin_notice_link")
-    try:
-        db = _dbconnect()
-        c = db.cursor()
-        query = "SELECT notice_link from project_information where project_id = 'admin'"
-        c.execute(query)
-        notice_link = c.fetchone()
-        if notice_link is not None and notice_link[0] != "":
-            return notice_link[0]
-        return None
-    except mysql.connector.Error, e:
-        print(str(e))
-        return "Information not available..."
-    finally:
-        db.close()
+    link = get_dair_notice_link('admin')
+    if link:
+        return link
+    return None
 
 def get_reseller_logos():
     #logos = {}
@@ -284,6 +290,7 @@ def set_reseller_logo(project_id, logo):
     #with open('/etc/openstack-dashboard/dair-reseller-logos.txt', 'w') as f:
     #    for k, v in logos.iteritems():
     #        f.write("%s:%s\n" % (k,v))
+    invalidate_branding()
     return
 
 def get_reseller_splash(domain):
@@ -294,36 +301,68 @@ def get_reseller_splash(domain):
     #    return "Information not available."
     return "Information not available."
 
+# Chrome shown on every page (reseller branding and the admin notice) is
+# cached per HTTP host domain. Entries are namespaced by a generation
+# counter so that one write can invalidate every domain at once.
+BRANDING_CACHE_PREFIX = 'dair:branding:'
+BRANDING_GENERATION_KEY = 'dair:branding:generation'
+BRANDING_GENERATION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _branding_cache_key(domain):
+    generation = cache.get(BRANDING_GENERATION_KEY, 0)
+    if isinstance(domain, unicode):
+        domain = domain.encode('utf-8')
+    # The domain comes from the Host header; hash it to get a safe key.
+    return '%s%s:%s' % (BRANDING_CACHE_PREFIX, generation,
+                        hashlib.md5(domain).hexdigest())
+
+
+def get_branding(domain):
+    """Returns the reseller logo/splash and admin notice for ``domain``.
+
+    The result is a dict cached for ``DAIR_BRANDING_CACHE_TTL`` seconds, so
+    rendering a page normally needs no database query for its chrome.
+    """
+    key = _branding_cache_key(domain)
+    branding = cache.get(key)
+    if branding is None:
+        branding = {
+            'reseller_logo': get_reseller_logo(domain),
+            'reseller_splash': get_reseller_splash(domain),
+            'dair_admin_notice': get_dair_admin_notice(),
+            'dair_admin_notice_link': get_dair_admin_notice_link(),
+        }
+        cache.set(key, branding,
+                  getattr(settings, 'DAIR_BRANDING_CACHE_TTL', 60))
+    return branding
+
+
+def invalidate_branding():
+    try:
+        cache.incr(BRANDING_GENERATION_KEY)
+    except ValueError:
+        cache.set(BRANDING_GENERATION_KEY, 1, BRANDING_GENERATION_TIMEOUT)
+
 def get_used_resources(project_id):
-    import subprocess
-    resources = {}
-    cmd = 'sudo /root/novac/bin/novac quota-get-used-resources %s' % project_id
-    x = subprocess.check_output(cmd, shell=True)
-    for r in x.split("\n"):
-        r = r.strip()
-        if r:
-            (resource, used) = r.split(' ')
-            resources[resource] = used
-    return resources
+    return dair_quotas.get_backend().get_used_resources(project_id)
+
+def _graphite_time(date):
+    return parser.parse(date).strftime('%H:%M%Y%m%d')
+
 def get_dair_bandwidth_showback_usage(tenant, start, end):
     usage = {}
     try:
-        start_date = parser.parse(start)
-        start_date=str(start_date)
-        start_date1 = datetime.datetime.strptime(start_date, '%Y-%m-%d %H:%M:%S')
-        start_date1 = start_date1.strftime('%H:%M%Y%m%d')
-        end_date = parser.parse(end)
-        end_date=str(end_date)
-        end_date1 = datetime.datetime.strptime(end_date, '%Y-%m-%d %H:%M:%S')
-        end_date1 = end_date1.strftime('%H:%M%Y%m%d')
-        graphite = getattr(settings, 'DAIR_GRAPHITE_SERVER')
-        query_bytes_received = "target=integral(nonNegativeDerivative(sumSeries(keepLastValue(projects.%s.*.network.total_bytes_received))))&from=%s&until=%s" % (tenant, start_date1, end_date1)
-        query_bytes_transmitted = "target=integral(nonNegativeDerivative(sumSeries(keepLastValue(projects.%s.*.network.total_bytes_transmitted))))&from=%s&until=%s" % (tenant, start_date1, end_date1)
-        bytes_received = requests.get ('http://'+graphite+':8180/render?'+query_bytes_received+'&format=json')
-        bytes_transmitted = requests.get ('http://'+graphite+':8180/render?'+query_bytes_transmitted+'&format=json')
+        targets = {
+            'bytes_received': "integral(nonNegativeDerivative(sumSeries(keepLastValue(projects.%s.*.network.total_bytes_received))))" % tenant,
+            'bytes_transmitted': "integral(nonNegativeDerivative(sumSeries(keepLastValue(projects.%s.*.network.total_bytes_transmitted))))" % tenant,
+        }
+        series = graphite.render_series(targets,
+                                        from_=_graphite_time(start),
+                                        until=_graphite_time(end))
         usage[tenant] = {}
-        usage[tenant]['bytes_received'] = '%.2f' % round((bytes_received.json()[0][u'datapoints'][-1][0] /1024 /1024),2)
-        usage[tenant]['bytes_transmitted']= '%.2f' % round((bytes_transmitted.json()[0][u'datapoints'][-1][0] /1024 /1024),2)
+        usage[tenant]['bytes_received'] = '%.2f' % round((graphite.last_value(series['bytes_received']) /1024 /1024),2)
+        usage[tenant]['bytes_transmitted']= '%.2f' % round((graphite.last_value(series['bytes_transmitted']) /1024 /1024),2)
     except Exception as e:
         print(str(e))
         return "Information not available..."
@@ -332,147 +371,82 @@ def get_dair_bandwidth_showback_usage(tenant, start, end):
 def get_dair_object_store_showback_usage(tenant, start, end):
     usage = {}
     try:
-        graphite = getattr(settings, 'DAIR_GRAPHITE_SERVER')
-
-        query_container_count = "target=sumSeries(keepLastValue(projects.%s.*.swift.container_count,100))" % (tenant)
-        query_space_usage = "target=sumSeries(keepLastValue(projects.%s.*.swift.space_usage,100))" % (tenant)
-        query_object_count = "target=sumSeries(keepLastValue(projects.%s.*.swift.object_count,100))" % (tenant)
-
-        container_count = requests.get ('http://'+graphite+':8180/render?'+query_container_count+'&format=json')
-        space_usage = requests.get ('http://'+graphite+':8180/render?'+query_space_usage+'&format=json')
-        object_count = requests.get ('http://'+graphite+':8180/render?'+query_object_count+'&format=json')
+        targets = {
+            'container_count': "sumSeries(keepLastValue(projects.%s.*.swift.container_count,100))" % tenant,
+            'space_usage': "sumSeries(keepLastValue(projects.%s.*.swift.space_usage,100))" % tenant,
+            'object_count': "sumSeries(keepLastValue(projects.%s.*.swift.object_count,100))" % tenant,
+        }
+        series = graphite.render_series(targets)
 
         usage[tenant] = {}
-        usage[tenant]['container_count'] = int(container_count.json()[0][u'datapoints'][-1][0])
-        usage[tenant]['object_count'] = int(object_count.json()[0][u'datapoints'][-1][0])
-        usage[tenant]['space_usage']= '%.2f' % round((space_usage.json()[0][u'datapoints'][-1][0] /1024 /1024),2)
+        usage[tenant]['container_count'] = int(graphite.last_value(series['container_count']))
+        usage[tenant]['object_count'] = int(graphite.last_value(series['object_count']))
+        usage[tenant]['space_usage']= '%.2f' % round((graphite.last_value(series['space_usage']) /1024 /1024),2)
     except Exception as e:
         print(str(e))
         return "Information not available..."
     return usage
 
-def get_dair_nova_showback_usage(tenant, start, end):
-    usage = {}
-    try:
-    #    prices = getattr(settings, 'DAIR_SHOWBACK_PRICES')
-    #    total_cost = 0
-        start_date = parser.parse(start)
-        end_date = parser.parse(end)
-        db = _dbconnect('nova')
-        c = db.cursor()
-        query = "SELECT i.created_at, i.deleted_at, it.name FROM instances AS i LEFT JOIN instance_types AS it ON i.instance_type_id=it.id WHERE i.project_id = %s AND i.created_at < %s AND (i.deleted_at > %s OR i.deleted_at IS NULL)"
-        data = (tenant, end_date, start_date)
-        c.execute(query, data)
-        rows = c.fetchall()
-        for row in rows:
-            instance_start_date = 0
-            if ((start_date - row[0]).total_seconds() > 0):
-                # Showback window is newer than instance creation
-                instance_start_date = start_date
-            else:
-                instance_start_date = row[0]
-            flavor_name = row[2]
-            # If instance was deleted
-            if row[1]:
-                end_date = row[1]
-            hours = abs(int((end_date - instance_start_date).total_seconds() / 60 / 60))
-        #tm
-        #    if flavor_name in prices['nova']:
-        #        flavor_cost = prices['nova'][flavor_name]
-        #    else:
-        #        flavor_cost = 0
-            if flavor_name in usage:
-                usage[flavor_name]['count'] += 1
-                usage[flavor_name]['hours'] += hours
-         #       usage[flavor_name]['cost'] += float("%.2f" % (flavor_cost * hours))
-         #       total_cost += float("%.2f" % (flavor_cost * hours))
-            else:
-                usage[flavor_name] = {}
-                usage[flavor_name]['count'] = 1
-                usage[flavor_name]['hours'] = hours
-          #      usage[flavor_name]['cost'] = float("%.2f" % (flavor_cost * hours))
-          #      total_cost += usage[flavor_name]['cost']
-       # usage['total_cost'] = total_cost
-    except mysql.connector.Error, e:
-        print(str(e))
-        return "Information not available..."
-    finally:
-        db.close()
+SHOWBACK_CACHE_PREFIX = 'dair:showback:'
+
+
+def _showback_cache_key(category, tenant, start, end):
+    key = '|'.join((category, tenant, start, end))
+    if isinstance(key, unicode):
+        key = key.encode('utf-8')
+    return SHOWBACK_CACHE_PREFIX + hashlib.md5(key).hexdigest()
+
+def get_dair_showback_usage(tenant, start, end, categories=None):
+    """Returns showback usage of a project, computing categories in parallel.
+
+    The result is a dict keyed by the showback page sections
+    (``Bandwidth``, ``Swift``, ``Instances``, ``Snapshots`` and
+    ``Volumes``), or by ``categories`` if given. Each section is cached
+    per (tenant, window) for ``DAIR_SHOWBACK_CACHE_TTL`` seconds so the
+    page and its exports share one computation.
+    """
+    collectors = {
+        'Bandwidth': get_dair_bandwidth_showback_usage,
+        'Swift': get_dair_object_store_showback_usage,
+        'Instances': get_dair_nova_showback_usage,
+        'Snapshots': get_dair_glance_showback_usage,
+        'Volumes': get_dair_cinder_showback_usage,
+    }
+    if categories is None:
+        categories = collectors.keys()
+    keys = dict((_showback_cache_key(c, tenant, start, end), c)
+                for c in categories)
+    usage = dict((keys[k], v) for k, v in cache.get_many(keys.keys()).items())
+
+    missing = [c for c in categories if c not in usage]
+    if missing:
+        computed = concurrency.parallel(dict(
+            (name, functools.partial(collectors[name], tenant, start, end))
+            for name in missing))
+        # Failed collectors return an error string; don't keep those.
+        cache.set_many(dict((_showback_cache_key(c, tenant, start, end), v)
+                            for c, v in computed.items()
+                            if isinstance(v, dict)),
+                       getattr(settings, 'DAIR_SHOWBACK_CACHE_TTL', 300))
+        usage.update(computed)
     return usage
 
-def get_dair_glance_showback_usage(tenant, start, end):
-    usage = {}
+def _showback_usage(category, tenant, start, end):
+    if getattr(settings, 'DAIR_SHOWBACK_ROLLUP', False):
+        source = showback_rollup.rollup
+    else:
+        source = showback.engine
     try:
-       # prices = getattr(settings, 'DAIR_SHOWBACK_PRICES')
-       # total_cost = 0
-        start_date = parser.parse(start)
-        end_date = parser.parse(end)
-        db = _dbconnect('glance')
-        c = db.cursor()
-        query = "SELECT created_at, deleted_at, name, size FROM images WHERE owner = %s AND created_at < %s AND (deleted_at > %s OR deleted_at IS NULL) AND status != 'killed'"
-        data = (tenant, end_date, start_date)
-        c.execute(query, data)
-        rows = c.fetchall()
-        for row in rows:
-            image_start_date = 0
-            if ((start_date - row[0]).total_seconds() > 0):
-                # Showback window is newer than instance creation
-                image_start_date = start_date
-            else:
-                image_start_date = row[0]
-            name = row[2]
-            if row[1]:
-                end_date = row[1]
-            hours = int((end_date - image_start_date).total_seconds() / 60 / 60)
-            usage[name] = {}
-            usage[name]['hours'] = hours
-            if row[3] is not None:
-                usage[name]['size'] = row[3] / 1024 / 1024 / 1024.0
-            else:
-                usage[name]['size'] = 0
-        #    usage[name]['cost'] = float("%.2f" % (usage[name]['size'] * hours * prices['glance']))
-        #    total_cost += usage[name]['cost']
-        #usage['total_cost'] = total_cost
-    except mysql.connector.Error, e:
+        return source.usage(category, [tenant], start, end)[tenant].as_dict()
+    except mysql.connector.Error as e:
         print(str(e))
         return "Information not available..."
-    finally:
-        db.close()
-    return usage
+
+def get_dair_nova_showback_usage(tenant, start, end):
+    return _showback_usage(showback.NOVA, tenant, start, end)
+
+def get_dair_glance_showback_usage(tenant, start, end):
+    return _showback_usage(showback.GLANCE, tenant, start, end)
 
 def get_dair_cinder_showback_usage(tenant, start, end):
-    usage = {}
-    try:
-        #prices = getattr(settings, 'DAIR_SHOWBACK_PRICES')
-        #total_cost = 0
-        start_date = parser.parse(start)
-        end_date = parser.parse(end)
-        db = _dbconnect('cinder')
-        c = db.cursor()
-        query = "SELECT created_at, deleted_at, display_name, size FROM volumes WHERE project_id = %s AND created_at < %s AND (deleted_at > %s OR deleted_at IS NULL)"
-        data = (tenant, end_date, start_date)
-        c.execute(query, data)
-        rows = c.fetchall()
-        for row in rows:
-            volume_start_date = 0
-            if ((start_date - row[0]).total_seconds() > 0):
-                # Showback window is newer than instance creation
-                volume_start_date = start_date
-            else:
-                volume_start_date = row[0]
-            name = row[2]
-            if row[1]:
-                end_date = row[1]
-            hours = int((end_date - volume_start_date).total_seconds() / 60 / 60)
-            usage[name] = {}
-            usage[name]['hours'] = hours
-            usage[name]['size'] = row[3]
-         #   usage[name]['cost'] = float("%.2f" % (usage[name]['size'] * hours * prices['cinder']))
-         #   total_cost += usage[name]['cost']
-       # usage['total_cost'] = total_cost
-    except mysql.connector.Error, e:
-        print(str(e))
-        return "Information not available..."
-    finally:
-        db.close()
-    return usage
+    return _showback_usage(showback.CINDER, tenant, start, end)
@@ -55,21 +55,32 @@ def tenant_floating_ip_get(request, floating_ip_id):
 
 
 def tenant_floating_ip_allocate(request, pool=None):
-    return NetworkClient(request).floating_ips.allocate(pool)
+    floating_ip = NetworkClient(request).floating_ips.allocate(pool)
+    base.invalidate_quota_usages(request)
+    return floating_ip
 
 
 def tenant_floating_ip_release(request, floating_ip_id):
-    return NetworkClient(request).floating_ips.release(floating_ip_id)
+    result = NetworkClient(request).floating_ips.release(floating_ip_id)
+    base.invalidate_quota_usages(request)
+    # Released addresses are also dropped from their server.
+    base.invalidate_changes_since(request, 'servers')
+    return result
 
 
 def floating_ip_associate(request, floating_ip_id, port_id):
-    return NetworkClient(request).floating_ips.associate(floating_ip_id,
-                                                         port_id)
+    result = NetworkClient(request).floating_ips.associate(floating_ip_id,
+                                                           port_id)
+    # Server addresses are not covered by nova's changes-since filter.
+    base.invalidate_changes_since(request, 'servers')
+    return result
 
 
 def floating_ip_disassociate(request, floating_ip_id, port_id):
-    return NetworkClient(request).floating_ips.disassociate(floating_ip_id,
-                                                            port_id)
+    result = NetworkClient(request).floating_ips.disassociate(
+        floating_ip_id, port_id)
+    base.invalidate_changes_since(request, 'servers')
+    return result
 
 
 def floating_ip_target_list(request):
@@ -129,8 +140,10 @@ def server_security_groups(request, instance_id):
 
 def server_update_security_groups(request, instance_id,
                                   new_security_group_ids):
-    return NetworkClient(request).secgroups.update_instance_security_group(
+    result = NetworkClient(request).secgroups.update_instance_security_group(
         instance_id, new_security_group_ids)
+    base.invalidate_changes_since(request, 'servers')
+    return result
 
 
 def security_group_backend(request):
@@ -22,10 +22,12 @@
 from __future__ import absolute_import
 
 import collections
+import functools
 import logging
 import netaddr
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.datastructures import SortedDict
 from django.utils.translation import ugettext_lazy as _
 
@@ -35,6 +37,7 @@ from horizon.utils.memoized import memoized  # noqa
 from openstack_dashboard.api import base
 from openstack_dashboard.api import network_base
 from openstack_dashboard.api import nova
+from openstack_dashboard.utils import concurrency
 
 from neutronclient.v2_0 import client as neutron_client
 
@@ -428,6 +431,7 @@ def get_ipver_str(ip_version):
     return IP_VERSION_DICT.get(ip_version, '')
 
 
+@base.cached_client('network')
 def neutronclient(request):
     insecure = getattr(settings, 'OPENSTACK_SSL_NO_VERIFY', False)
     cacert = getattr(settings, 'OPENSTACK_SSL_CACERT', None)
@@ -571,6 +575,31 @@ def port_list(request, **params):
     return [Port(p) for p in ports]
 
 
+# The port attributes the network topology draws.
+TOPOLOGY_PORT_FIELDS = ['id', 'network_id', 'device_id', 'device_owner',
+                        'fixed_ips', 'status', 'admin_state_up']
+
+
+def port_list_for_topology(request, network_ids, router_ids):
+    """Lists the ports drawn by the network topology of the project.
+
+    Instead of every port the user can see, which for an admin is every
+    port of the cloud, only the project's ports on ``network_ids`` and the
+    gateway ports of ``router_ids`` are listed, through chunked id filters.
+    """
+    results = _list_by_ids(request, {
+        'ports': ('list_ports', 'ports', 'network_id', network_ids,
+                  {'tenant_id': request.user.tenant_id,
+                   'fields': TOPOLOGY_PORT_FIELDS}),
+        'gateways': ('list_ports', 'ports', 'device_id', router_ids,
+                     {'device_owner': 'network:router_gateway',
+                      'fields': TOPOLOGY_PORT_FIELDS})})
+    # Ports matching both filters are listed twice.
+    ports = SortedDict((port['id'], port)
+                       for port in results['ports'] + results['gateways'])
+    return [Port(port) for port in ports.values()]
+
+
 def port_get(request, port_id, **params):
     LOG.debug("port_get(): portid=%s, params=%s" % (port_id, params))
     port = neutronclient(request).show_port(port_id, **params).get('port')
@@ -732,7 +761,9 @@ def tenant_quota_get(request, tenant_id):
 
 def tenant_quota_update(request, tenant_id, **kwargs):
     quotas = {'quota': kwargs}
-    return neutronclient(request).update_quota(tenant_id, quotas)
+    result = neutronclient(request).update_quota(tenant_id, quotas)
+    base.invalidate_quota_usages(request, tenant_id)
+    return result
 
 
 def agent_list(request):
@@ -745,6 +776,55 @@ def provider_list(request):
     return providers['service_providers']
 
 
+def _chunks(ids, size):
+    ids = sorted(set(ids))
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def _list_by_ids(request, calls):
+    """Runs neutron list calls filtered by (possibly many) ids.
+
+    ``calls`` maps a name to ``(list method name, result key, filter name,
+    ids, extra params)``. Every id filter is split into chunks of at most
+    ``NEUTRON_FILTER_CHUNK_SIZE`` ids, so that no query string grows past
+    the server limits, and all of the chunks are listed concurrently on the
+    shared ``neutron`` pool. Returns ``{name: [resource dicts]}``; if any
+    chunk failed or timed out, an exception is raised.
+    """
+    size = getattr(settings, 'NEUTRON_FILTER_CHUNK_SIZE', 100)
+
+    def list_chunk(method, key, params):
+        # Runs on the pool's threads; neutronclient() keeps one client per
+        # thread, since they are not thread safe.
+        return getattr(neutronclient(request), method)(**params).get(key)
+
+    chunks = {}
+    for name, (method, key, filter_name, ids, params) in calls.items():
+        for i, chunk in enumerate(_chunks(ids, size)):
+            chunks[(name, i)] = functools.partial(
+                list_chunk, method, key, dict(params, **{filter_name: chunk}))
+    results = dict((name, []) for name in calls)
+    if not chunks:
+        return results
+
+    pool = concurrency.shared_pool(
+        'neutron', getattr(settings, 'NEUTRON_LOOKUP_CONCURRENCY', 10))
+    outcome = pool.run(chunks,
+                       timeout=getattr(settings, 'NEUTRON_LOOKUP_TIMEOUT', 30))
+    for key in sorted(chunks):
+        if key in outcome.errors:
+            exc_info = outcome.errors[key]
+            raise exc_info[0], exc_info[1], exc_info[2]
+        if key in outcome.pending:
+            raise concurrency.FetchTimeout("Timed out listing %s." % key[0])
+        results[key[0]].extend(outcome.results[key])
+    return results
+
+
+def _network_names_cache_key(request):
+    return 'neutron:network_names:%s' % request.user.tenant_id
+
+
 def servers_update_addresses(request, servers):
     """Retrieve servers networking information from Neutron if enabled.
 
@@ -752,32 +832,57 @@ def servers_update_addresses(request, servers):
        and Nova's networking info caching mechanism is not fast enough.
     """
 
-    # Get all (filtered for relevant servers) information from Neutron
+    # Network names seldom change, so they are cached per project for
+    # NEUTRON_NETWORK_NAME_CACHE_TTL seconds.
+    names_ttl = getattr(settings, 'NEUTRON_NETWORK_NAME_CACHE_TTL', 300)
+    names_key = _network_names_cache_key(request)
+
+    # Get all (filtered for relevant servers) information from Neutron.
+    # The floating IPs and networks only depend on the ports, so they are
+    # listed together once the ports are known.
     try:
-        ports = port_list(request,
-                          device_id=[instance.id for instance in servers])
-        floating_ips = FloatingIpManager(request).list(
-            port_id=[port.id for port in ports])
-        networks = network_list(request,
-                                id=[port.network_id for port in ports])
+        ports = _list_by_ids(request, {
+            'ports': ('list_ports', 'ports', 'device_id',
+                      [instance.id for instance in servers],
+                      {'fields': ['id', 'device_id', 'network_id',
+                                  'mac_address', 'fixed_ips']}),
+        })['ports']
+        calls = {
+            'floating_ips': ('list_floatingips', 'floatingips', 'port_id',
+                             [port['id'] for port in ports],
+                             {'tenant_id': request.user.tenant_id,
+                              'fields': ['port_id', 'floating_ip_address']}),
+        }
+        network_names = dict((cache.get(names_key) if names_ttl else None)
+                             or {})
+        missing_networks = set(port['network_id'] for port in ports) - \
+            set(network_names)
+        if missing_networks:
+            calls['networks'] = ('list_networks', 'networks', 'id',
+                                 missing_networks,
+                                 {'fields': ['id', 'name']})
+        results = _list_by_ids(request, calls)
     except Exception:
         error_message = _('Unable to connect to Neutron.')
         LOG.error(error_message)
         messages.error(request, error_message)
         return
 
+    if missing_networks:
+        network_names.update((network['id'], network['name'])
+                             for network in results['networks'])
+        if names_ttl:
+            cache.set(names_key, network_names, names_ttl)
+
     # Map instance to its ports
     instances_ports = collections.defaultdict(list)
     for port in ports:
-        instances_ports[port.device_id].append(port)
+        instances_ports[port['device_id']].append(port)
 
     # Map port to its floating ips
     ports_floating_ips = collections.defaultdict(list)
-    for fip in floating_ips:
-        ports_floating_ips[fip.port_id].append(fip)
-
-    # Map network id to its name
-    network_names = dict(((network.id, network.name) for network in networks))
+    for fip in results['floating_ips']:
+        ports_floating_ips[fip['port_id']].append(fip)
 
     for server in servers:
         try:
@@ -793,10 +898,20 @@ def servers_update_addresses(request, servers):
             server.addresses = addresses
 
 
+def _ip_version(ip):
+    # Dotted quad IPv4 addresses are by far the most common, so they are
+    # recognized without going through netaddr.
+    parts = ip.split('.')
+    if len(parts) == 4 and all(part.isdigit() and len(part) <= 3 and
+                               int(part) < 256 for part in parts):
+        return 4
+    return netaddr.IPAddress(ip).version
+
+
 def _server_get_addresses(request, server, ports, floating_ips, network_names):
     def _format_address(mac, ip, type):
         try:
-            version = netaddr.IPAddress(ip).version
+            version = _ip_version(ip)
         except Exception as e:
             error_message = _('Unable to parse IP address %s.') % ip
             LOG.error(error_message)
@@ -810,18 +925,18 @@ def _server_get_addresses(request, server, ports, floating_ips, network_names):
     addresses = collections.defaultdict(list)
     instance_ports = ports.get(server.id, [])
     for port in instance_ports:
-        network_name = network_names.get(port.network_id)
+        network_name = network_names.get(port['network_id'])
         if network_name is not None:
-            for fixed_ip in port.fixed_ips:
+            for fixed_ip in port['fixed_ips']:
                 addresses[network_name].append(
-                    _format_address(port.mac_address,
+                    _format_address(port['mac_address'],
                                     fixed_ip['ip_address'],
                                     u'fixed'))
-            port_fips = floating_ips.get(port.id, [])
+            port_fips = floating_ips.get(port['id'], [])
             for fip in port_fips:
                 addresses[network_name].append(
-                    _format_address(port.mac_address,
-                                    fip.floating_ip_address,
+                    _format_address(port['mac_address'],
+                                    fip['floating_ip_address'],
                                     u'floating'))
 
     return dict(addresses)
@@ -838,13 +953,10 @@ def list_extensions(request):
 
 @memoized
 def is_extension_supported(request, extension_alias):
-    extensions = list_extensions(request)
-
-    for extension in extensions:
-        if extension['alias'] == extension_alias:
-            return True
-    else:
-        return False
+    extensions = base.supported_extensions(
+        request, 'network', base.url_for(request, 'network'),
+        lambda request: [ext['alias'] for ext in list_extensions(request)])
+    return extension_alias in extensions
 
 
 @memoized
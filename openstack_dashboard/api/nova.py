@@ -22,13 +22,18 @@
 
 from __future__ import absolute_import
 
+import functools
+import hashlib
 import logging
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.functional import cached_property  # noqa
 from django.utils.translation import ugettext_lazy as _
 
+from novaclient import exceptions as nova_exceptions
 from novaclient.v1_1 import client as nova_client
+from novaclient.v1_1 import flavors as nova_flavors
 from novaclient.v1_1.contrib import list_extensions as nova_list_extensions
 from novaclient.v1_1 import security_group_rules as nova_rules
 from novaclient.v1_1 import security_groups as nova_security_groups
@@ -40,6 +45,7 @@ from horizon.utils.memoized import memoized  # noqa
 
 from openstack_dashboard.api import base
 from openstack_dashboard.api import network_base
+from openstack_dashboard.utils import concurrency
 
 
 LOG = logging.getLogger(__name__)
@@ -93,7 +99,6 @@ class Server(base.APIResourceWrapper):
     # TODO(gabriel): deprecate making a call to Glance as a fallback.
     @property
     def image_name(self):
-        import glanceclient.exc as glance_exceptions
         from openstack_dashboard.api import glance
         if not self.image:
             return "(not found)"
@@ -102,11 +107,9 @@ class Server(base.APIResourceWrapper):
         if 'name' in self.image:
             return self.image['name']
         else:
-            try:
-                image = glance.image_get(self.request, self.image['id'])
-                return image.name
-            except glance_exceptions.ClientException:
-                return "(not found)"
+            image_id = self.image['id']
+            name = glance.image_names(self.request, [image_id]).get(image_id)
+            return name if name is not None else "(not found)"
 
     @property
     def internal_name(self):
@@ -369,6 +372,7 @@ class FloatingIpManager(network_base.FloatingIpManager):
         return conf.HORIZON_CONFIG["simple_ip_management"]
 
 
+@base.cached_client('compute')
 def novaclient(request):
     insecure = getattr(settings, 'OPENSTACK_SSL_NO_VERIFY', False)
     cacert = getattr(settings, 'OPENSTACK_SSL_CACERT', None)
@@ -401,12 +405,53 @@ def server_rdp_console(request, instance_id, console_type='rdp-html5'):
         instance_id, console_type)['console'])
 
 
+# Flavors rarely change, so the flavor lists and the flavors fetched by id
+# are cached across requests for ``NOVA_FLAVOR_CACHE_TTL`` seconds (0
+# disables the cache). Entries are namespaced by a generation counter so
+# that any flavor change invalidates all of them at once.
+FLAVOR_CACHE_PREFIX = 'nova:flavors:'
+FLAVOR_GENERATION_KEY = 'nova:flavors:generation'
+FLAVOR_GENERATION_TIMEOUT = 60 * 60 * 24 * 30
+# Cached in place of flavors which nova reports as not found.
+FLAVOR_NOT_FOUND = False
+
+
+def _flavor_cache_ttl():
+    return getattr(settings, 'NOVA_FLAVOR_CACHE_TTL', 300)
+
+
+def _flavor_cache_key(request, *parts):
+    generation = cache.get(FLAVOR_GENERATION_KEY, 0)
+    region = getattr(request.user, 'services_region', None) or ''
+    if isinstance(region, unicode):
+        region = region.encode('utf-8')
+    # Region names are free-form; hash them to get a safe key.
+    return '%s%s:%s:%s' % (FLAVOR_CACHE_PREFIX, generation,
+                           hashlib.md5(region).hexdigest(),
+                           ':'.join(str(part) for part in parts))
+
+
+def _flavor_from_info(manager, info):
+    # Flavors are cached as their attribute dicts, since the manager they
+    # are bound to cannot be pickled.
+    return nova_flavors.Flavor(manager, info, loaded=True)
+
+
+def invalidate_flavor_cache():
+    """Drops every cached flavor list and flavor."""
+    try:
+        cache.incr(FLAVOR_GENERATION_KEY)
+    except ValueError:
+        cache.set(FLAVOR_GENERATION_KEY, 1, FLAVOR_GENERATION_TIMEOUT)
+
+
 def flavor_create(request, name, memory, vcpu, disk, flavorid='auto',
                   ephemeral=0, swap=0, metadata=None, is_public=True):
     flavor = novaclient(request).flavors.create(name, memory, vcpu, disk,
                                                 flavorid=flavorid,
                                                 ephemeral=ephemeral,
                                                 swap=swap, is_public=is_public)
+    invalidate_flavor_cache()
     if (metadata):
         flavor_extra_set(request, flavor.id, metadata)
     return flavor
@@ -414,16 +459,77 @@ def flavor_create(request, name, memory, vcpu, disk, flavorid='auto',
 
 def flavor_delete(request, flavor_id):
     novaclient(request).flavors.delete(flavor_id)
+    invalidate_flavor_cache()
 
 
 def flavor_get(request, flavor_id):
     return novaclient(request).flavors.get(flavor_id)
 
 
+def _flavor_get_or_none(request, flavor_id):
+    try:
+        return flavor_get(request, flavor_id)
+    except nova_exceptions.NotFound:
+        return None
+
+
+def flavor_get_many(request, flavor_ids):
+    """Returns ``{flavor_id: flavor}`` for the given flavor ids.
+
+    Only the distinct ids missing from the flavor cache are fetched, one
+    ``flavor_get`` each, concurrently. Flavors which do not exist (anymore)
+    are cached as such and left out of the result; any other error is
+    raised. Entries are cached per project, since whether a private flavor
+    can be seen depends on its flavor access.
+    """
+    flavor_ids = set(flavor_id for flavor_id in flavor_ids if flavor_id)
+    ttl = _flavor_cache_ttl()
+    tenant_id = request.user.tenant_id
+    flavors = {}
+    if ttl and flavor_ids:
+        keys = dict((_flavor_cache_key(request, 'flavor', tenant_id,
+                                       flavor_id),
+                     flavor_id) for flavor_id in flavor_ids)
+        cached = cache.get_many(keys.keys())
+        manager = novaclient(request).flavors if cached else None
+        for key, info in cached.items():
+            flavors[keys[key]] = (None if info is FLAVOR_NOT_FOUND
+                                  else _flavor_from_info(manager, info))
+    missing = flavor_ids - set(flavors)
+    if missing:
+        fetched = concurrency.parallel(dict(
+            (flavor_id, functools.partial(_flavor_get_or_none, request,
+                                          flavor_id))
+            for flavor_id in missing))
+        if ttl:
+            cache.set_many(dict(
+                (_flavor_cache_key(request, 'flavor', tenant_id, flavor_id),
+                 FLAVOR_NOT_FOUND if flavor is None else flavor._info)
+                for flavor_id, flavor in fetched.items()), ttl)
+        flavors.update(fetched)
+    return dict((flavor_id, flavor) for flavor_id, flavor in flavors.items()
+                if flavor is not None)
+
+
 @memoized
 def flavor_list(request, is_public=True):
-    """Get the list of available instance sizes (flavors)."""
-    return novaclient(request).flavors.list(is_public=is_public)
+    """Get the list of available instance sizes (flavors).
+
+    Lists are cached per region, project (which determines the private
+    flavors it can see) and visibility.
+    """
+    ttl = _flavor_cache_ttl()
+    if not ttl:
+        return novaclient(request).flavors.list(is_public=is_public)
+    key = _flavor_cache_key(request, 'list', request.user.tenant_id,
+                            is_public)
+    infos = cache.get(key)
+    if infos is not None:
+        manager = novaclient(request).flavors
+        return [_flavor_from_info(manager, info) for info in infos]
+    flavors = novaclient(request).flavors.list(is_public=is_public)
+    cache.set(key, [flavor._info for flavor in flavors], ttl)
+    return flavors
 
 
 @memoized
@@ -434,14 +540,18 @@ def flavor_access_list(request, flavor=None):
 
 def add_tenant_to_flavor(request, flavor, tenant):
     """Add a tenant to the given flavor access list."""
-    return novaclient(request).flavor_access.add_tenant_access(
+    access = novaclient(request).flavor_access.add_tenant_access(
         flavor=flavor, tenant=tenant)
+    invalidate_flavor_cache()
+    return access
 
 
 def remove_tenant_from_flavor(request, flavor, tenant):
     """Remove a tenant from the given flavor access list."""
-    return novaclient(request).flavor_access.remove_tenant_access(
+    access = novaclient(request).flavor_access.remove_tenant_access(
         flavor=flavor, tenant=tenant)
+    invalidate_flavor_cache()
+    return access
 
 
 def flavor_get_extras(request, flavor_id, raw=False):
@@ -457,7 +567,9 @@ def flavor_get_extras(request, flavor_id, raw=False):
 def flavor_extra_delete(request, flavor_id, keys):
     """Unset the flavor extra spec keys."""
     flavor = novaclient(request).flavors.get(flavor_id)
-    return flavor.unset_keys(keys)
+    result = flavor.unset_keys(keys)
+    invalidate_flavor_cache()
+    return result
 
 
 def flavor_extra_set(request, flavor_id, metadata):
@@ -465,7 +577,9 @@ def flavor_extra_set(request, flavor_id, metadata):
     flavor = novaclient(request).flavors.get(flavor_id)
     if (not metadata):  # not a way to delete keys
         return None
-    return flavor.set_keys(metadata)
+    result = flavor.set_keys(metadata)
+    invalidate_flavor_cache()
+    return result
 
 
 def snapshot_create(request, instance_id, name):
@@ -488,12 +602,27 @@ def keypair_list(request):
     return novaclient(request).keypairs.list()
 
 
+def _changes_servers(func):
+    """Drops the project's server list snapshot once ``func`` succeeded.
+
+    Used for the calls whose changes nova's ``changes-since`` filter might
+    not report, since it only looks at the instances' own rows.
+    """
+    @functools.wraps(func)
+    def wrapper(request, *args, **kwargs):
+        result = func(request, *args, **kwargs)
+        base.invalidate_changes_since(request, 'servers')
+        return result
+    return wrapper
+
+
+@_changes_servers
 def server_create(request, name, image, flavor, key_name, user_data,
                   security_groups, block_device_mapping=None,
                   block_device_mapping_v2=None, nics=None,
                   availability_zone=None, instance_count=1, admin_pass=None,
                   disk_config=None):
-    return Server(novaclient(request).servers.create(
+    server = Server(novaclient(request).servers.create(
         name, image, flavor, userdata=user_data,
         security_groups=security_groups,
         key_name=key_name, block_device_mapping=block_device_mapping,
@@ -501,17 +630,79 @@ def server_create(request, name, image, flavor, key_name, user_data,
         nics=nics, availability_zone=availability_zone,
         min_count=instance_count, admin_pass=admin_pass,
         disk_config=disk_config), request)
+    base.invalidate_quota_usages(request)
+    return server
 
 
+@_changes_servers
 def server_delete(request, instance):
     novaclient(request).servers.delete(instance)
+    base.invalidate_quota_usages(request)
 
 
 def server_get(request, instance_id):
     return Server(novaclient(request).servers.get(instance_id), request)
 
 
+def _server_list_incremental(request, marker=None, paginate=False):
+    """Lists the servers of the current project from a cached snapshot.
+
+    Only the servers changed since the previous listing are fetched (see
+    ``base.list_changes_since``); pagination is applied to the snapshot,
+    which is sorted the way nova lists servers.
+    """
+    c = novaclient(request)
+    limit = getattr(settings, 'API_RESULT_LIMIT', 1000)
+
+    def list_infos(since):
+        search_opts = {'project_id': request.user.tenant_id, 'limit': limit}
+        if since:
+            search_opts['changes-since'] = since
+        infos = []
+        # nova may return fewer servers than asked for (osapi_max_limit),
+        # so follow the markers until a listing comes back empty.
+        while True:
+            batch = [s._info
+                     for s in c.servers.list(True, dict(search_opts))]
+            if not batch:
+                return infos
+            infos.extend(batch)
+            search_opts['marker'] = batch[-1]['id']
+
+    infos = base.list_changes_since(
+        request, 'servers', list_infos,
+        lambda info: info.get('status') == 'DELETED')
+    # Newest first, like nova.
+    infos.sort(key=lambda info: (info.get('created'), info['id']),
+               reverse=True)
+    if marker:
+        ids = [info['id'] for info in infos]
+        if marker in ids:
+            infos = infos[ids.index(marker) + 1:]
+    has_more_data = False
+    if paginate:
+        page_size = utils.get_page_size(request)
+        has_more_data = len(infos) > page_size
+        infos = infos[:page_size]
+    servers = [Server(c.servers.resource_class(c.servers, info, loaded=True),
+                      request)
+               for info in infos]
+    return (servers, has_more_data)
+
+
 def server_list(request, search_opts=None, all_tenants=False):
+    """Lists servers, returning ``(servers, has_more_data)``.
+
+    Listings of the current project, optionally paginated, are served
+    from a snapshot kept current through ``changes-since`` queries
+    unless ``CHANGES_SINCE_CACHE_TTL`` is 0.
+    """
+    if (not all_tenants and base.changes_since_enabled() and
+            not set(search_opts or {}) - set(['marker', 'paginate'])):
+        search_opts = search_opts or {}
+        return _server_list_incremental(request,
+                                        search_opts.get('marker'),
+                                        search_opts.get('paginate', False))
     page_size = utils.get_page_size(request)
     c = novaclient(request)
     paginate = False
@@ -539,28 +730,59 @@ def server_list(request, search_opts=None, all_tenants=False):
     return (servers, has_more_data)
 
 
+def server_owned_by_tenant(request, instance_id):
+    """Checks whether an instance belongs to the request's project.
+
+    Instances already confirmed are cached per project for
+    ``NOVA_OWNERSHIP_CACHE_TTL`` seconds, so a check costs at most a
+    single ``servers.get`` call however many instances the project has.
+    """
+    if not instance_id:
+        return False
+    tenant_id = request.user.tenant_id
+    key = 'nova:owned_servers:%s' % tenant_id
+    owned = cache.get(key) or set()
+    if instance_id in owned:
+        return True
+    try:
+        server = novaclient(request).servers.get(instance_id)
+    except nova_exceptions.ClientException:
+        return False
+    # Admins can get servers of any project, so check the owner as well.
+    if getattr(server, 'tenant_id', None) != tenant_id:
+        return False
+    owned.add(instance_id)
+    cache.set(key, owned, getattr(settings, 'NOVA_OWNERSHIP_CACHE_TTL', 60))
+    return True
+
+
 def server_console_output(request, instance_id, tail_length=None):
     """Gets console output of an instance."""
     return novaclient(request).servers.get_console_output(instance_id,
                                                           length=tail_length)
 
 
+@_changes_servers
 def server_pause(request, instance_id):
     novaclient(request).servers.pause(instance_id)
 
 
+@_changes_servers
 def server_unpause(request, instance_id):
     novaclient(request).servers.unpause(instance_id)
 
 
+@_changes_servers
 def server_suspend(request, instance_id):
     novaclient(request).servers.suspend(instance_id)
 
 
+@_changes_servers
 def server_resume(request, instance_id):
     novaclient(request).servers.resume(instance_id)
 
 
+@_changes_servers
 def server_reboot(request, instance_id, soft_reboot=False):
     hardness = nova_servers.REBOOT_HARD
     if soft_reboot:
@@ -568,20 +790,24 @@ def server_reboot(request, instance_id, soft_reboot=False):
     novaclient(request).servers.reboot(instance_id, hardness)
 
 
+@_changes_servers
 def server_rebuild(request, instance_id, image_id, password=None,
                    disk_config=None):
     return novaclient(request).servers.rebuild(instance_id, image_id,
                                                password, disk_config)
 
 
+@_changes_servers
 def server_update(request, instance_id, name):
     return novaclient(request).servers.update(instance_id, name=name)
 
 
+@_changes_servers
 def server_migrate(request, instance_id):
     novaclient(request).servers.migrate(instance_id)
 
 
+@_changes_servers
 def server_live_migrate(request, instance_id, host, block_migration=False,
                         disk_over_commit=False):
     novaclient(request).servers.live_migrate(instance_id, host,
@@ -589,23 +815,29 @@ def server_live_migrate(request, instance_id, host, block_migration=False,
                                              disk_over_commit)
 
 
+@_changes_servers
 def server_resize(request, instance_id, flavor, disk_config=None, **kwargs):
     novaclient(request).servers.resize(instance_id, flavor,
                                        disk_config, **kwargs)
 
 
+@_changes_servers
 def server_confirm_resize(request, instance_id):
     novaclient(request).servers.confirm_resize(instance_id)
+    base.invalidate_quota_usages(request)
 
 
+@_changes_servers
 def server_revert_resize(request, instance_id):
     novaclient(request).servers.revert_resize(instance_id)
 
 
+@_changes_servers
 def server_start(request, instance_id):
     novaclient(request).servers.start(instance_id)
 
 
+@_changes_servers
 def server_stop(request, instance_id):
     novaclient(request).servers.stop(instance_id)
 
@@ -616,6 +848,7 @@ def tenant_quota_get(request, tenant_id):
 
 def tenant_quota_update(request, tenant_id, **kwargs):
     novaclient(request).quotas.update(tenant_id, **kwargs)
+    base.invalidate_quota_usages(request, tenant_id)
 
 
 def default_quota_get(request, tenant_id):
@@ -647,12 +880,14 @@ def get_password(request, instance_id, private_key=None):
     return novaclient(request).servers.get_password(instance_id, private_key)
 
 
+@_changes_servers
 def instance_volume_attach(request, volume_id, instance_id, device):
     return novaclient(request).volumes.create_server_volume(instance_id,
                                                               volume_id,
                                                               device)
 
 
+@_changes_servers
 def instance_volume_detach(request, instance_id, att_id):
     return novaclient(request).volumes.delete_server_volume(instance_id,
                                                               att_id)
@@ -749,11 +984,10 @@ def extension_supported(extension_name, request):
     example values for the extension_name include AdminActions, ConsoleOutput,
     etc.
     """
-    extensions = list_extensions(request)
-    for extension in extensions:
-        if extension.name == extension_name:
-            return True
-    return False
+    extensions = base.supported_extensions(
+        request, 'compute', base.url_for(request, 'compute'),
+        lambda request: [ext.name for ext in list_extensions(request)])
+    return extension_name in extensions
 
 
 def can_set_server_password():
@@ -0,0 +1,265 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Showback engine for the nova, glance and cinder usage of DAIR projects.
+
+Each usage category is answered by one aggregate query, for any number of
+projects at once. MySQL clips every resource's lifetime to the showback
+window (``GREATEST``/``LEAST``) and sums the whole hours of each resource
+(``TIMESTAMPDIFF``) per flavor, image or volume name, so only one row per
+project and name is sent back.
+"""
+
+import datetime
+
+from dateutil import parser
+
+
+NOVA = 'nova'
+GLANCE = 'glance'
+CINDER = 'cinder'
+
+# Upper bound on the number of projects in a single IN (...) list.
+BATCH_SIZE = 500
+
+
+class ShowbackLine(object):
+    """Aggregated usage of one flavor, image or volume name."""
+    __slots__ = ('name', 'count', 'hours', 'size')
+
+    def __init__(self, name, count, hours, size=None):
+        self.name = name
+        self.count = count
+        self.hours = hours
+        self.size = size
+
+    def __repr__(self):
+        return "<ShowbackLine: %s>" % self.name
+
+
+class ShowbackResult(object):
+    """Usage of one category for one project over a showback window."""
+
+    def __init__(self, tenant_id, category, start, end, lines=None):
+        self.tenant_id = tenant_id
+        self.category = category
+        self.start = start
+        self.end = end
+        self.lines = lines or []
+
+    @property
+    def total_hours(self):
+        return sum(line.hours for line in self.lines)
+
+    def as_dict(self):
+        """Returns the dict the showback views and templates expect."""
+        usage = {}
+        for line in self.lines:
+            if self.category == NOVA:
+                usage[line.name] = {'count': line.count,
+                                    'hours': line.hours}
+            else:
+                usage[line.name] = {'hours': line.hours,
+                                    'size': line.size}
+        return usage
+
+    def __repr__(self):
+        return "<ShowbackResult: %s %s>" % (self.category, self.tenant_id)
+
+
+def _parse_date(date):
+    if isinstance(date, datetime.datetime):
+        return date
+    return parser.parse(date)
+
+
+def _default_connect(db):
+    # Imported here to keep the engine usable outside of Django.
+    from openstack_dashboard.api import jt
+    return jt._dbconnect(db)
+
+
+# How each category maps onto its service's table. ``%(name)s``
+# placeholders are table names, filled in from the engine attributes.
+CATEGORIES = {
+    NOVA: {
+        'db': 'nova',
+        'table': 'instances',
+        'project': 'r.project_id',
+        'name': 'it.name',
+        'join': ("LEFT JOIN %(instance_types)s AS it "
+                 "ON r.instance_type_id = it.id "),
+        'where': "",
+        'size': "NULL",
+    },
+    GLANCE: {
+        'db': 'glance',
+        'table': 'images',
+        'project': 'r.owner',
+        'name': 'r.name',
+        'join': "",
+        'where': "AND r.status != 'killed' ",
+        'size': "MAX(r.size) / 1024 / 1024 / 1024",
+    },
+    CINDER: {
+        'db': 'cinder',
+        'table': 'volumes',
+        'project': 'r.project_id',
+        'name': 'r.display_name',
+        'join': "",
+        'where': "",
+        'size': "MAX(r.size)",
+    },
+}
+
+
+class ShowbackEngine(object):
+    """Computes showback usage with SQL aggregation.
+
+    ``connect`` is a callable taking a database name and returning a
+    DB-API connection; it defaults to the pooled ``api.jt`` connection.
+    Table names are attributes so that they can be pointed elsewhere,
+    e.g. at synthetic tables for benchmarking.
+    """
+    instances_table = 'instances'
+    instance_types_table = 'instance_types'
+    images_table = 'images'
+    volumes_table = 'volumes'
+
+    def __init__(self, connect=None):
+        self.connect = connect or _default_connect
+
+    def _tables(self):
+        return {'instances': self.instances_table,
+                'instance_types': self.instance_types_table,
+                'images': self.images_table,
+                'volumes': self.volumes_table}
+
+    def _query(self, category, columns, tenants=None):
+        """Builds an aggregate query over the resources of ``category``.
+
+        ``columns`` may refer to ``%(start)s`` and ``%(end)s`` (the
+        resource's lifetime clipped to the window; each takes its bound as
+        a parameter) and to ``%(size)s``. The WHERE clause then takes
+        (end, start), followed by the project ids if ``tenants`` is given.
+        """
+        spec = CATEGORIES[category]
+        tables = self._tables()
+        clipped = {'start': "GREATEST(r.created_at, %s)",
+                   'end': "LEAST(COALESCE(r.deleted_at, %s), %s)",
+                   'size': spec['size']}
+        query = ("SELECT %(project)s, %(name)s, " % spec +
+                 columns % clipped +
+                 " FROM %s AS r " % tables[spec['table']] +
+                 spec['join'] % tables +
+                 "WHERE r.created_at < %s "
+                 "AND (r.deleted_at > %s OR r.deleted_at IS NULL) " +
+                 spec['where'])
+        if tenants is not None:
+            query += "AND %s IN (%s) " % (spec['project'],
+                                          ', '.join(['%s'] * len(tenants)))
+        return query + "GROUP BY %(project)s, %(name)s" % spec
+
+    def _execute(self, category, columns, params, start, end, tenants=None):
+        """Runs ``_query`` and yields its rows.
+
+        ``params`` are the parameters of ``columns``. With ``tenants`` the
+        projects are queried ``BATCH_SIZE`` at a time, otherwise the rows
+        of every project are returned.
+        """
+        conn = self.connect(CATEGORIES[category]['db'])
+        try:
+            c = conn.cursor()
+            batches = [None]
+            if tenants is not None:
+                batches = [tenants[i:i + BATCH_SIZE]
+                           for i in range(0, len(tenants), BATCH_SIZE)]
+            for batch in batches:
+                c.execute(self._query(category, columns, batch),
+                          tuple(params) + (end, start) + tuple(batch or ()))
+                for row in c.fetchall():
+                    yield row
+        finally:
+            conn.close()
+
+    def usage(self, category, tenants, start, end):
+        """Returns ``{tenant: ShowbackResult}`` for a showback window.
+
+        Hours are the sum of each resource's whole hours in the window.
+        """
+        start = _parse_date(start)
+        end = _parse_date(end)
+        tenants = list(set(tenants))
+        results = dict((tenant, ShowbackResult(tenant, category, start, end))
+                       for tenant in tenants)
+        if not tenants:
+            return results
+
+        columns = ("COUNT(*), SUM(TIMESTAMPDIFF(HOUR, %(start)s, "
+                   "%(end)s)), %(size)s")
+        rows = self._execute(category, columns, (start, end, end),
+                             start, end, tenants)
+        for row in rows:
+            results[row[0]].lines.append(
+                ShowbackLine(row[1], int(row[2]), int(row[3] or 0),
+                             _size(category, row[4])))
+        return results
+
+    def totals(self, category, start, end, tenants=None):
+        """Yields raw per-name totals over a window.
+
+        Each row is (project, name, overlapping resources, resources
+        created in the window, seconds used in the window, size). Without
+        ``tenants`` every project is included.
+        """
+        start = _parse_date(start)
+        end = _parse_date(end)
+        if tenants is not None:
+            tenants = list(set(tenants))
+            if not tenants:
+                return
+        columns = ("COUNT(*), SUM(r.created_at >= %%s), "
+                   "SUM(TIMESTAMPDIFF(SECOND, %(start)s, %(end)s)), "
+                   "%(size)s")
+        rows = self._execute(category, columns, (start, start, end, end),
+                             start, end, tenants)
+        for row in rows:
+            yield (row[0], row[1], int(row[2]), int(row[3] or 0),
+                   int(row[4] or 0), _size(category, row[5]))
+
+    def nova_usage(self, tenants, start, end):
+        """Instance count and hours per flavor, for each project."""
+        return self.usage(NOVA, tenants, start, end)
+
+    def glance_usage(self, tenants, start, end):
+        """Hours and size (GB) per image name, for each project."""
+        return self.usage(GLANCE, tenants, start, end)
+
+    def cinder_usage(self, tenants, start, end):
+        """Hours and size (GB) per volume name, for each project."""
+        return self.usage(CINDER, tenants, start, end)
+
+
+def _size(category, size):
+    if category == NOVA:
+        return None
+    if size is None:
+        return 0
+    if category == GLANCE:
+        return float(size)
+    return int(size)
+
+
+engine = ShowbackEngine()
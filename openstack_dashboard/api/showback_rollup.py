@@ -0,0 +1,248 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Daily rollup of nova, glance and cinder showback usage.
+
+The ``showback_rollup`` management command writes one row per project, day,
+resource class and flavor/image/volume name into ``showback_daily_rollup``
+(in the DAIR information database) and records the first and the last day
+it rolled up in ``showback_rollup_state``, so every run resumes where the
+previous one stopped.
+
+Showback windows are then answered by summing the rolled up days from the
+rollup table and querying the raw tables only for the rest of the window
+at either edge (the partial days, and any days before the first or after
+the last rolled up day), which keeps report latency independent of how
+much history a project has. Hours computed this way are the window's total
+seconds per name rounded down to whole hours.
+"""
+
+import datetime
+import logging
+
+from openstack_dashboard.api import showback
+
+
+LOG = logging.getLogger(__name__)
+
+ROLLUP_TABLE = 'showback_daily_rollup'
+STATE_TABLE = 'showback_rollup_state'
+
+CREATE_ROLLUP_TABLE = (
+    "CREATE TABLE IF NOT EXISTS %s ("
+    "project_id VARCHAR(255) NOT NULL, "
+    "day DATE NOT NULL, "
+    "resource_class VARCHAR(16) NOT NULL, "
+    "name VARCHAR(255) NOT NULL, "
+    "alive INT NOT NULL, "
+    "created INT NOT NULL, "
+    "seconds BIGINT NOT NULL, "
+    "size DOUBLE NULL, "
+    "PRIMARY KEY (project_id, resource_class, day, name))" % ROLLUP_TABLE)
+CREATE_STATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS %s ("
+    "resource_class VARCHAR(16) NOT NULL PRIMARY KEY, "
+    "first_day DATE NOT NULL, "
+    "last_day DATE NOT NULL)" % STATE_TABLE)
+
+
+def _midnight(date):
+    return datetime.datetime(date.year, date.month, date.day)
+
+
+def _default_connect():
+    from openstack_dashboard.api import jt
+    return jt._dbconnect()
+
+
+class ShowbackRollup(object):
+    """Maintains and queries the daily rollup table.
+
+    ``connect`` returns a connection to the database holding the rollup
+    tables; ``engine`` is the ``ShowbackEngine`` used for the raw tables.
+    """
+
+    def __init__(self, engine=None, connect=None):
+        self.engine = engine or showback.engine
+        self.connect = connect or _default_connect
+
+    def ensure_tables(self):
+        conn = self.connect()
+        try:
+            c = conn.cursor()
+            c.execute(CREATE_ROLLUP_TABLE)
+            c.execute(CREATE_STATE_TABLE)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def rolled_days(self, category):
+        """Returns the first and the last rolled up day of ``category``
+        as a tuple, or None when none was rolled up yet.
+        """
+        conn = self.connect()
+        try:
+            c = conn.cursor()
+            c.execute("SELECT first_day, last_day FROM " + STATE_TABLE +
+                      " WHERE resource_class = %s", (category,))
+            row = c.fetchone()
+            return (row[0], row[1]) if row else None
+        finally:
+            conn.close()
+
+    def day_rows(self, category, day):
+        """Returns the rollup rows of one day, computed from the raw
+        tables.
+        """
+        start = _midnight(day)
+        end = start + datetime.timedelta(days=1)
+        return [(project, day, category, name or '', overlap - created,
+                 created, seconds, size)
+                for project, name, overlap, created, seconds, size
+                in self.engine.totals(category, start, end)]
+
+    def roll_up_day(self, category, day):
+        """Replaces the rollup rows of one day and extends the state.
+
+        Both happen in one transaction, so an interrupted run simply
+        redoes the day it was working on. Days are expected to be rolled
+        up without gaps, as ``refresh`` does.
+        """
+        rows = self.day_rows(category, day)
+        conn = self.connect()
+        try:
+            c = conn.cursor()
+            c.execute("DELETE FROM " + ROLLUP_TABLE +
+                      " WHERE resource_class = %s AND day = %s",
+                      (category, day))
+            if rows:
+                c.executemany("INSERT INTO " + ROLLUP_TABLE +
+                              " (project_id, day, resource_class, name, "
+                              "alive, created, seconds, size) "
+                              "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                              rows)
+            c.execute("INSERT INTO " + STATE_TABLE +
+                      " (resource_class, first_day, last_day) "
+                      "VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE "
+                      "first_day = LEAST(first_day, %s), "
+                      "last_day = GREATEST(last_day, %s)",
+                      (category, day, day, day, day))
+            conn.commit()
+        finally:
+            conn.close()
+        return len(rows)
+
+    def refresh(self, category, since, until):
+        """Rolls up every day from the last rolled day (or ``since``)
+        through ``until``, and returns the number of days processed.
+        """
+        rolled = self.rolled_days(category)
+        day = rolled[1] + datetime.timedelta(days=1) if rolled else since
+        count = 0
+        while day <= until:
+            rows = self.roll_up_day(category, day)
+            LOG.info("Rolled up %s usage for %s (%d rows)"
+                     % (category, day, rows))
+            day += datetime.timedelta(days=1)
+            count += 1
+        return count
+
+    def _sum_days(self, category, tenants, first_day, last_day):
+        """Sums the rollup rows of [first_day, last_day] per name."""
+        totals = {}
+        conn = self.connect()
+        try:
+            c = conn.cursor()
+            for i in range(0, len(tenants), showback.BATCH_SIZE):
+                batch = tenants[i:i + showback.BATCH_SIZE]
+                c.execute("SELECT project_id, name, "
+                          "SUM(IF(day = %s, alive, 0)), SUM(created), "
+                          "SUM(seconds), MAX(size) FROM " + ROLLUP_TABLE +
+                          " WHERE resource_class = %s "
+                          "AND day >= %s AND day <= %s "
+                          "AND project_id IN (" +
+                          ', '.join(['%s'] * len(batch)) + ") "
+                          "GROUP BY project_id, name",
+                          (first_day, category, first_day, last_day) +
+                          tuple(batch))
+                for project, name, alive, created, seconds, size \
+                        in c.fetchall():
+                    # Unnamed resources are stored with an empty name.
+                    totals[(project, name or None)] = [int(alive or 0),
+                                               int(created or 0),
+                                               int(seconds or 0), size]
+        finally:
+            conn.close()
+        return totals
+
+    def usage(self, category, tenants, start, end):
+        """Returns ``{tenant: ShowbackResult}`` like ``ShowbackEngine``.
+
+        Only the rolled up whole days of the window, [first, last), come
+        from the rollup table; the raw tables answer for the rest of the
+        window before and after them. Without any such day the whole
+        window is queried from the raw tables.
+        """
+        start = showback._parse_date(start)
+        end = showback._parse_date(end)
+        tenants = list(set(tenants))
+        rolled = self.rolled_days(category) if tenants else None
+        if rolled is None:
+            return self.engine.usage(category, tenants, start, end)
+        first = _midnight(start)
+        if first < start:
+            first += datetime.timedelta(days=1)
+        first = max(first, _midnight(rolled[0]))
+        last = min(_midnight(end),
+                   _midnight(rolled[1]) + datetime.timedelta(days=1))
+        if first >= last:
+            return self.engine.usage(category, tenants, start, end)
+
+        # Per (project, name): [count, seconds, size]
+        lines = {}
+
+        def add(key, count, seconds, size):
+            line = lines.setdefault(key, [0, 0, None])
+            line[0] += count
+            line[1] += seconds
+            if size is not None:
+                line[2] = max(line[2], size)
+
+        days = self._sum_days(category, tenants, first.date(),
+                              (last - datetime.timedelta(days=1)).date())
+        for key, (alive, created, seconds, size) in days.items():
+            # Resources alive at the first rolled up day only count here
+            # when there is no raw window before it to count them.
+            add(key, created + (alive if first == start else 0),
+                seconds, size)
+        if start < first:
+            for row in self.engine.totals(category, start, first, tenants):
+                add((row[0], row[1]), row[2], row[4], row[5])
+        if last < end:
+            for row in self.engine.totals(category, last, end, tenants):
+                add((row[0], row[1]), row[3], row[4], row[5])
+
+        results = dict((tenant, showback.ShowbackResult(tenant, category,
+                                                        start, end))
+                       for tenant in tenants)
+        for (project, name), (count, seconds, size) in lines.items():
+            if category != showback.NOVA and size is None:
+                size = 0
+            results[project].lines.append(
+                showback.ShowbackLine(name, count, seconds // 3600, size))
+        return results
+
+
+rollup = ShowbackRollup()
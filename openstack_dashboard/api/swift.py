@@ -106,6 +106,7 @@ def _metadata_to_header(metadata):
     return headers
 
 
+@base.cached_client('object-store')
 def swift_api(request):
     endpoint = base.url_for(request, 'object-store')
     cacert = getattr(settings, 'OPENSTACK_SSL_CACERT', None)
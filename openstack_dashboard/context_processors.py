@@ -65,16 +65,22 @@ def openstack(request):
         domain,blah = fqdn.split('.', 1)
     except:
         domain = "localhost"
-    reseller_logo = jt.get_reseller_logo(domain)
+    # Branding is looked up once per request and cached across processes.
+    branding = getattr(request, '_dair_branding', None)
+    if branding is None:
+        branding = jt.get_branding(domain)
+        request._dair_branding = branding
+
+    reseller_logo = branding['reseller_logo']
     if reseller_logo != 'Information not available.':
         context['reseller_logo'] = reseller_logo
 
-    reseller_splash = jt.get_reseller_splash(domain)
+    reseller_splash = branding['reseller_splash']
     if reseller_splash != 'Information not available.':
         context['reseller_splash'] = reseller_splash
 
-    dair_admin_notice = jt.get_dair_admin_notice()
-    dair_admin_notice_link = jt.get_dair_admin_notice_link()
+    dair_admin_notice = branding['dair_admin_notice']
+    dair_admin_notice_link = branding['dair_admin_notice_link']
     context['dair_admin_notice'] = ""
     if dair_admin_notice != None:
         if dair_admin_notice_link != None:
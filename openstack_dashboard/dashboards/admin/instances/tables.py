@@ -86,6 +86,9 @@ class LiveMigrateInstance(tables.LinkAction):
 
 
 class AdminUpdateRow(project_tables.UpdateRow):
+    # The admin instances page keeps horizon's per-row poller.
+    batch_update = False
+
     def get_data(self, request, instance_id):
         instance = super(AdminUpdateRow, self).get_data(request, instance_id)
         tenant = api.keystone.tenant_get(request,
@@ -77,9 +77,10 @@ class InstanceViewTest(test.BaseAdminViewTests):
                             AndRaise(self.exceptions.nova)
         api.keystone.tenant_list(IsA(http.HttpRequest)).\
                                  AndReturn([tenants, False])
-        for server in servers:
-            api.nova.flavor_get(IsA(http.HttpRequest), server.flavor["id"]). \
-                AndReturn(full_flavors[server.flavor["id"]])
+        # Missing flavors are fetched concurrently, once per flavor.
+        for flavor_id in set(server.flavor["id"] for server in servers):
+            api.nova.flavor_get(IsA(http.HttpRequest), flavor_id). \
+                InAnyOrder().AndReturn(full_flavors[flavor_id])
 
         self.mox.ReplayAll()
 
@@ -114,7 +115,7 @@ class InstanceViewTest(test.BaseAdminViewTests):
                                  AndReturn([tenants, False])
         for server in servers:
             api.nova.flavor_get(IsA(http.HttpRequest), server.flavor["id"]). \
-                AndRaise(self.exceptions.nova)
+                InAnyOrder().AndRaise(self.exceptions.nova)
         self.mox.ReplayAll()
 
         res = self.client.get(INDEX_URL)
@@ -110,20 +110,26 @@ class AdminIndexView(tables.DataTableView):
 
             full_flavors = SortedDict([(f.id, f) for f in flavors])
             tenant_dict = SortedDict([(t.id, t) for t in tenants])
-            # Loop through instances to get flavor and tenant info.
-            for inst in instances:
-                flavor_id = inst.flavor["id"]
+            # Flavors missing from the list (e.g. deleted ones) are fetched
+            # in bulk via the nova api.
+            missing_flavors = set(inst.flavor["id"] for inst in instances) - \
+                set(full_flavors)
+            if missing_flavors:
                 try:
-                    if flavor_id in full_flavors:
-                        inst.full_flavor = full_flavors[flavor_id]
-                    else:
-                        # If the flavor_id is not in full_flavors list,
-                        # gets it via nova api.
-                        inst.full_flavor = api.nova.flavor_get(
-                            self.request, flavor_id)
+                    full_flavors.update(api.nova.flavor_get_many(
+                        self.request, missing_flavors))
                 except Exception:
                     msg = _('Unable to retrieve instance size information.')
-                    exceptions.handle(self.request, msg)
+                    # Report the failure for each instance left without
+                    # its size, as when they were fetched one by one.
+                    for inst in instances:
+                        if inst.flavor["id"] not in full_flavors:
+                            exceptions.handle(self.request, msg)
+            # Loop through instances to get flavor and tenant info.
+            for inst in instances:
+                flavor_id = inst.flavor["id"]
+                if flavor_id in full_flavors:
+                    inst.full_flavor = full_flavors[flavor_id]
                 tenant = tenant_dict.get(inst.tenant_id, None)
                 inst.tenant_name = getattr(tenant, "name", None)
         return instances
@@ -14,6 +14,7 @@
 import json
 import uuid
 
+from ceilometerclient.v2 import statistics as ceilometer_statistics
 from django.core.urlresolvers import reverse
 from django import http
 from mox import IsA  # noqa
@@ -160,36 +161,80 @@ class MeteringViewTests(test.APITestCase, test.BaseAdminViewTests):
         ceilometerclient.meters = self.mox.CreateMockAnything()
         ceilometerclient.meters.list(None).AndReturn(meters)
 
+        tenants = self.tenants.list()
         api.keystone.tenant_list(IsA(http.HttpRequest),
                                  domain=None,
                                  paginate=False). \
-            MultipleTimes()\
-            .AndReturn([self.tenants.list(), False])
-
-        statistics = self.statistics.list()
+            AndReturn([tenants, False])
+
+        # One call per meter returns the statistics of every project.
+        statistics = [
+            ceilometer_statistics.Statistics(
+                ceilometer_statistics.StatisticsManager(None),
+                dict(self.statistics.first()._info,
+                     groupby={'project_id': tenant.id}))
+            for tenant in tenants]
         ceilometerclient = self.stub_ceilometerclient()
         ceilometerclient.statistics = self.mox.CreateMockAnything()
+        for meter_name in ("instance", "disk.read.bytes", "disk.write.bytes"):
+            ceilometerclient.statistics.list(meter_name=meter_name,
+                                             period=IsA(int), q=IsA(list),
+                                             groupby=['project_id']).\
+                InAnyOrder().\
+                AndReturn(statistics)
+
+        self.mox.ReplayAll()
+
+        # generate report with mock data
+        res = self.client.post(reverse('horizon:admin:metering:report'),
+                               data={"date_options": "7"})
+
+        self.assertTemplateUsed(res, 'admin/metering/report.html')
+        self.assertEqual(sorted(tenant.name for tenant in tenants),
+                         sorted(table.title
+                                for table in res.context['tables']))
 
+    @test.create_stubs({api.keystone: ('tenant_list',)})
+    def test_report_incomplete(self):
+        meters = self.meters.list()
+        ceilometerclient = self.stub_ceilometerclient()
+        ceilometerclient.meters = self.mox.CreateMockAnything()
+        ceilometerclient.meters.list(None).AndReturn(meters)
+
+        tenants = self.tenants.list()
+        api.keystone.tenant_list(IsA(http.HttpRequest),
+                                 domain=None,
+                                 paginate=False). \
+            AndReturn([tenants, False])
+
+        statistics = [
+            ceilometer_statistics.Statistics(
+                ceilometer_statistics.StatisticsManager(None),
+                dict(self.statistics.first()._info,
+                     groupby={'project_id': tenant.id}))
+            for tenant in tenants]
+        ceilometerclient.statistics = self.mox.CreateMockAnything()
         ceilometerclient.statistics.list(meter_name="instance",
-                                         period=IsA(int), q=IsA(list)).\
-            MultipleTimes().\
-            AndReturn(statistics)
-        ceilometerclient.statistics.list(meter_name="disk.read.bytes",
-                                         period=IsA(int), q=IsA(list)).\
-            MultipleTimes().\
-            AndReturn(statistics)
-        ceilometerclient.statistics.list(meter_name="disk.write.bytes",
-                                         period=IsA(int), q=IsA(list)).\
-            MultipleTimes().\
-            AndReturn(statistics)
+                                         period=IsA(int), q=IsA(list),
+                                         groupby=['project_id']).\
+            InAnyOrder().\
+            AndRaise(self.exceptions.ceilometer)
+        for meter_name in ("disk.read.bytes", "disk.write.bytes"):
+            ceilometerclient.statistics.list(meter_name=meter_name,
+                                             period=IsA(int), q=IsA(list),
+                                             groupby=['project_id']).\
+                InAnyOrder().\
+                AndReturn(statistics)
 
         self.mox.ReplayAll()
 
-        # generate report with mock data
         res = self.client.post(reverse('horizon:admin:metering:report'),
                                data={"date_options": "7"})
 
+        # The rows of the other meters are shown, along with a warning.
         self.assertTemplateUsed(res, 'admin/metering/report.html')
+        self.assertEqual(len(tenants), len(res.context['tables']))
+        self.assertMessageCount(res, warning=1)
 
 
 class MeteringStatsTabTests(test.APITestCase):
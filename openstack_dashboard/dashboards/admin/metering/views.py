@@ -23,6 +23,7 @@ from django.utils.translation import ugettext_lazy as _
 from django.views.generic import TemplateView  # noqa
 
 from horizon import exceptions
+from horizon import messages
 from horizon import tables
 from horizon import tabs
 
@@ -125,6 +126,13 @@ class ReportView(tables.MultiTableView):
         return handled
 
     def load_data(self, request):
+        """Returns the report rows per project name.
+
+        Tenants are listed once and the daily statistics of every meter
+        come from ``ceilometer.project_statistics``; rows are added to
+        their project as each meter's statistics arrive. A warning is shown
+        when the statistics of some meters could not be retrieved.
+        """
         meters = ceilometer.Meters(request)
         services = {
             _('Nova'): meters.list_nova(),
@@ -134,38 +142,50 @@ class ReportView(tables.MultiTableView):
             _('Swift_meters'): meters.list_swift(),
             _('Kwapi'): meters.list_kwapi(),
         }
+        meter_services = {}
+        for name, m_list in services.items():
+            for meter in m_list:
+                meter_services[meter.name] = name
+        cached_meters = meters._cached_meters
+
+        date_from, date_to = _calc_date_args(
+            request.POST.get('date_from', None),
+            request.POST.get('date_to', None),
+            request.POST.get('date_options', None))
+        try:
+            tenants, more = api.keystone.tenant_list(request,
+                                                     domain=None,
+                                                     paginate=False)
+        except Exception:
+            tenants = []
+            exceptions.handle(request,
+                              _('Unable to retrieve tenant list.'))
+        tenant_names = dict((tenant.id, tenant.name) for tenant in tenants)
+
         project_rows = {}
-        date_options = request.POST.get('date_options', None)
-        date_from = request.POST.get('date_from', None)
-        date_to = request.POST.get('date_to', None)
-        for meter in meters._cached_meters.values():
-            for name, m_list in services.items():
-                if meter in m_list:
-                    service = name
-            # show detailed samples
-            # samples = ceilometer.sample_list(request, meter.name)
-            res, unit = query_data(request,
-                                   date_from,
-                                   date_to,
-                                   date_options,
-                                   "project",
-                                   meter.name,
-                                   3600 * 24)
-            for re in res:
-                values = getattr(re, meter.name.replace(".", "_"))
-                if values:
-                    for value in values:
-                        row = {"name": 'none',
-                               "project": re.id,
-                               "meter": meter.name,
-                               "description": meter.description,
-                               "service": service,
-                               "time": value._apiresource.period_end,
-                               "value": value._apiresource.avg}
-                        if re.id not in project_rows:
-                            project_rows[re.id] = [row]
-                        else:
-                            project_rows[re.id].append(row)
+        missing = 0
+        for meter_name, project_id, values in ceilometer.project_statistics(
+                request, cached_meters.keys(), tenant_names.keys(),
+                period=3600 * 24,
+                additional_query=_date_query(date_from, date_to)):
+            if values is None:
+                missing += 1
+                continue
+            meter = cached_meters[meter_name]
+            project = tenant_names[project_id]
+            for value in values:
+                row = {"name": 'none',
+                       "project": project,
+                       "meter": meter.name,
+                       "description": meter.description,
+                       "service": meter_services.get(meter.name),
+                       "time": value._apiresource.period_end,
+                       "value": value._apiresource.avg}
+                project_rows.setdefault(project, []).append(row)
+        if missing:
+            messages.warning(request,
+                             _('The report is incomplete: unable to '
+                               'retrieve %d meter statistics.') % missing)
         return project_rows
 
     def get_context_data(self, **kwargs):
@@ -234,6 +254,19 @@ def _calc_date_args(date_from, date_to, date_options):
     return date_from, date_to
 
 
+def _date_query(date_from, date_to):
+    query = []
+    if date_from:
+        query += [{'field': 'timestamp',
+                   'op': 'ge',
+                   'value': date_from}]
+    if date_to:
+        query += [{'field': 'timestamp',
+                   'op': 'le',
+                   'value': date_to}]
+    return query
+
+
 def query_data(request,
                date_from,
                date_to,
@@ -246,15 +279,7 @@ def query_data(request,
                                          date_options)
     if not period:
         period = _calc_period(date_from, date_to)
-    additional_query = []
-    if date_from:
-        additional_query += [{'field': 'timestamp',
-                              'op': 'ge',
-                              'value': date_from}]
-    if date_to:
-        additional_query += [{'field': 'timestamp',
-                              'op': 'le',
-                              'value': date_to}]
+    additional_query = _date_query(date_from, date_to)
 
     # TODO(lsmola) replace this by logic implemented in I1 in bugs
     # 1226479 and 1226482, this is just a quick fix for RC1
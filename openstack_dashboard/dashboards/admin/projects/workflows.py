@@ -142,8 +142,9 @@ class UpdateProjectQuotaAction(workflows.Action):
         # jt
         if 'project_id' in args[0]:
             project_id = args[0]['project_id']
-            self.fields['images'].initial = api.jt.get_image_quota(project_id)
-            self.fields['object_mb'].initial = api.jt.get_object_mb_quota(project_id)
+            custom_quotas = api.jt.get_custom_quotas(project_id)
+            self.fields['images'].initial = custom_quotas['images']
+            self.fields['object_mb'].initial = custom_quotas['object_mb']
         else:
             # MJ expiration autofill
             self.fields['images'].initial = 5
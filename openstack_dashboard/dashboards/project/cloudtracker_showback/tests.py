@@ -0,0 +1,122 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from django.core.urlresolvers import reverse
+
+from openstack_dashboard import api
+from openstack_dashboard.test import helpers as test
+
+
+EXPORT_URL = reverse('horizon:project:cloudtracker_showback:export')
+
+USAGE = {
+    'Instances': {'m1.small': {'hours': 30, 'count': 2}},
+    'Bandwidth': {'total': {'bytes_received': 5, 'bytes_transmitted': 7}},
+    'Snapshots': {'snap': {'hours': 10, 'size': 1.5}},
+    'Volumes': {'vol': {'hours': 3, 'size': 20}},
+    'Swift': {'total': {'space_usage': 1, 'container_count': 2,
+                        'object_count': 3}},
+}
+
+
+def _content(response):
+    if getattr(response, 'streaming', False):
+        return ''.join(response.streaming_content)
+    return response.content
+
+
+class ShowbackExportTests(test.TestCase):
+    def _export(self, **params):
+        params = dict({'start': '2014-01-01', 'end': '2014-02-01'}, **params)
+        return self.client.get(EXPORT_URL, params)
+
+    @test.create_stubs({api.jt: ('get_dair_showback_usage',)})
+    def test_export_csv(self):
+        api.jt.get_dair_showback_usage(
+            self.tenant.id, '2014-01-01', '2014-02-01',
+            categories=['Instances']) \
+            .AndReturn({'Instances': USAGE['Instances']})
+        self.mox.ReplayAll()
+
+        res = self._export(category='instances', format='csv')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertEqual(res['Content-Disposition'],
+                         'attachment; filename="instances-from-2014-01-01-'
+                         'to-2014-02-01.csv"')
+        self.assertEqual(_content(res).splitlines(),
+                         ['Flavor,Hours,Quantity', 'm1.small,30,2'])
+
+    @test.create_stubs({api.jt: ('get_dair_showback_usage',)})
+    def test_export_csv_summary(self):
+        api.jt.get_dair_showback_usage(
+            self.tenant.id, '2014-01-01', '2014-02-01',
+            categories=['Instances', 'Bandwidth', 'Snapshots', 'Volumes',
+                        'Swift']) \
+            .AndReturn(USAGE)
+        self.mox.ReplayAll()
+
+        res = self._export(format='csv')
+        self.assertEqual(res.status_code, 200)
+        lines = _content(res).splitlines()
+        self.assertEqual(lines[:3], ['Instances', 'Flavor,Hours,Quantity',
+                                     'm1.small,30,2'])
+        for title in ('External Bandwidth', 'Snapshots', 'Volumes',
+                      'Object Storage'):
+            self.assertIn(title, lines)
+        self.assertIn('snap,10,1.5', lines)
+
+    @test.create_stubs({api.jt: ('get_dair_showback_usage',)})
+    def test_export_xls(self):
+        api.jt.get_dair_showback_usage(
+            self.tenant.id, '2014-01-01', '2014-02-01',
+            categories=['Instances', 'Bandwidth', 'Snapshots', 'Volumes',
+                        'Swift']) \
+            .AndReturn(USAGE)
+        self.mox.ReplayAll()
+
+        res = self._export(format='xls')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/vnd.ms-excel')
+        self.assertTrue(res['Content-Disposition'].endswith('.xls"'))
+        # An OLE2 compound document, as written by xlwt.
+        self.assertTrue(_content(res).startswith('\xd0\xcf\x11\xe0'))
+
+    @test.create_stubs({api.jt: ('get_dair_showback_usage',)})
+    def test_export_empty_usage(self):
+        # Collectors which failed return an error string instead of a dict.
+        api.jt.get_dair_showback_usage(
+            self.tenant.id, '2014-01-01', '2014-02-01',
+            categories=['Volumes']) \
+            .AndReturn({'Volumes': {}})
+        api.jt.get_dair_showback_usage(
+            self.tenant.id, '2014-01-01', '2014-02-01',
+            categories=['Snapshots']) \
+            .AndReturn({'Snapshots': 'error'})
+        self.mox.ReplayAll()
+
+        # Only the headers are exported.
+        for category in ('volumes', 'snapshots'):
+            res = self._export(category=category, format='csv')
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(_content(res).splitlines(),
+                             ['Name,Hours,Size (GB)'])
+
+    def test_export_without_range(self):
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+        self.assertEqual(res.status_code, 400)
+        res = self._export(format='pdf')
+        self.assertEqual(res.status_code, 400)
+        res = self._export(category='unknown')
+        self.assertEqual(res.status_code, 400)
@@ -14,5 +14,6 @@ urlpatterns = patterns('openstack_dashboard.dashboards.project.cloudtracker_show
     url(r'^csv_snapshots$', views.DAIRShowbackCSV_snapshotsView.as_view(), name='csv'),
     url(r'^csv_summary$', views.DAIRShowbackCSV_SummaryView.as_view(), name='csv'),
     url(r'^xml_summary$', views.DAIRShowbackXML_SummaryView.as_view(), name='xml'),
+    url(r'^export$', views.ShowbackExportView.as_view(), name='export'),
     url(r'^warning$', views.WarningView.as_view(), name='warning'),
 )
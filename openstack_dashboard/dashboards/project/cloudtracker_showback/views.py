@@ -1,10 +1,13 @@
+import django
 from django.conf import settings
 from django.template.defaultfilters import capfirst  # noqa
 from django.template.defaultfilters import floatformat  # noqa
+from django.utils.functional import Promise
 from django.utils.translation import ugettext as _
+from django.utils.translation import ugettext_lazy
 from django.views.generic import TemplateView  # noqa
+from django.views.generic import View  # noqa
 from django import http
-from django.http import HttpResponse
 
 from horizon.utils import csvbase
 from horizon import forms
@@ -14,8 +17,14 @@ from openstack_dashboard import api
 
 import xlwt
 import csv
-import requests
-import sys
+import StringIO
+
+try:
+    from django.utils.encoding import force_text
+except ImportError:
+    # Django < 1.5
+    from django.utils.encoding import force_unicode as force_text
+
 
 class DAIRShowbackView(TemplateView):
     template_name = 'project/cloudtracker_showback/index.html'
@@ -31,254 +40,189 @@ class DAIRShowbackView(TemplateView):
         context['end_date'] = end_date
 
         if start_date and end_date:
-            usage = {}
-            usage['Bandwidth'] = api.jt.get_dair_bandwidth_showback_usage(project_id, start_date, end_date)
-            usage['Swift'] = api.jt.get_dair_object_store_showback_usage(project_id, start_date, end_date)
-            usage['Instances'] = api.jt.get_dair_nova_showback_usage(project_id, start_date, end_date)
-            usage['Snapshots'] = api.jt.get_dair_glance_showback_usage(project_id, start_date, end_date)
-            usage['Volumes'] = api.jt.get_dair_cinder_showback_usage(project_id, start_date, end_date)
+            usage = api.jt.get_dair_showback_usage(project_id, start_date, end_date)
             context['usage'] = usage
 
         return context
 
-class DAIRShowbackCSV_instancesView(TemplateView):
-    def get(self, request, *args, **kwargs):
-        project_id = self.request.user.tenant_id
-        start_date = self.request.GET.get('start')
-        end_date = self.request.GET.get('end')
-
-        if start_date and end_date:
-            usage = {}
-            usage['Instances'] = api.jt.get_dair_nova_showback_usage(project_id, start_date, end_date)
-
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}-{1}-{2}-{3}.csv"'.format(_("instances-from"),start_date,_("to"),end_date)
-            w = csv.writer(response)
-            w.writerow([_("Flavor"),_("Hours"),_("Quantity")])
-            if (type(usage['Instances'])  == type(dict())):
-                for k, v in usage['Instances'].iteritems():
-                    w.writerow([k, v['hours'], v['count']])
-
-            return response
-
-class DAIRShowbackCSV_bandwidthView(TemplateView):
-    def get(self, request, *args, **kwargs):
-        project_id = self.request.user.tenant_id
-        start_date = self.request.GET.get('start')
-        end_date = self.request.GET.get('end')
-
-        if start_date and end_date:
-            usage = {}
-            usage['Bandwidth'] = api.jt.get_dair_bandwidth_showback_usage(project_id, start_date, end_date)
-
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}-{1}-{2}-{3}.csv"'.format((_("bandwidth-from")).encode('utf-8'),start_date,_("to"),end_date)
-            w = csv.writer(response)
-            w.writerow([_("In (Mb)"),_("Out (Mb)")])
-            if (type(usage['Bandwidth'])  == type(dict())):
-                for k, v in usage['Bandwidth'].iteritems():
-                    w.writerow([ v['bytes_received'], v['bytes_transmitted']])
-
-            return response
+# Export sections: usage key, title, column headers, row builder and the
+# xls column widths (in characters).
+SHOWBACK_SECTIONS = (
+    ('Instances', ugettext_lazy("Instances"),
+     (ugettext_lazy("Flavor"), ugettext_lazy("Hours"),
+      ugettext_lazy("Quantity")),
+     lambda k, v: [k, v['hours'], v['count']], (20,)),
+    ('Bandwidth', ugettext_lazy("External Bandwidth"),
+     (ugettext_lazy("In (Mb)"), ugettext_lazy("Out (Mb)")),
+     lambda k, v: [v['bytes_received'], v['bytes_transmitted']], ()),
+    ('Snapshots', ugettext_lazy("Snapshots"),
+     (ugettext_lazy("Name"), ugettext_lazy("Hours"),
+      ugettext_lazy("Size (GB)")),
+     lambda k, v: [k, v['hours'], v['size']], (50,)),
+    ('Volumes', ugettext_lazy("Volumes"),
+     (ugettext_lazy("Name"), ugettext_lazy("Hours"),
+      ugettext_lazy("Size (GB)")),
+     lambda k, v: [k, v['hours'], v['size']], (30,)),
+    ('Swift', ugettext_lazy("Object Storage"),
+     (ugettext_lazy("Space usage"), ugettext_lazy("Container count"),
+      ugettext_lazy("Object count")),
+     lambda k, v: [v['space_usage'], v['container_count'],
+                   v['object_count']], (15, 15, 15)),
+)
+SHOWBACK_CATEGORIES = dict((section[0].lower(), section)
+                           for section in SHOWBACK_SECTIONS)
+XLS_CHUNK_SIZE = 64 * 1024
+
+
+def _encode_cell(value):
+    if isinstance(value, (basestring, Promise)):
+        return force_text(value).encode('utf-8')
+    return value
+
+
+class _Echo(object):
+    """File-like object whose write() hands back what it is given."""
+    def write(self, value):
+        return value
+
+
+def _section_rows(section, usage):
+    key, title, headers, row, widths = section
+    data = usage.get(key)
+    if isinstance(data, dict):
+        for k, v in data.iteritems():
+            yield row(k, v)
+
+
+def _stream_csv(sections, usage, with_titles):
+    writer = csv.writer(_Echo())
+    for index, section in enumerate(sections):
+        if with_titles:
+            if index:
+                yield writer.writerow([" "])
+            yield writer.writerow([_encode_cell(section[1])])
+        yield writer.writerow([_encode_cell(h) for h in section[2]])
+        for row in _section_rows(section, usage):
+            yield writer.writerow([_encode_cell(c) for c in row])
+
+
+def _stream_xls(sections, usage):
+    header_font = xlwt.Font()
+    header_font.bold = True
+    table_header = xlwt.XFStyle()
+    table_header.font = header_font
+
+    wb = xlwt.Workbook()
+    for section in sections:
+        ws = wb.add_sheet(force_text(section[1]))
+        for col, width in enumerate(section[4]):
+            ws.col(col).width = 256 * width
+        for col, header in enumerate(section[2]):
+            ws.write(0, col, force_text(header), table_header)
+        for row_index, row in enumerate(_section_rows(section, usage)):
+            for col, value in enumerate(row):
+                ws.write(row_index + 1, col, value)
+    # xlwt can only serialize a complete workbook.
+    output = StringIO.StringIO()
+    wb.save(output)
+    output.seek(0)
+    while True:
+        chunk = output.read(XLS_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _export_response(content, content_type):
+    if django.VERSION >= (1, 5):
+        return http.StreamingHttpResponse(content, content_type=content_type)
+    # Streaming responses only exist as of Django 1.5.
+    return http.HttpResponse(''.join(content), content_type=content_type)
+
+
+class ShowbackExportView(View):
+    """Streams showback usage as CSV or XLS.
+
+    Query parameters are ``start`` and ``end`` (the window), ``format``
+    (``csv`` or ``xls``) and ``category`` (a section name or ``all``).
+    Usage is computed once per (tenant, window) and shared with the
+    showback page through ``api.jt.get_dair_showback_usage``.
+    """
+    category = None
+    export_format = None
+    filename_prefix = None
 
-class DAIRShowbackCSV_swiftView(TemplateView):
     def get(self, request, *args, **kwargs):
-        project_id = self.request.user.tenant_id
-        start_date = self.request.GET.get('start')
-        end_date = self.request.GET.get('end')
-
-        if start_date and end_date:
-            usage = {}
-            usage['Swift'] = api.jt.get_dair_object_store_showback_usage(project_id, start_date, end_date)
-
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}-{1}-{2}-{3}.csv"'.format(_("object_storage-from"),start_date,_("to"),end_date)
-            w = csv.writer(response)
-
-            w.writerow([_("Space usage"),_("Container count"),_("Object count")])
-            if (type(usage['Swift'])  == type(dict())):
-                for k, v in usage['Swift'].iteritems():
-                    w.writerow([ v['space_usage'], v['container_count'], v['object_count']])
-
-            return response
-
-class DAIRShowbackCSV_snapshotsView(TemplateView):
-    def get(self, request, *args, **kwargs):
-        project_id = self.request.user.tenant_id
-        start_date = self.request.GET.get('start')
-        end_date = self.request.GET.get('end')
-
-        if start_date and end_date:
-            usage = {}
-            usage['Snapshots'] = api.jt.get_dair_glance_showback_usage(project_id, start_date, end_date)
-
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}-{1}-{2}-{3}.csv"'.format(_("snapshots-from"),start_date,_("to"),end_date)
-            w = csv.writer(response)
-            w.writerow([_("Name"),_("Hours"),_("Size (GB)")])
-            if (type(usage['Snapshots'])  == type(dict())):
-                for k, v in usage['Snapshots'].iteritems():
-                    w.writerow([k, v['hours'], v['size']])
-
-            return response
-
-class DAIRShowbackCSV_volumesView(TemplateView):
-    def get(self, request, *args, **kwargs):
-        project_id = self.request.user.tenant_id
-        start_date = self.request.GET.get('start')
-        end_date = self.request.GET.get('end')
-
-        if start_date and end_date:
-            usage = {}
-            usage['Volumes'] = api.jt.get_dair_cinder_showback_usage(project_id, start_date, end_date)
-
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}-{1}-{2}-{3}.csv"'.format(_("volumes-from"),start_date,_("to"),end_date)
-            w = csv.writer(response)
-            w.writerow([_("Name"),_("Hours"),_("Size (GB)")])
-            if (type(usage['Volumes'])  == type(dict())):
-                for k, v in usage['Volumes'].iteritems():
-                    w.writerow([k, v['hours'], v['size']])
-
-            return response
-
-class DAIRShowbackCSV_SummaryView(TemplateView):
-    def get(self, request, *args, **kwargs):
-        project_id = self.request.user.tenant_id
-        start_date = self.request.GET.get('start')
-        end_date = self.request.GET.get('end')
-
-        if start_date and end_date:
-            usage = {}
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}-{1}-{2}-{3}.csv"'.format(_("summary-from"),start_date,_("to"),end_date)
-            w = csv.writer(response)
-
-            usage['Instances'] = api.jt.get_dair_nova_showback_usage(project_id, start_date, end_date)
-            w.writerow([_("Instances")])
-            w.writerow([_("Flavor"),_("Hours"),_("Quantity")])
-            if (type(usage['Instances'])  == type(dict())):
-                for k, v in usage['Instances'].iteritems():
-                    w.writerow([k, v['hours'], v['count']])
-            w.writerow([_(" ")])
-            w.writerow([(_("External Bandwidth")).encode('utf-8')])
-            usage['Bandwidth'] = api.jt.get_dair_bandwidth_showback_usage(project_id, start_date, end_date)
-            w.writerow([_("In (Mb)"),_("Out (Mb)")])
-            if (type(usage['Bandwidth'])  == type(dict())):
-                for k, v in usage['Bandwidth'].iteritems():
-                    w.writerow([ v['bytes_received'], v['bytes_transmitted']])
-            usage['Snapshots'] = api.jt.get_dair_glance_showback_usage(project_id, start_date, end_date)
-            w.writerow([_(" ")])
-            w.writerow([_("Snapshots")])
-            w.writerow([_("Name"),_("Hours"),_("Size (GB)")])
-            if (type(usage['Snapshots'])  == type(dict())):
-                for k, v in usage['Snapshots'].iteritems():
-                    w.writerow([k, v['hours'], v['size']])
-            w.writerow([_(" ")])
-            w.writerow([_("Volumes")])
-            usage['Volumes'] = api.jt.get_dair_cinder_showback_usage(project_id, start_date, end_date)
-            w.writerow([_("Name"),_("Hours"),_("Size (GB)")])
-            if (type(usage['Volumes'])  == type(dict())):
-                for k, v in usage['Volumes'].iteritems():
-                    w.writerow([k, v['hours'], v['size']])
-            usage['Swift'] = api.jt.get_dair_object_store_showback_usage(project_id, start_date, end_date)
-            w.writerow([_(" ")])
-            w.writerow([_("Object Storage")])
-            w.writerow([_("Space usage"),_("Container count"),_("Object count")])
-            if (type(usage['Swift'])  == type(dict())):
-                for k, v in usage['Swift'].iteritems():
-                    w.writerow([ v['space_usage'], v['container_count'], v['object_count']])
-            return response
-
-class DAIRShowbackXML_SummaryView(TemplateView):
-    def get(self, request, *args, **kwargs):
-        project_id = self.request.user.tenant_id
-        start_date = self.request.GET.get('start')
-        end_date = self.request.GET.get('end')
-
-        header_font = xlwt.Font()
-        header_font.bold = True
-        # Define the header styles
-        table_header = xlwt.XFStyle()
-        table_header.font = header_font
-
-        if start_date and end_date:
-            usage = {}
-            wb = xlwt.Workbook()
-            ws_i = wb.add_sheet(_('Instances'))
-            first_col = ws_i.col(0)
-            first_col.width = 256 * 20
-            usage['Instances'] = api.jt.get_dair_nova_showback_usage(project_id, start_date, end_date)
-            ws_i.write(0,0,_("Flavor"), table_header)
-            ws_i.write(0,1,_("Hours"), table_header)
-            ws_i.write(0,2,_("Quantity"), table_header)
-            row=1
-            if (type(usage['Instances'])  == type(dict())):
-                for k, v in usage['Instances'].iteritems():
-                    ws_i.write(row,0, k)
-                    ws_i.write(row,1, v['hours'])
-                    ws_i.write(row,2, v['count'])
-                    row +=1
-            ws_b = wb.add_sheet(_('External Bandwidth'))
-            usage['Bandwidth'] = api.jt.get_dair_bandwidth_showback_usage(project_id, start_date, end_date)
-            ws_b.write(0,0,_("In (Mb)"), table_header)
-            ws_b.write(0,1,_("Out (Mb)"), table_header)
-            row=1
-            if (type(usage['Bandwidth'])  == type(dict())):
-                for k, v in usage['Bandwidth'].iteritems():
-                    ws_b.write(row,0, v['bytes_received'])
-                    ws_b.write(row,1, v['bytes_transmitted'])
-                    row +=1
-            ws_s = wb.add_sheet(_('Snapshots'))
-            first_col = ws_s.col(0)
-            first_col.width = 256 * 50
-            usage['Snapshots'] = api.jt.get_dair_glance_showback_usage(project_id, start_date, end_date)
-            ws_s.write(0,0,_("Name"), table_header)
-            ws_s.write(0,1,_("Hours"), table_header)
-            ws_s.write(0,2,_("Size (GB)"), table_header)
-            row=1
-            if (type(usage['Snapshots'])  == type(dict())):
-                for k, v in usage['Snapshots'].iteritems():
-                    ws_s.write(row,0, k)
-                    ws_s.write(row,1, v['hours'])
-                    ws_s.write(row,2, v['size'])
-                    row +=1
-            ws_v = wb.add_sheet(_('Volumes'))
-            first_col = ws_v.col(0)
-            first_col.width = 256 * 30
-            usage['Volumes'] = api.jt.get_dair_cinder_showback_usage(project_id, start_date, end_date)
-            ws_v.write(0,0,_("Name"), table_header)
-            ws_v.write(0,1,_("Hours"), table_header)
-            ws_v.write(0,2,_("Size (GB)"), table_header)
-            row=1
-            if (type(usage['Volumes'])  == type(dict())):
-                for k, v in usage['Volumes'].iteritems():
-                    ws_v.write(row,0, k)
-                    ws_v.write(row,1, v['hours'])
-                    ws_v.write(row,2, v['size'])
-                    row +=1
-            ws_o = wb.add_sheet(_('Object Storage'))
-            first_col = ws_o.col(0)
-            second_col = ws_o.col(1)
-            third_col = ws_o.col(2)
-            first_col.width = 256 * 15
-            second_col.width = 256 * 15
-            third_col.width = 256 * 15
-            usage['Swift'] = api.jt.get_dair_object_store_showback_usage(project_id, start_date, end_date)
-            ws_o.write(0,0,_("Space usage"), table_header)
-            ws_o.write(0,1,_("Container count"), table_header)
-            ws_o.write(0,2,_("Object count"), table_header)
-            row=1
-            if (type(usage['Swift'])  == type(dict())):
-                for k, v in usage['Swift'].iteritems():
-                    ws_o.write(row,0, v['space_usage'])
-                    ws_o.write(row,1, v['container_count'])
-                    ws_o.write(row,2, v['object_count'])
-                    row +=1
-            response = HttpResponse(mimetype = 'application/vnd.ms-excel')
-            response['Content-Disposition'] = 'attachment; filename="{0}-{1}-{2}-{3}.xls"'.format(_("summary-from"),start_date,_("to"),end_date)
-            wb.save(response)
-            return response
+        project_id = request.user.tenant_id
+        start_date = request.GET.get('start')
+        end_date = request.GET.get('end')
+        category = self.category or request.GET.get('category', 'all')
+        export_format = self.export_format or request.GET.get('format',
+                                                              'csv')
+        if not (start_date and end_date) or export_format not in ('csv',
+                                                                  'xls'):
+            return http.HttpResponseBadRequest()
+        if category == 'all':
+            sections = SHOWBACK_SECTIONS
+        elif category in SHOWBACK_CATEGORIES:
+            sections = (SHOWBACK_CATEGORIES[category],)
+        else:
+            return http.HttpResponseBadRequest()
+
+        usage = api.jt.get_dair_showback_usage(
+            project_id, start_date, end_date,
+            categories=[section[0] for section in sections])
+
+        if export_format == 'xls':
+            response = _export_response(_stream_xls(sections, usage),
+                                        'application/vnd.ms-excel')
+        else:
+            response = _export_response(
+                _stream_csv(sections, usage, with_titles=len(sections) > 1),
+                'text/csv')
+        prefix = self.filename_prefix or "%s-from" % category
+        response['Content-Disposition'] = \
+            'attachment; filename="{0}-{1}-{2}-{3}.{4}"'.format(
+                _encode_cell(prefix), _encode_cell(start_date),
+                _encode_cell(_("to")), _encode_cell(end_date),
+                export_format)
+        return response
+
+
+class DAIRShowbackCSV_instancesView(ShowbackExportView):
+    category = 'instances'
+    export_format = 'csv'
+    filename_prefix = ugettext_lazy("instances-from")
+
+class DAIRShowbackCSV_bandwidthView(ShowbackExportView):
+    category = 'bandwidth'
+    export_format = 'csv'
+    filename_prefix = ugettext_lazy("bandwidth-from")
+
+class DAIRShowbackCSV_swiftView(ShowbackExportView):
+    category = 'swift'
+    export_format = 'csv'
+    filename_prefix = ugettext_lazy("object_storage-from")
+
+class DAIRShowbackCSV_snapshotsView(ShowbackExportView):
+    category = 'snapshots'
+    export_format = 'csv'
+    filename_prefix = ugettext_lazy("snapshots-from")
+
+class DAIRShowbackCSV_volumesView(ShowbackExportView):
+    category = 'volumes'
+    export_format = 'csv'
+    filename_prefix = ugettext_lazy("volumes-from")
+
+class DAIRShowbackCSV_SummaryView(ShowbackExportView):
+    category = 'all'
+    export_format = 'csv'
+    filename_prefix = ugettext_lazy("summary-from")
+
+class DAIRShowbackXML_SummaryView(ShowbackExportView):
+    category = 'all'
+    export_format = 'xls'
+    filename_prefix = ugettext_lazy("summary-from")
 
 class WarningView(TemplateView):
     template_name = "project/_warning.html"
@@ -0,0 +1,47 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from django import http
+
+from openstack_dashboard.api import graphite
+from openstack_dashboard.dashboards.project.cloudtracker_usage import views
+from openstack_dashboard.test import helpers as test
+
+
+class ChartResponseTests(test.TestCase):
+    def _response(self, if_none_match=None):
+        request = self.factory.get('/')
+        if if_none_match is not None:
+            request.META['HTTP_IF_NONE_MATCH'] = if_none_match
+        return views._chart_response(request,
+                                     graphite.ChartResult('chart data'),
+                                     http.HttpResponse)
+
+    def test_etag(self):
+        res = self._response()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, 'chart data')
+        etag = res['ETag']
+
+        for if_none_match in (etag, '"other", %s' % etag, '*'):
+            res = self._response(if_none_match)
+            self.assertEqual(res.status_code, 304)
+            self.assertEqual(res['ETag'], etag)
+
+    def test_etag_mismatch(self):
+        etag = self._response()['ETag']
+        # Tags merely containing the chart's do not match.
+        for if_none_match in ('"other"', '"%sx"' % etag.strip('"'),
+                              '"x%s"' % etag.strip('"')):
+            self.assertEqual(self._response(if_none_match).status_code, 200)
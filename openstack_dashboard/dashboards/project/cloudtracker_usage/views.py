@@ -5,16 +5,51 @@ from django.utils.translation import ugettext as _
 from django.views.generic import TemplateView  # noqa
 from django import http
 from django.http import HttpResponse
+from django.utils.http import parse_etags
 
 from horizon.utils import csvbase
 from horizon import tabs
 
 from openstack_dashboard import api
+from openstack_dashboard.api import graphite
 
 from .tabs import DAIRUsageTabs
 import requests
 import csv
 
+
+def _get_chart(request, query, instance_id, from_date, data_format, url):
+    # The data and CSV views render the same query names with different
+    # (and translated) legends, so the URL itself is part of the key.
+    key = (request.user.tenant_id, instance_id or '', query, from_date,
+           data_format, url)
+    return graphite.get_chart(key, url)
+
+
+def _chart_response(request, chart, make_response):
+    # parse_etags returns the tags without their quotes.
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if '*' in etags or chart.etag.strip('"') in etags:
+        response = http.HttpResponseNotModified()
+    else:
+        response = make_response(chart.content)
+    response['ETag'] = chart.etag
+    response['Cache-Control'] = 'private, max-age=%d' % graphite.chart_timeout()
+    return response
+
+
+def _csv_response(query, content):
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="{0}.csv"'.format(query)
+    w = csv.writer(response)
+    decoded_content = content.decode('utf-8')
+    cr = csv.reader(decoded_content.splitlines(), delimiter=',')
+    my_list = list(cr)
+    w.writerow([_("Name"),_("Timestamp"),_("Value")])
+    for row in my_list:
+        w.writerow(row)
+    return response
+
 class DAIRUsageView(tabs.TabView):
     tab_group_class = DAIRUsageTabs
     template_name = 'project/cloudtracker_usage/index.html'
@@ -39,11 +74,10 @@ class DAIRProjectData(TemplateView):
         query = self.request.GET.get('query', False)
         if query:
              try:
-                r = requests.get("%s%s" % (base_url, queries[query]))
-                r_content=r.content
-             except requests.ConnectionError:
-                r_content="Information not available..."
-             return http.HttpResponse(r_content)
+                chart = _get_chart(request, query, None, from_date, data_format, "%s%s" % (base_url, queries[query]))
+             except requests.RequestException:
+                return http.HttpResponse("Information not available...")
+             return _chart_response(request, chart, http.HttpResponse)
 
 class DAIRProjectDataCSV(TemplateView):
     def get(self, request, *args, **kwargs):
@@ -62,26 +96,16 @@ class DAIRProjectDataCSV(TemplateView):
 
         query = self.request.GET.get('query', False)
         if query:
-            r = requests.get("%s%s" % (base_url, queries[query]))
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}.csv"'.format(query)
-            w = csv.writer(response)
-            decoded_content = r.content.decode('utf-8')
-            cr = csv.reader(decoded_content.splitlines(), delimiter=',')
-            my_list = list(cr)
-            w.writerow([_("Name"),_("Timestamp"),_("Value")])
-            for row in my_list:
-                w.writerow(row)
-            return response
+            chart = _get_chart(request, query, None, from_date, data_format, "%s%s" % (base_url, queries[query]))
+            return _chart_response(request, chart, lambda content: _csv_response(query, content))
 
 class DAIRInstanceData(TemplateView):
     def get(self, request, *args, **kwargs):
         from_date = self.request.GET.get('from', '7d')
 
         instance_id = self.request.GET.get('instance', False)
-        instances, foo = api.nova.server_list(self.request)
-        if len([x for x in instances if x.id == instance_id]) == 0:
-            return None
+        if not api.nova.server_owned_by_tenant(self.request, instance_id):
+            return http.HttpResponseForbidden()
 
         data_format = self.request.GET.get('format', False)
         if data_format not in ['csv', 'json', False]:
@@ -102,21 +126,18 @@ class DAIRInstanceData(TemplateView):
 
         if query:
             try:
-                print(queries[query])
-                r = requests.get("%s%s" % (base_url,queries[query]))
-                r_content=r.content
-            except requests.ConnectionError:
-                r_content="Information not available..."
-            return http.HttpResponse(r_content)
+                chart = _get_chart(request, query, instance_id, from_date, data_format, "%s%s" % (base_url, queries[query]))
+            except requests.RequestException:
+                return http.HttpResponse("Information not available...")
+            return _chart_response(request, chart, http.HttpResponse)
 
 class DAIRInstanceDataCSV(TemplateView):
     def get(self, request, *args, **kwargs):
         from_date = self.request.GET.get('from', '7d')
 
         instance_id = self.request.GET.get('instance', False)
-        instances, foo = api.nova.server_list(self.request)
-        if len([x for x in instances if x.id == instance_id]) == 0:
-            return None
+        if not api.nova.server_owned_by_tenant(self.request, instance_id):
+            return http.HttpResponseForbidden()
 
         data_format = self.request.GET.get('format', False)
         if data_format not in ['csv', 'json', False]:
@@ -136,26 +157,16 @@ class DAIRInstanceDataCSV(TemplateView):
 
         query = self.request.GET.get('query', False)
         if query:
-            r = requests.get("%s%s" % (base_url, queries[query]))
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="{0}.csv"'.format(query)
-            w = csv.writer(response)
-            decoded_content = r.content.decode('utf-8')
-            cr = csv.reader(decoded_content.splitlines(), delimiter=',')
-            my_list = list(cr)
-            w.writerow([_("Name"),_("Timestamp"),_("Value")])
-            for row in my_list:
-                w.writerow(row)
-            return response
+            chart = _get_chart(request, query, instance_id, from_date, data_format, "%s%s" % (base_url, queries[query]))
+            return _chart_response(request, chart, lambda content: _csv_response(query, content))
 
 class DAIRInstanceDataCSVSummary(TemplateView):
     def get(self, request, *args, **kwargs):
         from_date = self.request.GET.get('from', '7d')
 
         instance_id = self.request.GET.get('instance', False)
-        instances, foo = api.nova.server_list(self.request)
-        if len([x for x in instances if x.id == instance_id]) == 0:
-            return None
+        if not api.nova.server_owned_by_tenant(self.request, instance_id):
+            return http.HttpResponseForbidden()
 
         data_format = self.request.GET.get('format', False)
         if data_format not in ['csv', 'json', False]:
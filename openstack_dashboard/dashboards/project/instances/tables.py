@@ -15,10 +15,13 @@
 #    under the License.
 
 
+import datetime
+import json
 import logging
 
 from django.conf import settings
 from django.core import urlresolvers
+from django import http
 from django import shortcuts
 from django import template
 from django.template.defaultfilters import title  # noqa
@@ -41,6 +44,12 @@ from openstack_dashboard.dashboards.project.instances import tabs
 
 LOG = logging.getLogger(__name__)
 
+# Action of the batched row poller (see InstancesTable.rows_update).
+ROWS_UPDATE_ACTION = "rows_update"
+# Polls ask nova for the servers changed since shortly before the previous
+# poll, so that clock skew between the dashboard and nova loses no change.
+ROWS_UPDATE_MARGIN = datetime.timedelta(seconds=60)
+
 ACTIVE_STATES = ("ACTIVE",)
 VOLUME_ATTACH_READY_STATES = ("ACTIVE", "SHUTOFF")
 SNAPSHOT_READY_STATES = ("ACTIVE", "SHUTOFF", "PAUSED", "SUSPENDED")
@@ -607,8 +616,28 @@ def get_instance_error(instance):
     return message
 
 
+def _rows_update_since():
+    return (datetime.datetime.utcnow() - ROWS_UPDATE_MARGIN).isoformat()
+
+
 class UpdateRow(tables.Row):
     ajax = True
+    # Transitioning rows are polled together by dashboard/js/
+    # horizon.instances.js instead of one request per row.
+    batch_update = True
+
+    def load_cells(self, datum=None):
+        super(UpdateRow, self).load_cells(datum)
+        if self.batch_update and "ajax-update" in self.classes:
+            # Hand the row over from horizon's per-row poller.
+            self.classes.remove("ajax-update")
+            self.classes.append("ajax-batch-update")
+            self.attrs['data-object-id'] = self.table.get_object_id(datum)
+            self.attrs['data-batch-update-url'] = "%s?%s" % (
+                self.table.get_absolute_url(),
+                urlencode({"table": self.table.name,
+                           "action": ROWS_UPDATE_ACTION}))
+            self.attrs['data-batch-update-since'] = _rows_update_since()
 
     def get_data(self, request, instance_id):
         instance = api.nova.server_get(request, instance_id)
@@ -619,6 +648,43 @@ class UpdateRow(tables.Row):
             messages.error(request, error)
         return instance
 
+    def get_data_many(self, request, instance_ids, since=None):
+        """Returns ``(instances, deleted_ids)`` for the polled rows.
+
+        A single ``server_list`` answers every row. With ``since`` nova
+        only returns the servers changed since then, deleted ones
+        included, so the rows it leaves out are unchanged. Flavors come
+        from the cached flavor list.
+        """
+        search_opts = {'changes-since': since} if since else {}
+        servers, has_more = api.nova.server_list(request,
+                                                 search_opts=search_opts)
+        wanted = set(instance_ids)
+        deleted = set() if since else set(wanted)
+        instances = {}
+        for server in servers:
+            if server.id not in wanted:
+                continue
+            deleted.discard(server.id)
+            if server.status == "DELETED":
+                deleted.add(server.id)
+            else:
+                instances[server.id] = server
+
+        flavors = dict((str(flavor.id), flavor)
+                       for flavor in api.nova.flavor_list(request))
+        missing = set(instance.flavor["id"] for instance in instances.values()
+                      if instance.flavor["id"] not in flavors)
+        if missing:
+            flavors.update(api.nova.flavor_get_many(request, missing))
+        for instance in instances.values():
+            if instance.flavor["id"] in flavors:
+                instance.full_flavor = flavors[instance.flavor["id"]]
+            error = get_instance_error(instance)
+            if error:
+                messages.error(request, error)
+        return instances, deleted
+
 
 class StartInstance(tables.BatchAction):
     name = "start"
@@ -769,6 +835,39 @@ class InstancesTable(tables.DataTable):
                                      filters.timesince_sortable),
                             attrs={'data-type': 'timesince'})
 
+    def maybe_preempt(self):
+        table_name, action_name, obj_id = self.check_handler(self.request)
+        if table_name == self.name and action_name == ROWS_UPDATE_ACTION:
+            return self.rows_update()
+        return super(InstancesTable, self).maybe_preempt()
+
+    def rows_update(self):
+        """Answers one poll of the batched row poller.
+
+        Takes the ids of the polled rows as ``obj_id`` parameters and the
+        ``since`` value of the previous answer, and returns JSON with the
+        rendered rows which changed, the ids of the deleted instances and
+        the ``since`` value for the next poll.
+        """
+        request = self.request
+        since = _rows_update_since()
+        try:
+            instances, deleted = self._meta.row_class(self).get_data_many(
+                request, request.GET.getlist("obj_id"),
+                request.GET.get("since"))
+        except Exception:
+            error = exceptions.handle(request, ignore=True)
+            return http.HttpResponse(status=error.status_code)
+        rows = {}
+        for instance_id, instance in instances.items():
+            row = self._meta.row_class(self)
+            row.load_cells(instance)
+            rows[instance_id] = row.render()
+        return http.HttpResponse(json.dumps({"rows": rows,
+                                             "deleted": sorted(deleted),
+                                             "since": since}),
+                                 content_type="application/json")
+
     class Meta:
         name = "instances"
         verbose_name = _("Instances")
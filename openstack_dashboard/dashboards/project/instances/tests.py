@@ -48,11 +48,14 @@ SEC_GROUP_ROLE_PREFIX = \
 
 
 class InstanceTests(test.TestCase):
+    def _image_names(self):
+        return dict((image.id, image.name) for image in self.images.list())
+
     @test.create_stubs({api.nova: ('flavor_list',
                                    'server_list',
                                    'tenant_absolute_limits',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network:
                             ('floating_ip_simple_associate_supported',
                              'servers_update_addresses',),
@@ -64,8 +67,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -107,7 +110,7 @@ class InstanceTests(test.TestCase):
                                    'flavor_get',
                                    'tenant_absolute_limits',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network:
                             ('floating_ip_simple_associate_supported',
                              'servers_update_addresses',),
@@ -125,11 +128,12 @@ class InstanceTests(test.TestCase):
         api.network.servers_update_addresses(IsA(http.HttpRequest), servers)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndRaise(self.exceptions.nova)
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
-        for server in servers:
-            api.nova.flavor_get(IsA(http.HttpRequest), server.flavor["id"]). \
-                AndReturn(full_flavors[server.flavor["id"]])
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
+        # Missing flavors are fetched once per flavor, not per server.
+        for flavor_id in set(server.flavor["id"] for server in servers):
+            api.nova.flavor_get(IsA(http.HttpRequest), flavor_id). \
+                AndReturn(full_flavors[flavor_id])
         api.nova.tenant_absolute_limits(IsA(http.HttpRequest), reserved=True) \
            .MultipleTimes().AndReturn(self.limits['absolute'])
         api.network.floating_ip_simple_associate_supported(
@@ -149,7 +153,7 @@ class InstanceTests(test.TestCase):
                                    'flavor_get',
                                    'tenant_absolute_limits',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network:
                             ('floating_ip_simple_associate_supported',
                              'servers_update_addresses',),
@@ -170,11 +174,12 @@ class InstanceTests(test.TestCase):
             .AndReturn([servers, False])
         api.network.servers_update_addresses(IsA(http.HttpRequest), servers)
         api.nova.flavor_list(IsA(http.HttpRequest)).AndReturn(flavors)
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
+        # The missing flavors are fetched concurrently.
         for server in servers:
             api.nova.flavor_get(IsA(http.HttpRequest), server.flavor["id"]). \
-                AndRaise(self.exceptions.nova)
+                InAnyOrder().AndRaise(self.exceptions.nova)
         api.nova.tenant_absolute_limits(IsA(http.HttpRequest), reserved=True) \
            .MultipleTimes().AndReturn(self.limits['absolute'])
         api.network.floating_ip_simple_associate_supported(
@@ -194,7 +199,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'tenant_absolute_limits',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network:
                             ('floating_ip_simple_associate_supported',
                              'servers_update_addresses',),
@@ -211,8 +216,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -234,7 +239,7 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('server_list',
                                    'flavor_list',
                                    'server_delete',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_terminate_instance(self):
         servers = self.servers.list()
@@ -245,8 +250,8 @@ class InstanceTests(test.TestCase):
             .AndReturn([servers, False])
         api.network.servers_update_addresses(IsA(http.HttpRequest), servers)
         api.nova.flavor_list(IgnoreArg()).AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         api.nova.server_delete(IsA(http.HttpRequest), server.id)
         self.mox.ReplayAll()
 
@@ -258,7 +263,7 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('server_list',
                                    'flavor_list',
                                    'server_delete',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_terminate_instance_exception(self):
         servers = self.servers.list()
@@ -269,8 +274,8 @@ class InstanceTests(test.TestCase):
             .AndReturn([servers, False])
         api.network.servers_update_addresses(IsA(http.HttpRequest), servers)
         api.nova.flavor_list(IgnoreArg()).AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         api.nova.server_delete(IsA(http.HttpRequest), server.id) \
                           .AndRaise(self.exceptions.nova)
 
@@ -285,7 +290,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_pause_instance(self):
         servers = self.servers.list()
@@ -296,8 +301,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -315,7 +320,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_pause_instance_exception(self):
         servers = self.servers.list()
@@ -326,8 +331,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -346,7 +351,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_unpause_instance(self):
         servers = self.servers.list()
@@ -357,8 +362,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -376,7 +381,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_unpause_instance_exception(self):
         servers = self.servers.list()
@@ -388,8 +393,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -407,15 +412,15 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('server_reboot',
                                    'server_list',
                                    'flavor_list',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_reboot_instance(self):
         servers = self.servers.list()
         server = servers[0]
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -433,7 +438,7 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('server_reboot',
                                    'server_list',
                                    'flavor_list',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_reboot_instance_exception(self):
         servers = self.servers.list()
@@ -441,8 +446,8 @@ class InstanceTests(test.TestCase):
 
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -461,7 +466,7 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('server_reboot',
                                    'server_list',
                                    'flavor_list',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_soft_reboot_instance(self):
         servers = self.servers.list()
@@ -469,8 +474,8 @@ class InstanceTests(test.TestCase):
 
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -489,7 +494,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_suspend_instance(self):
         servers = self.servers.list()
@@ -500,8 +505,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -519,7 +524,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_suspend_instance_exception(self):
         servers = self.servers.list()
@@ -530,8 +535,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -550,7 +555,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_resume_instance(self):
         servers = self.servers.list()
@@ -562,8 +567,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -581,7 +586,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'flavor_list',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_resume_instance_exception(self):
         servers = self.servers.list()
@@ -593,8 +598,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -2162,7 +2167,7 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('flavor_list', 'server_list',
                                    'tenant_absolute_limits',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network:
                             ('floating_ip_simple_associate_supported',
                              'servers_update_addresses',),
@@ -2177,8 +2182,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -2206,7 +2211,7 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('flavor_list', 'server_list',
                                    'tenant_absolute_limits',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network:
                             ('floating_ip_simple_associate_supported',
                              'servers_update_addresses',),
@@ -2220,8 +2225,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
             .AndReturn([servers, False])
@@ -2307,7 +2312,7 @@ class InstanceTests(test.TestCase):
                                       'tenant_floating_ip_allocate',
                                       'floating_ip_associate',
                                       'servers_update_addresses',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.nova: ('server_list',
                                    'flavor_list')})
     def test_associate_floating_ip(self):
@@ -2320,8 +2325,8 @@ class InstanceTests(test.TestCase):
             .AndReturn([servers, False])
         api.network.servers_update_addresses(IsA(http.HttpRequest), servers)
         api.nova.flavor_list(IgnoreArg()).AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         api.network.floating_ip_target_get_by_instance(
             IsA(http.HttpRequest),
             server.id).AndReturn(server.id)
@@ -2341,7 +2346,7 @@ class InstanceTests(test.TestCase):
                                       'tenant_floating_ip_list',
                                       'floating_ip_disassociate',
                                       'servers_update_addresses',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.nova: ('server_list',
                                    'flavor_list')})
     def test_disassociate_floating_ip(self):
@@ -2355,8 +2360,8 @@ class InstanceTests(test.TestCase):
             .AndReturn([servers, False])
         api.network.servers_update_addresses(IsA(http.HttpRequest), servers)
         api.nova.flavor_list(IgnoreArg()).AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         api.network.floating_ip_target_list_by_instance(
             IsA(http.HttpRequest),
             server.id).AndReturn([server.id, ])
@@ -2666,7 +2671,7 @@ class InstanceTests(test.TestCase):
                                    'server_list',
                                    'tenant_absolute_limits',
                                    'extension_supported',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network:
                             ('floating_ip_simple_associate_supported',
                              'servers_update_addresses',),
@@ -2683,8 +2688,8 @@ class InstanceTests(test.TestCase):
             .MultipleTimes().AndReturn(True)
         api.nova.flavor_list(IsA(http.HttpRequest)) \
             .MultipleTimes().AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .MultipleTimes().AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .MultipleTimes().AndReturn(self._image_names())
 
         search_opts = {'marker': None, 'paginate': True}
         api.nova.server_list(IsA(http.HttpRequest), search_opts=search_opts) \
@@ -2725,7 +2730,7 @@ class InstanceTests(test.TestCase):
     @test.create_stubs({api.nova: ('server_list',
                                    'flavor_list',
                                    'server_delete',),
-                        api.glance: ('image_list_detailed',),
+                        api.glance: ('image_names',),
                         api.network: ('servers_update_addresses',)})
     def test_terminate_instance_with_pagination(self):
         """Instance should be deleted from
@@ -2741,8 +2746,8 @@ class InstanceTests(test.TestCase):
         api.network.servers_update_addresses(IsA(http.HttpRequest),
                                              servers[page_size:])
         api.nova.flavor_list(IgnoreArg()).AndReturn(self.flavors.list())
-        api.glance.image_list_detailed(IgnoreArg()) \
-            .AndReturn((self.images.list(), False))
+        api.glance.image_names(IsA(http.HttpRequest), IgnoreArg()) \
+            .AndReturn(self._image_names())
         api.nova.server_delete(IsA(http.HttpRequest), server.id)
         self.mox.ReplayAll()
 
@@ -2840,3 +2845,41 @@ class InstanceAjaxTests(test.TestCase):
         # a different availability zone.', u'']]
         self.assertEqual(messages[0][0], 'error')
         self.assertTrue(messages[0][1].startswith('Failed'))
+
+    @test.create_stubs({api.nova: ("server_list",
+                                   "flavor_list",
+                                   "extension_supported"),
+                        api.neutron: ("is_extension_supported",)})
+    def test_rows_update(self):
+        servers = self.servers.list()
+        changed, deleted, unchanged = servers[0], servers[1], servers[2]
+        deleted.status = "DELETED"
+        since = "2014-05-01T12:00:00"
+
+        api.nova.extension_supported('AdminActions', IsA(http.HttpRequest))\
+            .MultipleTimes().AndReturn(True)
+        api.neutron.is_extension_supported(IsA(http.HttpRequest),
+                                           'security-group')\
+            .MultipleTimes().AndReturn(True)
+        api.nova.server_list(IsA(http.HttpRequest),
+                             search_opts={'changes-since': since})\
+            .AndReturn([[changed, deleted], False])
+        api.nova.flavor_list(IsA(http.HttpRequest))\
+            .AndReturn(self.flavors.list())
+
+        self.mox.ReplayAll()
+
+        params = [('action', 'rows_update'),
+                  ('table', 'instances'),
+                  ('obj_id', changed.id),
+                  ('obj_id', deleted.id),
+                  ('obj_id', unchanged.id),
+                  ('since', since)]
+        res = self.client.get('?'.join((INDEX_URL, urlencode(params))),
+                              HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(res.status_code, 200)
+        data = json.loads(res.content)
+        self.assertEqual(data['rows'].keys(), [changed.id])
+        self.assertIn(changed.name, data['rows'][changed.id])
+        self.assertEqual(data['deleted'], [deleted.id])
+        self.assertTrue(data['since'])
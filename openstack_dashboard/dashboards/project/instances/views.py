@@ -44,6 +44,7 @@ from openstack_dashboard.dashboards.project.instances \
     import tabs as project_tabs
 from openstack_dashboard.dashboards.project.instances \
     import workflows as project_workflows
+from openstack_dashboard.utils import concurrency
 
 
 class IndexView(tables.DataTableView):
@@ -69,40 +70,51 @@ class IndexView(tables.DataTableView):
                               _('Unable to retrieve instances.'))
 
         if instances:
-            try:
-                api.network.servers_update_addresses(self.request, instances)
-            except Exception:
-                exceptions.handle(
-                    self.request,
-                    message=_('Unable to retrieve IP addresses from Neutron.'),
-                    ignore=True)
+            # Everything below only depends on the server list, so fetch
+            # it concurrently.
+            fetch = concurrency.ParallelFetch(self.request)
+            fetch.add('addresses', api.network.servers_update_addresses,
+                      args=(instances,))
+            fetch.add('flavors', api.nova.flavor_list)
+            # Only look up the images this page refers to.
+            image_ids = [instance.image.get('id') for instance in instances
+                         if isinstance(getattr(instance, 'image', None),
+                                       dict)]
+            fetch.add('images', api.glance.image_names, args=(image_ids,))
 
             # Gather our flavors and images and correlate our instances to them
             try:
-                flavors = api.nova.flavor_list(self.request)
+                flavors = fetch.get('flavors')
             except Exception:
                 flavors = []
                 exceptions.handle(self.request, ignore=True)
 
+            full_flavors = SortedDict([(str(flavor.id), flavor)
+                                       for flavor in flavors])
+
+            # Flavors missing from the list (e.g. private ones) are fetched
+            # in bulk, concurrently with the images.
+            missing_flavors = set(instance.flavor.get("id")
+                                  for instance in instances) - \
+                set(full_flavors)
+            if missing_flavors:
+                fetch.add('missing_flavors', api.nova.flavor_get_many,
+                          args=(missing_flavors,))
+
             try:
-                # TODO(gabriel): Handle pagination.
-                images, more = api.glance.image_list_detailed(self.request)
+                image_names = fetch.get('images')
             except Exception:
-                images = []
+                image_names = {}
                 exceptions.handle(self.request, ignore=True)
 
-            full_flavors = SortedDict([(str(flavor.id), flavor)
-                                       for flavor in flavors])
-            image_map = SortedDict([(str(image.id), image)
-                                    for image in images])
-
             # Loop through instances to get flavor info.
             for instance in instances:
                 if hasattr(instance, 'image'):
                     # Instance from image returns dict
                     if isinstance(instance.image, dict):
-                        if instance.image.get('id') in image_map:
-                            instance.image = image_map[instance.image['id']]
+                        name = image_names.get(instance.image.get('id'))
+                        if name is not None:
+                            instance.image = dict(instance.image, name=name)
                     else:
                         # Instance from volume returns a string
                         instance.image = {'name':
@@ -110,16 +122,24 @@ class IndexView(tables.DataTableView):
 
                 try:
                     flavor_id = instance.flavor["id"]
+                    if flavor_id not in full_flavors:
+                        # If the flavor_id is not in full_flavors list,
+                        # it was fetched with the other missing ones above.
+                        # Flavors which no longer exist are left unset.
+                        full_flavors.update(fetch.get('missing_flavors'))
                     if flavor_id in full_flavors:
                         instance.full_flavor = full_flavors[flavor_id]
-                    else:
-                        # If the flavor_id is not in full_flavors list,
-                        # get it via nova api.
-                        instance.full_flavor = api.nova.flavor_get(
-                            self.request, flavor_id)
                 except Exception:
                     msg = _('Unable to retrieve instance size information.')
                     exceptions.handle(self.request, msg)
+
+            try:
+                fetch.get('addresses')
+            except Exception:
+                exceptions.handle(
+                    self.request,
+                    message=_('Unable to retrieve IP addresses from Neutron.'),
+                    ignore=True)
         return instances
 
 
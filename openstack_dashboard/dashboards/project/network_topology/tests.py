@@ -0,0 +1,106 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django import http
+from mox import IgnoreArg  # noqa
+from mox import IsA  # noqa
+
+from openstack_dashboard import api
+from openstack_dashboard.test import helpers as test
+
+
+JSON_URL = reverse('horizon:project:network_topology:json')
+
+
+class NetworkTopologyTests(test.TestCase):
+    def _stub_topology(self, ports_lists):
+        tenant_id = self.request.user.tenant_id
+        api.nova.server_list(IsA(http.HttpRequest)) \
+            .MultipleTimes().AndReturn([self.servers.list(), False])
+        api.neutron.network_list(IsA(http.HttpRequest),
+                                 **{'router:external': True}) \
+            .MultipleTimes().AndReturn(
+                [n for n in self.networks.list() if n['router:external']])
+        api.neutron.network_list_for_tenant(IsA(http.HttpRequest),
+                                            tenant_id) \
+            .MultipleTimes().AndReturn(self.networks.list())
+        for ports in ports_lists:
+            api.neutron.port_list_for_topology(IsA(http.HttpRequest),
+                                               IgnoreArg(), IgnoreArg()) \
+                .AndReturn(ports)
+        api.neutron.router_list(IsA(http.HttpRequest), tenant_id=tenant_id) \
+            .MultipleTimes().AndReturn(self.routers.list())
+
+    @test.create_stubs({api.nova: ('server_list',),
+                        api.neutron: ('network_list',
+                                      'network_list_for_tenant',
+                                      'port_list_for_topology',
+                                      'router_list')})
+    def test_json_view(self):
+        cache.clear()
+        ports = self.ports.list()
+        self._stub_topology([ports, ports, ports, ports[1:]])
+        self.mox.ReplayAll()
+
+        res = self.client.get(JSON_URL)
+        self.assertEqual(res.status_code, 200)
+        data = json.loads(res.content)
+        version = data['version']
+        self.assertEqual(res['ETag'], '"%s"' % version)
+        self.assertEqual(sorted(s.id for s in self.servers.list()),
+                         sorted(s['id'] for s in data['servers']))
+        self.assertEqual(set(n.id for n in self.networks.list()),
+                         set(n['id'] for n in data['networks']))
+        port_ids = [p['id'] for p in data['ports']]
+        for port in ports:
+            self.assertIn(port.id, port_ids)
+
+        # Unchanged topologies are not sent again.
+        res = self.client.get(JSON_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, 304)
+        res = self.client.get(JSON_URL, {'since': version})
+        self.assertEqual(res.status_code, 304)
+
+        # Only the changes since the given version are sent.
+        res = self.client.get(JSON_URL, {'since': version})
+        self.assertEqual(res.status_code, 200)
+        data = json.loads(res.content)
+        self.assertTrue(data['delta'])
+        self.assertNotEqual(version, data['version'])
+        self.assertEqual([], data['servers'])
+        self.assertEqual([ports[0].id], data['removed']['ports'])
+
+    @test.create_stubs({api.nova: ('server_list',),
+                        api.neutron: ('network_list',
+                                      'network_list_for_tenant',
+                                      'port_list_for_topology',
+                                      'router_list')})
+    def test_json_view_unknown_version(self):
+        cache.clear()
+        self._stub_topology([self.ports.list()])
+        self.mox.ReplayAll()
+
+        # Versions which expired or were never sent get the full document.
+        res = self.client.get(JSON_URL, {'since': 'unknown'})
+        self.assertEqual(res.status_code, 200)
+        data = json.loads(res.content)
+        self.assertNotIn('delta', data)
+        self.assertNotEqual('unknown', data['version'])
+        self.assertEqual(sorted(s.id for s in self.servers.list()),
+                         sorted(s['id'] for s in data['servers']))
+        self.assertNotIn('removed', data)
@@ -0,0 +1,199 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Builds the document drawn by the network topology panel.
+
+The servers, networks and routers of the project are fetched
+concurrently, then the ports of those networks and routers, and they are
+joined through sets of ids. Every document has a version, the hash of its
+content, which the panel's poller can send back to learn that nothing
+changed or to get only the nodes which did.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+
+from openstack_dashboard import api
+from openstack_dashboard.utils import concurrency
+
+
+NODE_KINDS = ('servers', 'networks', 'ports', 'routers')
+
+# The node hashes of recent versions are cached per project for
+# TOPOLOGY_VERSION_CACHE_TTL seconds, so that a poll can be answered with
+# the changes since the version it holds.
+TOPOLOGY_VERSION_CACHE_PREFIX = 'network_topology:'
+
+
+def _fetch(fetch, name):
+    try:
+        return fetch.get(name)
+    except Exception:
+        return []
+
+
+def _add_resource_url(request, view, resources):
+    tenant_id = request.user.tenant_id
+    for resource in resources:
+        if (resource.get('tenant_id')
+                and tenant_id != resource.get('tenant_id')):
+            continue
+        resource['url'] = reverse(view, None, [str(resource['id'])])
+
+
+def _network(network):
+    try:
+        subnets = [{'cidr': subnet.cidr} for subnet in network.subnets]
+    except Exception:
+        subnets = []
+    return {'name': network.name,
+            'id': network.id,
+            'subnets': subnets,
+            'router:external': network['router:external']}
+
+
+def build(request):
+    """Returns the topology of the current project as a dict of lists."""
+    tenant_id = request.user.tenant_id
+    fetch = concurrency.ParallelFetch(request)
+    fetch.add('servers', api.nova.server_list)
+    # If we didn't specify tenant_id, all networks would be shown to an
+    # admin user, so the networks have to be specified. Subnets need no
+    # tenant_id: those of the public networks are drawn on them.
+    fetch.add('public_networks', api.neutron.network_list,
+              kwargs={'router:external': True})
+    fetch.add('networks', api.neutron.network_list_for_tenant,
+              args=(tenant_id,))
+    fetch.add('routers', api.neutron.router_list,
+              kwargs={'tenant_id': tenant_id})
+
+    try:
+        servers, more = fetch.get('servers')
+    except Exception:
+        servers = []
+    console = 'spice' if getattr(settings, 'CONSOLE_TYPE',
+                                 'AUTO') == 'SPICE' else 'vnc'
+    data = {}
+    data['servers'] = [{'name': server.name,
+                        'status': server.status,
+                        'console': console,
+                        'task': getattr(server, 'OS-EXT-STS:task_state'),
+                        'id': server.id} for server in servers]
+    _add_resource_url(request, 'horizon:project:instances:detail',
+                      data['servers'])
+
+    networks = [_network(network) for network in _fetch(fetch, 'networks')]
+    _add_resource_url(request, 'horizon:project:networks:detail', networks)
+    # Add the public networks the project does not own.
+    network_ids = set(network['id'] for network in networks)
+    networks.extend(_network(network)
+                    for network in _fetch(fetch, 'public_networks')
+                    if network.id not in network_ids)
+    data['networks'] = sorted(networks,
+                              key=lambda x: x.get('router:external'),
+                              reverse=True)
+
+    routers = _fetch(fetch, 'routers')
+    # Only the ports of the drawn networks and routers are listed, since
+    # an admin can see every port of the cloud.
+    try:
+        ports = api.neutron.port_list_for_topology(
+            request, [network['id'] for network in data['networks']],
+            [router.id for router in routers])
+    except Exception:
+        ports = []
+    data['ports'] = [{'id': port.id,
+                      'network_id': port.network_id,
+                      'device_id': port.device_id,
+                      'fixed_ips': port.fixed_ips,
+                      'device_owner': port.device_owner,
+                      'status': port.status}
+                     for port in ports]
+    _add_resource_url(request, 'horizon:project:networks:ports:detail',
+                      data['ports'])
+
+    data['routers'] = [{'id': router.id,
+                        'name': router.name,
+                        'status': router.status,
+                        'external_gateway_info':
+                            router.external_gateway_info}
+                       for router in routers]
+
+    # The user can't see the ports on external networks, so fake ports
+    # are added based on the router gateways.
+    attached = set((port['device_id'], port['network_id'])
+                   for port in data['ports'])
+    for router in data['routers']:
+        external_network = (router.get('external_gateway_info')
+                            or {}).get('network_id')
+        if external_network and (router['id'],
+                                 external_network) not in attached:
+            data['ports'].append({'id': 'gateway%s' % external_network,
+                                  'network_id': external_network,
+                                  'device_id': router['id'],
+                                  'fixed_ips': []})
+    _add_resource_url(request, 'horizon:project:routers:detail',
+                      data['routers'])
+    return data
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True)).hexdigest()
+
+
+def index(data):
+    """Returns ``{kind: {id: hash}}`` for the nodes of a topology."""
+    return dict((kind, dict((node['id'], _hash(node))
+                            for node in data[kind]))
+                for kind in NODE_KINDS)
+
+
+def version(nodes):
+    """Returns the version of a topology from its ``index``."""
+    return _hash(nodes)
+
+
+def _version_cache_key(request, topology_version):
+    return '%s%s:%s' % (TOPOLOGY_VERSION_CACHE_PREFIX,
+                        request.user.tenant_id, topology_version)
+
+
+def remember(request, topology_version, nodes):
+    ttl = getattr(settings, 'TOPOLOGY_VERSION_CACHE_TTL', 5 * 60)
+    if ttl:
+        cache.set(_version_cache_key(request, topology_version), nodes, ttl)
+
+
+def delta(request, since, data, nodes):
+    """Returns the changes of ``data`` since version ``since``.
+
+    The result holds the changed and new nodes of each kind and, under
+    ``removed``, the ids of the nodes which are gone; it is ``None`` when
+    version ``since`` is no longer known.
+    """
+    old = cache.get(_version_cache_key(request, since))
+    if old is None:
+        return None
+    changes = {'removed': {}}
+    for kind in NODE_KINDS:
+        hashes = nodes[kind]
+        changes[kind] = [node for node in data[kind]
+                         if old[kind].get(node['id']) != hashes[node['id']]]
+        changes['removed'][kind] = sorted(set(old[kind]) - set(nodes[kind]))
+    return changes
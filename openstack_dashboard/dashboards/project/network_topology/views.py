@@ -20,15 +20,17 @@
 
 import json
 
-from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.core.urlresolvers import reverse_lazy
 from django.http import HttpResponse  # noqa
+from django.http import HttpResponseNotModified  # noqa
+from django.utils.http import parse_etags
+from django.utils.http import quote_etag
 from django.views.generic import TemplateView  # noqa
 from django.views.generic import View  # noqa
 
-from openstack_dashboard import api
-
+from openstack_dashboard.dashboards.project.network_topology \
+    import topology
 from openstack_dashboard.dashboards.project.network_topology.instances \
     import tables as instances_tables
 from openstack_dashboard.dashboards.project.network_topology.ports \
@@ -93,131 +95,34 @@ class NetworkTopologyView (TemplateView):
 
 
 class JSONView(View):
-    def add_resource_url(self, view, resources):
-        tenant_id = self.request.user.tenant_id
-        for resource in resources:
-            if (resource.get('tenant_id')
-                    and tenant_id != resource.get('tenant_id')):
-                continue
-            resource['url'] = reverse(view, None, [str(resource['id'])])
-
-    def _check_router_external_port(self, ports, router_id, network_id):
-        for port in ports:
-            if (port['network_id'] == network_id
-                    and port['device_id'] == router_id):
-                return True
-        return False
+    """Serves the topology drawn by the panel.
+
+    Responses carry the topology version as their ETag, so that a poll
+    sending it back in If-None-Match gets a 304 while nothing changed. A
+    poll passing the version it holds as ``since`` only gets the changed
+    nodes, plus the ids of the removed ones under ``removed``, when that
+    version is still known.
+    """
 
     def get(self, request, *args, **kwargs):
-        data = {}
-        # Get nova data
-        try:
-            servers, more = api.nova.server_list(request)
-        except Exception:
-            servers = []
-        console_type = getattr(settings, 'CONSOLE_TYPE', 'AUTO')
-        if console_type == 'SPICE':
-            console = 'spice'
+        data = topology.build(request)
+        nodes = topology.index(data)
+        version = topology.version(nodes)
+        since = request.GET.get('since')
+        # parse_etags returns the tags without their quotes.
+        if (since == version or
+                version in parse_etags(request.META.get('HTTP_IF_NONE_MATCH',
+                                                        ''))):
+            response = HttpResponseNotModified()
         else:
-            console = 'vnc'
-        data['servers'] = [{'name': server.name,
-                            'status': server.status,
-                            'console': console,
-                            'task': getattr(server, 'OS-EXT-STS:task_state'),
-                            'id': server.id} for server in servers]
-        self.add_resource_url('horizon:project:instances:detail',
-                              data['servers'])
-
-        # Get neutron data
-        # if we didn't specify tenant_id, all networks shown as admin user.
-        # so it is need to specify the networks. However there is no need to
-        # specify tenant_id for subnet. The subnet which belongs to the public
-        # network is needed to draw subnet information on public network.
-        try:
-            neutron_public_networks = api.neutron.network_list(
-                request,
-                **{'router:external': True})
-            neutron_networks = api.neutron.network_list_for_tenant(
-                request,
-                request.user.tenant_id)
-            neutron_ports = api.neutron.port_list(request)
-            neutron_routers = api.neutron.router_list(
-                request,
-                tenant_id=request.user.tenant_id)
-        except Exception:
-            neutron_public_networks = []
-            neutron_networks = []
-            neutron_ports = []
-            neutron_routers = []
-
-        networks = [{'name': network.name,
-                    'id': network.id,
-                    'subnets': [{'cidr': subnet.cidr}
-                                for subnet in network.subnets],
-                    'router:external': network['router:external']}
-                    for network in neutron_networks]
-        self.add_resource_url('horizon:project:networks:detail',
-                              networks)
-        # Add public networks to the networks list
-        for publicnet in neutron_public_networks:
-            found = False
-            for network in networks:
-                if publicnet.id == network['id']:
-                    found = True
-            if not found:
-                try:
-                    subnets = [{'cidr': subnet.cidr}
-                               for subnet in publicnet.subnets]
-                except Exception:
-                    subnets = []
-                networks.append({
-                    'name': publicnet.name,
-                    'id': publicnet.id,
-                    'subnets': subnets,
-                    'router:external': publicnet['router:external']})
-        data['networks'] = sorted(networks,
-                                  key=lambda x: x.get('router:external'),
-                                  reverse=True)
-
-        data['ports'] = [{'id': port.id,
-                          'network_id': port.network_id,
-                          'device_id': port.device_id,
-                          'fixed_ips': port.fixed_ips,
-                          'device_owner': port.device_owner,
-                          'status': port.status
-                          }
-                         for port in neutron_ports]
-        self.add_resource_url('horizon:project:networks:ports:detail',
-                              data['ports'])
-
-        data['routers'] = [{
-            'id': router.id,
-            'name': router.name,
-            'status': router.status,
-            'external_gateway_info': router.external_gateway_info}
-            for router in neutron_routers]
-
-        # user can't see port on external network. so we are
-        # adding fake port based on router information
-        for router in data['routers']:
-            external_gateway_info = router.get('external_gateway_info')
-            if not external_gateway_info:
-                continue
-            external_network = external_gateway_info.get(
-                'network_id')
-            if not external_network:
-                continue
-            if self._check_router_external_port(data['ports'],
-                                                router['id'],
-                                                external_network):
-                continue
-            fake_port = {'id': 'gateway%s' % external_network,
-                         'network_id': external_network,
-                         'device_id': router['id'],
-                         'fixed_ips': []}
-            data['ports'].append(fake_port)
-
-        self.add_resource_url('horizon:project:routers:detail',
-                              data['routers'])
-        json_string = json.dumps(data, ensure_ascii=False)
-        return HttpResponse(json_string, content_type='text/json')
+            topology.remember(request, version, nodes)
+            changes = None
+            if since:
+                changes = topology.delta(request, since, data, nodes)
+            if changes is not None:
+                data = dict(changes, delta=True)
+            data['version'] = version
+            json_string = json.dumps(data, ensure_ascii=False)
+            response = HttpResponse(json_string, content_type='text/json')
+        response['ETag'] = quote_etag(version)
+        return response
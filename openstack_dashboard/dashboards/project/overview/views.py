@@ -60,8 +60,9 @@ class ProjectOverview(usage.UsageView):
         project_id = self.request.user.tenant_id
 
         # images
+        custom_quotas = api.jt.get_custom_quotas(project_id)
         owned_image_count = api.jt.get_image_count(project_id, self.request)
-        image_limit = api.jt.get_image_quota(project_id)
+        image_limit = custom_quotas['images']
         self.usage.limits['images'] = {'used': owned_image_count, 'quota': image_limit}
 
         # expiration
@@ -79,7 +80,7 @@ class ProjectOverview(usage.UsageView):
 
         # object storage
         object_mb_usage = api.jt.get_object_mb_usage(project_id)
-        object_mb_limit = api.jt.get_object_mb_quota(project_id)
+        object_mb_limit = custom_quotas['object_mb']
         self.usage.limits['object_mb'] = {'used': object_mb_usage, 'quota': object_mb_limit}
 
         return self.usage.get_instances()
@@ -0,0 +1,26 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from django.core.management.base import NoArgsCommand  # noqa
+
+from openstack_dashboard.api import base
+
+
+class Command(NoArgsCommand):
+    help = ("Flushes the cached nova, cinder and neutron extension lists, "
+            "e.g. after upgrading the cloud.")
+
+    def handle_noargs(self, **options):
+        base.invalidate_extensions()
+        self.stdout.write("Flushed the extension cache.")
@@ -0,0 +1,64 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from optparse import make_option  # noqa
+
+from django.core.management.base import BaseCommand  # noqa
+from django.core.management.base import CommandError  # noqa
+
+from openstack_dashboard.api import showback
+from openstack_dashboard.api import showback_rollup
+
+
+class Command(BaseCommand):
+    help = ("Rolls up showback usage into the daily rollup table, resuming "
+            "after the last day rolled up for each resource class.")
+    option_list = BaseCommand.option_list + (
+        make_option('--since',
+                    help='First day (YYYY-MM-DD) to roll up when a resource '
+                         'class has never been rolled up. Defaults to 90 '
+                         'days ago.'),
+        make_option('--until',
+                    help='Last day (YYYY-MM-DD) to roll up. Defaults to '
+                         'yesterday.'),
+        make_option('--category', action='append', dest='categories',
+                    choices=sorted(showback.CATEGORIES),
+                    help='Resource class to roll up; may be repeated. '
+                         'Defaults to all of them.'),
+    )
+
+    def _day(self, value, default):
+        if not value:
+            return default
+        try:
+            return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError("Invalid day: %s" % value)
+
+    def handle(self, *args, **options):
+        today = datetime.date.today()
+        since = self._day(options.get('since'),
+                          today - datetime.timedelta(days=90))
+        until = self._day(options.get('until'),
+                          today - datetime.timedelta(days=1))
+        if until >= today:
+            raise CommandError("Only finished days can be rolled up.")
+
+        rollup = showback_rollup.rollup
+        rollup.ensure_tables()
+        for category in options.get('categories') or \
+                sorted(showback.CATEGORIES):
+            days = rollup.refresh(category, since, until)
+            self.stdout.write("%s: rolled up %d day(s)" % (category, days))
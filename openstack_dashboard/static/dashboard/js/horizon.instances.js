@@ -0,0 +1,118 @@
+/* Batched polling of the transitioning rows of the instances table.
+ *
+ * Rows marked "ajax-batch-update" (see UpdateRow in
+ * dashboards/project/instances/tables.py) are polled with one request per
+ * table instead of one request per row. The answer holds the rendered rows
+ * which changed, the ids of the deleted instances and the "since" value to
+ * send with the next poll.
+ */
+horizon.instances = {
+  update_rows: function () {
+    var $rows = $('tr.status_unknown.ajax-batch-update');
+    if (!$rows.length) {
+      return;
+    }
+    var $table = $rows.closest('table'),
+      interval = $rows.attr('data-update-interval'),
+      decay_constant = $table.attr('decay_constant'),
+      since = $table.attr('data-batch-update-since') ||
+        $rows.attr('data-batch-update-since');
+
+    // Don't update while a row's action menu is open.
+    if ($rows.find('.actions_column .btn-group.open').length) {
+      setTimeout(horizon.instances.update_rows, interval);
+      $table.removeAttr('decay_constant');
+      return;
+    }
+
+    horizon.ajax.queue({
+      url: $rows.attr('data-batch-update-url'),
+      data: {
+        obj_id: $rows.map(function () {
+          return $(this).attr('data-object-id');
+        }).get(),
+        since: since
+      },
+      traditional: true,
+      dataType: 'json',
+      error: function () {
+        horizon.utils.log(gettext("An error occurred while updating."));
+        $rows.removeClass("ajax-batch-update");
+        $rows.find("i.ajax-updating").remove();
+      },
+      success: function (data) {
+        var changed = false;
+        $table.attr('data-batch-update-since', data.since);
+
+        $.each(data.deleted, function (index, id) {
+          var $row = $rows.filter('[data-object-id="' + id + '"]'),
+            row_count = horizon.datatables.update_footer_count($table, -1),
+            template, params;
+          if (row_count === 0) {
+            template = horizon.templates.compiled_templates["#empty_row_template"];
+            params = {
+              "colspan": $table.find('th[colspan]').attr('colspan'),
+              no_items_label: gettext("No items to display.")
+            };
+            $row.replaceWith(template.render(params));
+          } else {
+            $row.remove();
+          }
+          changed = true;
+        });
+
+        $.each(data.rows, function (id, html) {
+          var $row = $rows.filter('[data-object-id="' + id + '"]'),
+            $new_row = $(html),
+            spinner_elm;
+          if ($new_row.hasClass('status_unknown')) {
+            spinner_elm = $new_row.find("td.status_unknown:last");
+            if ($new_row.find('.btn-action-required').length > 0) {
+              spinner_elm.prepend(
+                $("<div />")
+                  .addClass("action_required_img")
+                  .append($("<img />")
+                    .attr("src", "/static/dashboard/img/action_required.png")));
+            } else {
+              spinner_elm.prepend(
+                $("<div />")
+                  .addClass("loading_gif")
+                  .append($("<img />")
+                    .attr("src", "/static/dashboard/img/loading.gif")));
+            }
+          }
+          if ($new_row.html() !== $row.html()) {
+            if ($row.find('.table-row-multi-select:checkbox').is(':checked')) {
+              $new_row.find('.table-row-multi-select:checkbox').prop('checked', true);
+            }
+            $row.replaceWith($new_row);
+            changed = true;
+          }
+        });
+
+        if (changed) {
+          $table.trigger("update");
+          $table.removeAttr('decay_constant');
+        }
+      },
+      complete: function () {
+        var next_poll;
+        horizon.datatables.validate_button();
+        // Back off while nothing changes, like horizon's own poller.
+        // The attribute is a string; ++ converts it to a number.
+        if (decay_constant === undefined) {
+          decay_constant = 1;
+        } else {
+          decay_constant++;
+        }
+        $table.attr('decay_constant', decay_constant);
+        next_poll = Math.min(interval * decay_constant, 30 * 1000);
+        setTimeout(horizon.instances.update_rows, next_poll);
+      }
+    });
+  }
+};
+
+horizon.addInitFunction(function () {
+  horizon.instances.update_rows();
+});
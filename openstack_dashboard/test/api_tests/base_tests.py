@@ -20,10 +20,16 @@
 
 from __future__ import absolute_import
 
+import copy
+
+from django.core.cache import cache
+from django.test.utils import override_settings
+
 from horizon import exceptions
 
 from openstack_dashboard.api import base as api_base
 from openstack_dashboard.test import helpers as test
+from openstack_dashboard.utils import concurrency
 
 
 class APIResource(api_base.APIResourceWrapper):
@@ -80,6 +86,20 @@ class APIResourceWrapperTests(test.TestCase):
         self.assertIn('bar', resource_str)
         self.assertNotIn('baz', resource_str)
 
+    def test_attr_set_per_class(self):
+        class SubResource(APIResource):
+            _attrs = ['qux']
+
+        self.assertEqual(APIResource._attr_set,
+                         frozenset(['foo', 'bar', 'baz']))
+        self.assertEqual(SubResource._attr_set, frozenset(['qux']))
+
+    def test_instance_attribute_shadows_wrapped_attribute(self):
+        resource = APIResource.get_instance()
+        resource.foo = 'local'
+        self.assertEqual(resource.foo, 'local')
+        self.assertEqual(resource._apiresource.foo, 'foo')
+
 
 class APIDictWrapperTests(test.TestCase):
     # APIDict allows for both attribute access and dictionary style [element]
@@ -170,6 +190,93 @@ class ApiHelperTests(test.TestCase):
         with self.assertRaises(exceptions.ServiceCatalogException):
             url = api_base.url_for(self.request, 'image')
 
+    def test_is_service_enabled(self):
+        self.assertTrue(api_base.is_service_enabled(self.request, 'compute'))
+        self.assertTrue(api_base.is_service_enabled(self.request, 'compute',
+                                                    service_name='nova'))
+        self.assertFalse(api_base.is_service_enabled(self.request, 'compute',
+                                                     service_name='other'))
+        self.assertFalse(api_base.is_service_enabled(self.request,
+                                                     'notAnApi'))
+
+        self.request.user.services_region = "bogus_value"
+        self.assertFalse(api_base.is_service_enabled(self.request, 'compute'))
+        self.assertTrue(api_base.is_service_enabled(self.request,
+                                                    'identity'))
+
+    def test_catalog_index_is_reused(self):
+        index = api_base.catalog_index(self.request)
+        self.assertIs(index, api_base.catalog_index(self.request))
+
+        # A different catalog gets its own index.
+        self.request.user.service_catalog = \
+            copy.deepcopy(self.request.user.service_catalog)
+        self.assertIsNot(index, api_base.catalog_index(self.request))
+
+    @override_settings(SERVICE_CATALOG_INDEX_CACHE_SIZE=10)
+    def test_catalog_index_is_shared_by_token(self):
+        api_base._catalog_indexes.clear()
+        try:
+            index = api_base.catalog_index(self.request)
+            # Later requests of the same token load a new copy of the
+            # catalog from the session.
+            self.request.user.service_catalog = \
+                copy.deepcopy(self.request.user.service_catalog)
+            self.assertIs(index, api_base.catalog_index(self.request))
+        finally:
+            api_base._catalog_indexes.clear()
+
+    def test_cached_client(self):
+        created = []
+
+        @api_base.cached_client('test-service')
+        def testclient(request, password=None):
+            created.append(password)
+            return object()
+
+        stats = api_base.client_stats().get('test-service',
+                                            {'hits': 0, 'misses': 0})
+        client = testclient(self.request)
+        self.assertIs(client, testclient(self.request))
+        self.assertIsNot(client, testclient(self.request, password='secret'))
+        # Other threads get their own client.
+        other = concurrency.parallel({'client': lambda:
+                                      testclient(self.request)})['client']
+        self.assertIsNot(client, other)
+        self.assertEqual([None, 'secret', None], created)
+        self.assertEqual({'hits': stats['hits'] + 1,
+                          'misses': stats['misses'] + 3},
+                         api_base.client_stats()['test-service'])
+
+    @override_settings(EXTENSION_CACHE_TTL=60)
+    def test_supported_extensions_are_cached(self):
+        cache.clear()
+        calls = []
+
+        def list_names(request):
+            calls.append(request)
+            return ['quotas', 'security-group']
+
+        for i in range(2):
+            extensions = api_base.supported_extensions(
+                self.request, 'network', 'http://neutron.example.com:9696',
+                list_names)
+            self.assertEqual(frozenset(['quotas', 'security-group']),
+                             extensions)
+        self.assertEqual(1, len(calls))
+
+        # Other endpoints are cached separately.
+        api_base.supported_extensions(self.request, 'network',
+                                      'http://other.example.com:9696',
+                                      list_names)
+        self.assertEqual(2, len(calls))
+
+        api_base.invalidate_extensions()
+        api_base.supported_extensions(self.request, 'network',
+                                      'http://neutron.example.com:9696',
+                                      list_names)
+        self.assertEqual(3, len(calls))
+
 
 class QuotaSetTests(test.TestCase):
 
@@ -213,3 +320,28 @@ class QuotaSetTests(test.TestCase):
     def test_quotaset_add_with_wrong_type(self):
         quota_set = api_base.QuotaSet({'foo': 1, 'bar': 10})
         self.assertRaises(ValueError, quota_set.add, {'test': 7})
+
+    def test_quotaset_setitem_overrides_in_place(self):
+        quota_set = api_base.QuotaSet()
+        quota_set['foo'] = 1
+        quota_set['bar'] = 10
+        quota_set['foo'] = '5'
+
+        self.assertEqual(len(quota_set), 2)
+        self.assertEqual([q.name for q in quota_set], ['foo', 'bar'])
+        self.assertEqual(quota_set.get('foo').limit, 5)
+        self.assertEqual(quota_set[0].limit, 5)
+
+    def test_quotaset_get_missing(self):
+        quota_set = api_base.QuotaSet({'foo': 1})
+        missing = quota_set.get('bar', -1)
+        self.assertEqual((missing.name, missing.limit), ('bar', -1))
+        self.assertEqual(len(quota_set), 1)
+
+    def test_quotaset_add_replaces_unset_quota(self):
+        quota_set = api_base.QuotaSet({'foo': None, 'bar': 10})
+        quota_set += api_base.QuotaSet({'foo': 3, 'bar': 12})
+
+        self.assertEqual(len(quota_set), 2)
+        self.assertEqual(quota_set.get('foo').limit, 3)
+        self.assertEqual(quota_set.get('bar').limit, 10)
@@ -77,6 +77,50 @@ class CeilometerApiTests(test.APITestCase):
         for s in ret_list:
             self.assertIsInstance(s, api.ceilometer.Statistic)
 
+    def test_project_statistics_without_groupby(self):
+        statistics = self.statistics.list()
+        ceilometerclient = self.stub_ceilometerclient()
+        ceilometerclient.statistics = self.mox.CreateMockAnything()
+        # Ceilometer rejects the group-by, so each project is listed.
+        ceilometerclient.statistics.list(meter_name="instance",
+                                         period=None, q=[],
+                                         groupby=['project_id']).\
+            AndRaise(TypeError("unexpected keyword argument 'groupby'"))
+        for project_id in ('1', '2'):
+            ceilometerclient.statistics.list(
+                meter_name="instance", period=None,
+                q=[{'field': 'project_id', 'op': 'eq',
+                    'value': project_id}]).\
+                InAnyOrder().AndReturn(statistics)
+        self.mox.ReplayAll()
+
+        results = list(api.ceilometer.project_statistics(self.request,
+                                                         ["instance"],
+                                                         ['1', '2']))
+        self.assertEqual(['1', '2'],
+                         sorted(project_id
+                                for meter, project_id, stats in results))
+        for meter, project_id, stats in results:
+            self.assertEqual("instance", meter)
+            for s in stats:
+                self.assertIsInstance(s, api.ceilometer.Statistic)
+
+    def test_project_statistics_reports_failures(self):
+        ceilometerclient = self.stub_ceilometerclient()
+        ceilometerclient.statistics = self.mox.CreateMockAnything()
+        ceilometerclient.statistics.list(meter_name="instance",
+                                         period=None, q=[],
+                                         groupby=['project_id']).\
+            AndRaise(self.exceptions.ceilometer)
+        self.mox.ReplayAll()
+
+        # The statistics which could not be retrieved are yielded as None.
+        results = list(api.ceilometer.project_statistics(self.request,
+                                                         ["instance"],
+                                                         ['1', '2']))
+        self.assertEqual([("instance", '1', None), ("instance", '2', None)],
+                         results)
+
     @test.create_stubs({api.nova: ('flavor_list',),
                         })
     def test_meters_list_all(self):
@@ -314,3 +358,33 @@ class CeilometerApiTests(test.APITestCase):
         self.assertEqual(vars(first.fake_meter_2[0]), vars(statistic_obj))
 
         self.assertEqual(len(data), len(resources))
+
+    def test_resource_aggregates_with_statistics_partial(self):
+        statistics = [api.ceilometer.Statistic(s)
+                      for s in self.statistics.list()]
+        calls = []
+
+        # Statistics are fetched from pool threads in no particular order.
+        def statistic_list(request, meter_name, query=None, period=None):
+            calls.append((meter_name, query[0]['value']))
+            if meter_name == 'fake.meter_2':
+                raise self.exceptions.ceilometer
+            return statistics
+
+        self.mox.stubs.Set(api.ceilometer, 'statistic_list', statistic_list)
+
+        ceilometer_usage = api.ceilometer.CeilometerUsage(http.HttpRequest)
+        queries = {'a': [{'field': 'project_id', 'op': 'eq', 'value': 'a'}],
+                   'b': [{'field': 'project_id', 'op': 'eq', 'value': 'b'}]}
+        data = ceilometer_usage.resource_aggregates_with_statistics(
+            queries, meter_names=['fake.meter_1', 'fake.meter_2'],
+            stats_attr='max')
+
+        self.assertItemsEqual(calls, [('fake.meter_1', 'a'),
+                                      ('fake.meter_2', 'a'),
+                                      ('fake.meter_1', 'b'),
+                                      ('fake.meter_2', 'b')])
+        self.assertEqual(len(data), 2)
+        for aggregate in data:
+            self.assertEqual(aggregate.fake_meter_1, 9)
+            self.assertIsNone(aggregate.fake_meter_2)
@@ -19,7 +19,10 @@
 #    under the License.
 
 from django.conf import settings
+from django import http
 from django.test.utils import override_settings
+from glanceclient import exc as glance_exc
+from mox import IsA  # noqa
 
 from openstack_dashboard import api
 from openstack_dashboard.test import helpers as test
@@ -112,3 +115,49 @@ class GlanceApiTests(test.APITestCase):
         self.mox.ReplayAll()
         image = api.glance.image_get(self.request, 'empty')
         self.assertIsNone(image.name)
+
+    def test_image_names_cached(self):
+        images = self.images.list()[:2]
+        self.mox.stubs.Set(api.glance, '_image_names',
+                           api.glance.ImageNameCache(10, 60))
+        self.mox.StubOutWithMock(api.glance, 'image_get')
+        for image in images:
+            api.glance.image_get(IsA(http.HttpRequest), image.id) \
+                .InAnyOrder().AndReturn(image)
+        api.glance.image_get(IsA(http.HttpRequest), 'gone') \
+            .InAnyOrder().AndRaise(glance_exc.HTTPNotFound())
+        self.mox.ReplayAll()
+
+        ids = [image.id for image in images] + ['gone', images[0].id, None]
+        expected = dict((image.id, image.name) for image in images)
+        expected['gone'] = None
+        self.assertEqual(api.glance.image_names(self.request, ids), expected)
+        # Served from the cache, without calling glance again.
+        self.assertEqual(api.glance.image_names(self.request, ids), expected)
+
+    def test_image_names_cached_per_project(self):
+        image = self.images.first()
+        self.mox.stubs.Set(api.glance, '_image_names',
+                           api.glance.ImageNameCache(10, 60))
+        self.mox.StubOutWithMock(api.glance, 'image_get')
+        api.glance.image_get(IsA(http.HttpRequest), image.id) \
+            .AndRaise(glance_exc.HTTPNotFound())
+        api.glance.image_get(IsA(http.HttpRequest), image.id) \
+            .AndReturn(image)
+        self.mox.ReplayAll()
+
+        # A project which cannot see a private image does not hide its
+        # name from the projects which can.
+        self.assertEqual(api.glance.image_names(self.request, [image.id]),
+                         {image.id: None})
+        self.request.user.tenant_id = 'other_project'
+        self.assertEqual(api.glance.image_names(self.request, [image.id]),
+                         {image.id: image.name})
+
+    def test_image_name_cache_evicts_least_recently_used(self):
+        cache = api.glance.ImageNameCache(2, 60)
+        cache.set_many({'a': 'A', 'b': 'B'})
+        cache.get_many(['a'])
+        cache.set_many({'c': 'C'})
+        self.assertEqual(cache.get_many(['a', 'b', 'c']),
+                         {'a': 'A', 'c': 'C'})
@@ -0,0 +1,71 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from mox import IgnoreArg  # noqa
+
+from openstack_dashboard.api import graphite
+from openstack_dashboard.test import helpers as test
+
+
+@override_settings(DAIR_GRAPHITE_SERVER='graphite.example.com')
+class GraphiteApiTests(test.TestCase):
+    def _stub_get(self, series):
+        session = self.mox.CreateMockAnything()
+        response = self.mox.CreateMockAnything()
+        self.mox.StubOutWithMock(graphite, 'session')
+        graphite.session().AndReturn(session)
+        session.get('http://graphite.example.com:8180/render',
+                    params=IgnoreArg(), timeout=10).AndReturn(response)
+        response.raise_for_status()
+        response.json().AndReturn(series)
+        return session
+
+    def test_render_series_one_request(self):
+        self._stub_get([
+            {'target': 'rx', 'datapoints': [[1.0, 100], [2.0, 200]]},
+            {'target': 'tx', 'datapoints': [[3.0, 100], [4.0, 200]]},
+        ])
+        self.mox.ReplayAll()
+
+        series = graphite.render_series({'rx': 'a.rx', 'tx': 'a.tx',
+                                         'empty': 'a.none'},
+                                        from_='-7d')
+        self.assertEqual(graphite.last_value(series['rx']), 2.0)
+        self.assertEqual(graphite.last_value(series['tx']), 4.0)
+        self.assertIsNone(series['empty'])
+
+    def test_get_chart_is_cached(self):
+        cache.clear()
+        session = self.mox.CreateMockAnything()
+        response = self.mox.CreateMockAnything()
+        response.content = 'timestamp,value'
+        self.mox.StubOutWithMock(graphite, 'session')
+        graphite.session().AndReturn(session)
+        session.get('http://graphite.example.com:8180/render?target=a',
+                    timeout=10).AndReturn(response)
+        response.raise_for_status()
+        self.mox.ReplayAll()
+
+        url = 'http://graphite.example.com:8180/render?target=a'
+        chart = graphite.get_chart(('p1', '', 'cpu', '7d', 'csv'), url)
+        cached = graphite.get_chart(('p1', '', 'cpu', '7d', 'csv'), url)
+        self.assertEqual(cached.content, 'timestamp,value')
+        self.assertEqual(cached.etag, chart.etag)
+
+    def test_chart_timeout_ends_at_bucket_boundary(self):
+        self.assertEqual(graphite.chart_timeout(now=600), 300)
+        self.assertEqual(graphite.chart_timeout(now=899), 1)
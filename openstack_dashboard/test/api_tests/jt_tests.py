@@ -0,0 +1,196 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from openstack_dashboard import api
+from openstack_dashboard.api import dair_quotas
+from openstack_dashboard.test import helpers as test
+
+
+class FakeCursor(object):
+    def __init__(self, db):
+        self.db = db
+        self._rows = []
+
+    def execute(self, query, data=()):
+        self.db.queries.append((query, data))
+        self._rows = [row for row in self.db.rows if row[0] in data]
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection(object):
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ProjectInformationTests(test.TestCase):
+    def setUp(self):
+        super(ProjectInformationTests, self).setUp()
+        cache.clear()
+        self.db = FakeConnection([
+            ('p1', 'January 01, 2015', 'January 01, 2014', 'notice', '',
+             'yes'),
+            ('p2', None, 'March 03, 2014', None, 'http://example.com',
+             None),
+        ])
+        self.mox.StubOutWithMock(api.jt, '_dbconnect')
+        api.jt._dbconnect().MultipleTimes().AndReturn(self.db)
+
+    def test_getters_share_one_query(self):
+        self.mox.ReplayAll()
+
+        self.assertEqual(api.jt.get_expiration_date('p1'), 'January 01, 2015')
+        self.assertEqual(api.jt.get_start_date('p1'), 'January 01, 2014')
+        self.assertEqual(api.jt.get_dair_notice('p1'), 'notice')
+        self.assertEqual(api.jt.get_dair_notice_link('p1'), '')
+        self.assertEqual(api.jt.get_research_participant('p1'), 'yes')
+        self.assertEqual(len(self.db.queries), 1)
+
+    def test_missing_project(self):
+        self.mox.ReplayAll()
+
+        self.assertEqual(api.jt.get_expiration_date('nope'),
+                         'Information not available.')
+        self.assertEqual(api.jt.get_dair_notice_link('nope'), '')
+        self.assertIsNone(api.jt.get_dair_notice('nope'))
+        self.assertEqual(len(self.db.queries), 1)
+
+    def test_get_many_batches_projects(self):
+        self.mox.ReplayAll()
+
+        infos = api.jt.get_project_information_many(['p1', 'p2', 'p3'])
+        self.assertEqual(len(self.db.queries), 1)
+        self.assertTrue(infos['p1'].exists)
+        self.assertEqual(infos['p2'].notice_link, 'http://example.com')
+        self.assertFalse(infos['p3'].exists)
+
+        api.jt.get_project_information_many(['p1', 'p2', 'p3'])
+        self.assertEqual(len(self.db.queries), 1)
+
+    def test_query_survives_connector_formatting(self):
+        self.mox.ReplayAll()
+
+        api.jt.get_project_information_many(['p1', 'p2'])
+        query, params = self.db.queries[0]
+        # The connector substitutes the params with the % operator.
+        statement = query % tuple("'%s'" % param for param in params)
+        self.assertIn("date_format(expiration_date, '%M %d, %Y')",
+                      statement)
+        self.assertTrue(statement.endswith("IN ('p1', 'p2')") or
+                        statement.endswith("IN ('p2', 'p1')"))
+
+    def test_set_invalidates(self):
+        self.mox.ReplayAll()
+
+        api.jt.get_dair_notice('p1')
+        api.jt.set_dair_notice('p1', 'new notice')
+        api.jt.get_dair_notice('p1')
+        # read, write, re-read
+        self.assertEqual(len(self.db.queries), 3)
+
+    def test_set_admin_notice_invalidates_admin_row(self):
+        self.mox.ReplayAll()
+
+        api.jt.get_dair_admin_notice()
+        api.jt.set_dair_notice('p1', 'maintenance', True)
+        self.assertEqual(self.db.queries[-1][1],
+                         ('admin', 'maintenance', 'maintenance'))
+        api.jt.get_dair_admin_notice()
+        self.assertEqual(len(self.db.queries), 3)
+
+
+class BrandingTests(test.TestCase):
+    def setUp(self):
+        super(BrandingTests, self).setUp()
+        cache.clear()
+        self.db = FakeConnection([
+            ('admin', None, None, 'maintenance', 'http://example.com', None),
+        ])
+        self.mox.StubOutWithMock(api.jt, '_dbconnect')
+        api.jt._dbconnect().MultipleTimes().AndReturn(self.db)
+
+    def test_branding_is_cached(self):
+        self.mox.ReplayAll()
+
+        branding = api.jt.get_branding('nova-ab')
+        self.assertEqual(branding['dair_admin_notice'], 'maintenance')
+        self.assertEqual(branding['dair_admin_notice_link'],
+                         'http://example.com')
+        api.jt.project_information.invalidate('admin')
+        api.jt.get_branding('nova-ab')
+        self.assertEqual(len(self.db.queries), 1)
+
+    def test_admin_notice_invalidates_branding(self):
+        self.mox.ReplayAll()
+
+        api.jt.get_branding('nova-ab')
+        api.jt.set_dair_notice('p1', 'upgrade', True)
+        self.db.rows = [('admin', None, None, 'upgrade', '', None)]
+        branding = api.jt.get_branding('nova-ab')
+        self.assertEqual(branding['dair_admin_notice'], 'upgrade')
+        self.assertIsNone(branding['dair_admin_notice_link'])
+
+
+class CustomQuotaTests(test.TestCase):
+    def setUp(self):
+        super(CustomQuotaTests, self).setUp()
+        self.backend = dair_quotas.FakeQuotaBackend(
+            quotas={'p1': {'images': 10}},
+            usages={'p1': {'object_mb': 42}})
+        self._original_backend = dair_quotas._backend
+        dair_quotas.set_backend(self.backend)
+
+    def tearDown(self):
+        super(CustomQuotaTests, self).tearDown()
+        dair_quotas._backend = self._original_backend
+
+    @override_settings(DAIR_QUOTA_DEFAULTS={'object_mb': 204800})
+    def test_get_quotas(self):
+        self.assertEqual(api.jt.get_image_quota('p1'), 10)
+        self.assertEqual(api.jt.get_object_mb_quota('p1'), 204800)
+        self.assertEqual(api.jt.get_object_mb_usage('p1'), 42)
+        self.assertEqual(api.jt.get_custom_quotas('p2'),
+                         {'images': None, 'object_mb': 204800})
+
+    @override_settings(DAIR_QUOTA_DEFAULTS={'object_mb': 1024})
+    def test_sql_backend_without_quota_rows(self):
+        backend = dair_quotas.SQLQuotaBackend()
+        self.mox.StubOutWithMock(backend, '_connect')
+        backend._connect().AndReturn(FakeConnection([('p1', 'images', 10)]))
+        self.mox.ReplayAll()
+
+        # Missing limits are only filled in from the configured defaults.
+        self.assertEqual(backend.get_quotas_many(['p1', 'p2']),
+                         {'p1': {'images': 10, 'object_mb': 1024},
+                          'p2': {'images': None, 'object_mb': 1024}})
+
+    def test_set_quota(self):
+        api.jt.set_object_mb_quota('p2', 1024)
+        quotas = api.jt.get_custom_quotas_many(['p1', 'p2'])
+        self.assertEqual(quotas['p1']['images'], 10)
+        self.assertEqual(quotas['p2']['object_mb'], 1024)
@@ -14,6 +14,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from django.test.utils import override_settings
+
+from mox import IgnoreArg  # noqa
+
 from openstack_dashboard import api
 from openstack_dashboard.test import helpers as test
 
@@ -281,3 +285,74 @@ class NeutronApiTests(test.APITestCase):
             api.neutron.is_extension_supported(self.request, 'quotas'))
         self.assertFalse(
             api.neutron.is_extension_supported(self.request, 'doesntexist'))
+
+    @override_settings(NEUTRON_FILTER_CHUNK_SIZE=1)
+    def test_port_list_for_topology(self):
+        tenant_id = self.request.user.tenant_id
+        net1, net2 = self.api_networks.list()[:2]
+        router = self.api_routers.first()
+        port1, port2 = self.api_ports.list()[:2]
+        gateway = dict(self.api_ports.list()[2], device_id=router['id'],
+                       device_owner='network:router_gateway')
+
+        neutronclient = self.stub_neutronclient()
+        for network, ports in ((net1, [port1]), (net2, [port2])):
+            neutronclient.list_ports(network_id=[network['id']],
+                                     tenant_id=tenant_id,
+                                     fields=IgnoreArg()) \
+                .InAnyOrder().AndReturn({'ports': ports})
+        neutronclient.list_ports(device_id=[router['id']],
+                                 device_owner='network:router_gateway',
+                                 fields=IgnoreArg()) \
+            .InAnyOrder().AndReturn({'ports': [gateway]})
+        self.mox.ReplayAll()
+
+        ports = api.neutron.port_list_for_topology(
+            self.request, [net1['id'], net2['id']], [router['id']])
+        self.assertEqual(sorted([port1['id'], port2['id'], gateway['id']]),
+                         sorted(port.id for port in ports))
+        for port in ports:
+            self.assertIsInstance(port, api.neutron.Port)
+
+    @override_settings(NEUTRON_FILTER_CHUNK_SIZE=1)
+    def test_servers_update_addresses(self):
+        servers = self.servers.list()[:2]
+        ports = [dict(self.api_ports.list()[1], device_id=servers[0].id),
+                 dict(self.api_ports.list()[2], device_id=servers[1].id)]
+        fip = self.api_q_floating_ips.list()[1]
+        net1, net2 = self.api_networks.list()[:2]
+
+        neutronclient = self.stub_neutronclient()
+        # Every id is listed in its own chunk, concurrently.
+        for port in ports:
+            neutronclient.list_ports(device_id=[port['device_id']],
+                                     fields=IgnoreArg()) \
+                .InAnyOrder('ports').AndReturn({'ports': [port]})
+        neutronclient.list_floatingips(tenant_id=self.request.user.tenant_id,
+                                       port_id=[ports[0]['id']],
+                                       fields=IgnoreArg()) \
+            .InAnyOrder('details').AndReturn({'floatingips': [fip]})
+        neutronclient.list_floatingips(tenant_id=self.request.user.tenant_id,
+                                       port_id=[ports[1]['id']],
+                                       fields=IgnoreArg()) \
+            .InAnyOrder('details').AndReturn({'floatingips': []})
+        for network in (net1, net2):
+            neutronclient.list_networks(id=[network['id']],
+                                        fields=IgnoreArg()) \
+                .InAnyOrder('details').AndReturn({'networks': [network]})
+        self.mox.ReplayAll()
+
+        api.neutron.servers_update_addresses(self.request, servers)
+
+        self.assertEqual(
+            ['10.0.0.4', '172.16.88.228'],
+            [address['addr'] for address in servers[0].addresses['net1']])
+        self.assertEqual(['floating'],
+                         [address['OS-EXT-IPS:type']
+                          for address in servers[0].addresses['net1']][1:])
+        self.assertEqual({'net2': [{'OS-EXT-IPS-MAC:mac_addr':
+                                        ports[1]['mac_address'],
+                                    'version': 4,
+                                    'addr': '172.16.88.3',
+                                    'OS-EXT-IPS:type': 'fixed'}]},
+                         servers[1].addresses)
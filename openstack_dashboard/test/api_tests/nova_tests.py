@@ -22,10 +22,13 @@
 from __future__ import absolute_import
 
 from django.conf import settings
+from django.core.cache import cache
 from django import http
 from django.test.utils import override_settings
 
+import mox
 from mox import IsA  # noqa
+from novaclient import exceptions as nova_exceptions
 from novaclient.v1_1 import servers
 
 from openstack_dashboard import api
@@ -177,6 +180,163 @@ class ComputeApiTests(test.APITestCase):
         self.assertEqual(page_size, len(ret_val))
         self.assertTrue(has_more)
 
+    @override_settings(CHANGES_SINCE_CACHE_TTL=60, API_RESULT_LIMIT=2)
+    def test_server_list_changes_since(self):
+        cache.clear()
+        project_servers = self.servers.list()
+        tenant_id = self.request.user.tenant_id
+        changed = dict(project_servers[0]._info, name='renamed')
+        deleted = dict(project_servers[1]._info, status='DELETED')
+        novaclient = self.stub_novaclient()
+        novaclient.servers = self.mox.CreateMockAnything()
+        novaclient.servers.resource_class = servers.Server
+        # Full listings follow the markers until nova returns nothing,
+        # even when it returns fewer servers than the limit.
+        novaclient.servers.list(True, {'project_id': tenant_id,
+                                       'limit': 2}) \
+            .AndReturn(project_servers[:1])
+        novaclient.servers.list(True, {'project_id': tenant_id,
+                                       'limit': 2,
+                                       'marker': project_servers[0].id}) \
+            .AndReturn(project_servers[1:])
+        novaclient.servers.list(True, {'project_id': tenant_id,
+                                       'limit': 2,
+                                       'marker': project_servers[-1].id}) \
+            .AndReturn([])
+        novaclient.servers.list(
+            True, mox.Func(lambda opts: 'changes-since' in opts and
+                           'marker' not in opts and
+                           opts['project_id'] == tenant_id)) \
+            .AndReturn([servers.Server(None, changed),
+                        servers.Server(None, deleted)])
+        novaclient.servers.list(
+            True, mox.Func(lambda opts: 'changes-since' in opts and
+                           opts.get('marker') == deleted['id'])) \
+            .AndReturn([])
+        self.mox.ReplayAll()
+
+        first, has_more = api.nova.server_list(self.request)
+        self.assertEqual(sorted(s.id for s in project_servers),
+                         sorted(s.id for s in first))
+        self.assertFalse(has_more)
+
+        # The second listing only fetches the changes and merges them.
+        second, has_more = api.nova.server_list(self.request)
+        ids = [s.id for s in second]
+        self.assertNotIn(deleted['id'], ids)
+        self.assertEqual(len(project_servers) - 1, len(ids))
+        self.assertEqual('renamed',
+                         [s for s in second if s.id == changed['id']][0].name)
+
+    @override_settings(CHANGES_SINCE_CACHE_TTL=60)
+    def test_server_update_invalidates_server_list(self):
+        cache.clear()
+        project_servers = self.servers.list()
+        server = project_servers[0]
+        tenant_id = self.request.user.tenant_id
+        limit = getattr(settings, 'API_RESULT_LIMIT', 1000)
+        novaclient = self.stub_novaclient()
+        novaclient.servers = self.mox.CreateMockAnything()
+        novaclient.servers.resource_class = servers.Server
+        for i in range(2):
+            novaclient.servers.list(True, {'project_id': tenant_id,
+                                           'limit': limit}) \
+                .AndReturn(project_servers)
+            novaclient.servers.list(True, {'project_id': tenant_id,
+                                           'limit': limit,
+                                           'marker': project_servers[-1].id}) \
+                .AndReturn([])
+            if not i:
+                novaclient.servers.update(server.id, name='renamed')
+        self.mox.ReplayAll()
+
+        api.nova.server_list(self.request)
+        api.nova.server_update(self.request, server.id, 'renamed')
+        # The snapshot was dropped, so the servers are listed in full.
+        api.nova.server_list(self.request)
+
+    def test_server_owned_by_tenant_is_cached(self):
+        cache.clear()
+        server = self.servers.first()
+        novaclient = self.stub_novaclient()
+        novaclient.servers = self.mox.CreateMockAnything()
+        novaclient.servers.get(server.id).AndReturn(server)
+        self.mox.ReplayAll()
+
+        self.assertTrue(api.nova.server_owned_by_tenant(self.request,
+                                                        server.id))
+        self.assertTrue(api.nova.server_owned_by_tenant(self.request,
+                                                        server.id))
+
+    def test_server_owned_by_other_tenant(self):
+        cache.clear()
+        server = self.servers.list()[2]
+        novaclient = self.stub_novaclient()
+        novaclient.servers = self.mox.CreateMockAnything()
+        novaclient.servers.get(server.id).AndReturn(server)
+        novaclient.servers.get('missing').AndRaise(
+            nova_exceptions.NotFound(404))
+        self.mox.ReplayAll()
+
+        self.assertFalse(api.nova.server_owned_by_tenant(self.request,
+                                                         server.id))
+        self.assertFalse(api.nova.server_owned_by_tenant(self.request,
+                                                         'missing'))
+
+    @override_settings(NOVA_FLAVOR_CACHE_TTL=60)
+    def test_flavor_get_many_is_cached(self):
+        cache.clear()
+        flavor = self.flavors.first()
+        novaclient = self.stub_novaclient()
+        novaclient.flavors = self.mox.CreateMockAnything()
+        novaclient.flavors.get(flavor.id).InAnyOrder().AndReturn(flavor)
+        novaclient.flavors.get('deleted').InAnyOrder().AndRaise(
+            nova_exceptions.NotFound(404))
+        self.mox.ReplayAll()
+
+        for i in range(2):
+            # Deleted flavors are cached as well, so the second call makes
+            # no request at all.
+            flavors = api.nova.flavor_get_many(self.request,
+                                               [flavor.id, 'deleted',
+                                                flavor.id])
+            self.assertEqual([flavor.id], flavors.keys())
+            self.assertEqual(flavor.name, flavors[flavor.id].name)
+
+    @override_settings(NOVA_FLAVOR_CACHE_TTL=60)
+    def test_flavor_get_many_cached_per_project(self):
+        cache.clear()
+        flavor = self.flavors.first()
+        novaclient = self.stub_novaclient()
+        novaclient.flavors = self.mox.CreateMockAnything()
+        novaclient.flavors.get(flavor.id).AndRaise(
+            nova_exceptions.NotFound(404))
+        novaclient.flavors.get(flavor.id).AndReturn(flavor)
+        self.mox.ReplayAll()
+
+        # A project without access to a private flavor does not hide it
+        # from the projects which have access.
+        self.assertEqual({}, api.nova.flavor_get_many(self.request,
+                                                      [flavor.id]))
+        self.request.user.tenant_id = 'other_project'
+        flavors = api.nova.flavor_get_many(self.request, [flavor.id])
+        self.assertEqual([flavor.id], flavors.keys())
+
+    @override_settings(NOVA_FLAVOR_CACHE_TTL=60)
+    def test_flavor_delete_invalidates_flavor_cache(self):
+        cache.clear()
+        flavor = self.flavors.first()
+        novaclient = self.stub_novaclient()
+        novaclient.flavors = self.mox.CreateMockAnything()
+        novaclient.flavors.get(flavor.id).AndReturn(flavor)
+        novaclient.flavors.delete(self.flavors.list()[1].id)
+        novaclient.flavors.get(flavor.id).AndReturn(flavor)
+        self.mox.ReplayAll()
+
+        api.nova.flavor_get_many(self.request, [flavor.id])
+        api.nova.flavor_delete(self.request, self.flavors.list()[1].id)
+        api.nova.flavor_get_many(self.request, [flavor.id])
+
     def test_usage_get(self):
         novaclient = self.stub_novaclient()
         novaclient.usage = self.mox.CreateMockAnything()
@@ -0,0 +1,246 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from openstack_dashboard.api import showback
+from openstack_dashboard.api import showback_rollup
+from openstack_dashboard.test.api_tests import jt_tests
+from openstack_dashboard.test import helpers as test
+
+
+class FakeAggregateCursor(jt_tests.FakeCursor):
+    def execute(self, query, data=()):
+        self.db.queries.append((query, data))
+        self._rows = list(self.db.rows)
+
+
+class FakeAggregateConnection(jt_tests.FakeConnection):
+    def cursor(self):
+        return FakeAggregateCursor(self)
+
+
+class ShowbackEngineTests(test.TestCase):
+    def test_nova_usage(self):
+        db = FakeAggregateConnection([('t1', 'm1.small', 2, 30, None),
+                                      ('t1', 'm1.large', 1, 5, None)])
+        engine = showback.ShowbackEngine(lambda name: db)
+
+        usage = engine.nova_usage(['t1', 't2'], '2014-01-01', '2014-02-01')
+        self.assertEqual(len(db.queries), 1)
+        query, params = db.queries[0]
+        self.assertIn('GROUP BY r.project_id, it.name', query)
+        start = datetime.datetime(2014, 1, 1)
+        end = datetime.datetime(2014, 2, 1)
+        self.assertEqual(params[:5], (start, end, end, end, start))
+        self.assertItemsEqual(params[5:], ('t1', 't2'))
+
+        self.assertEqual(usage['t1'].total_hours, 35)
+        self.assertEqual(usage['t1'].as_dict(),
+                         {'m1.small': {'count': 2, 'hours': 30},
+                          'm1.large': {'count': 1, 'hours': 5}})
+        self.assertEqual(usage['t2'].as_dict(), {})
+
+    def test_glance_usage_sizes(self):
+        db = FakeAggregateConnection([('t1', 'snap', 1, 10, 1.5),
+                                      ('t1', 'empty', 1, 3, None)])
+        engine = showback.ShowbackEngine(lambda name: db)
+
+        usage = engine.glance_usage(['t1'], '2014-01-01', '2014-02-01')
+        self.assertEqual(usage['t1'].as_dict(),
+                         {'snap': {'hours': 10, 'size': 1.5},
+                          'empty': {'hours': 3, 'size': 0}})
+
+
+class InMemoryEngine(showback.ShowbackEngine):
+    """Answers ``totals`` and ``usage`` from a list of (project, name,
+    created_at, deleted_at) resources the way the SQL queries do.
+    """
+
+    def __init__(self, resources):
+        super(InMemoryEngine, self).__init__(lambda name: None)
+        self.resources = resources
+
+    def _clipped(self, start, end, tenants):
+        for project, name, created, deleted in self.resources:
+            if (created < end and (deleted is None or deleted > start) and
+                    (tenants is None or project in tenants)):
+                yield (project, name, created, max(created, start),
+                       min(deleted or end, end))
+
+    def totals(self, category, start, end, tenants=None):
+        rows = {}
+        for project, name, created, begin, finish \
+                in self._clipped(start, end, tenants):
+            row = rows.setdefault((project, name), [0, 0, 0])
+            row[0] += 1
+            row[1] += created >= start
+            row[2] += int((finish - begin).total_seconds())
+        return [(project, name, overlap, new, seconds, None)
+                for (project, name), (overlap, new, seconds)
+                in rows.items()]
+
+    def usage(self, category, tenants, start, end):
+        lines = {}
+        for project, name, created, begin, finish \
+                in self._clipped(start, end, tenants):
+            line = lines.setdefault((project, name), [0, 0])
+            line[0] += 1
+            line[1] += int((finish - begin).total_seconds()) // 3600
+        results = dict((tenant, showback.ShowbackResult(tenant, category,
+                                                        start, end))
+                       for tenant in tenants)
+        for (project, name), (count, hours) in lines.items():
+            results[project].lines.append(
+                showback.ShowbackLine(name, count, hours, None))
+        return results
+
+
+class InMemoryRollup(showback_rollup.ShowbackRollup):
+    """Keeps the rollup rows and state in memory instead of the database."""
+
+    def __init__(self, engine):
+        super(InMemoryRollup, self).__init__(engine, lambda: None)
+        self.rows = {}
+        self.rolled = None
+
+    def rolled_days(self, category):
+        return self.rolled
+
+    def roll_up_day(self, category, day):
+        self.rows[day] = self.day_rows(category, day)
+        self.rolled = (min(day, (self.rolled or (day, day))[0]),
+                       max(day, (self.rolled or (day, day))[1]))
+        return len(self.rows[day])
+
+    def _sum_days(self, category, tenants, first_day, last_day):
+        totals = {}
+        for day, rows in self.rows.items():
+            if not first_day <= day <= last_day:
+                continue
+            for row in rows:
+                if row[0] not in tenants:
+                    continue
+                total = totals.setdefault((row[0], row[3] or None),
+                                          [0, 0, 0, None])
+                total[0] += row[4] if day == first_day else 0
+                total[1] += row[5]
+                total[2] += row[6]
+        return totals
+
+
+class ShowbackRollupTests(test.TestCase):
+    def setUp(self):
+        super(ShowbackRollupTests, self).setUp()
+        self.engine = showback.ShowbackEngine(lambda name: None)
+        self.rollup = showback_rollup.ShowbackRollup(self.engine,
+                                                     lambda: None)
+        self.mox.StubOutWithMock(self.rollup, 'rolled_days')
+        self.mox.StubOutWithMock(self.rollup, '_sum_days')
+        self.mox.StubOutWithMock(self.engine, 'totals')
+        self.mox.StubOutWithMock(self.engine, 'usage')
+
+    def test_usage_combines_days_and_edges(self):
+        start = datetime.datetime(2014, 1, 1, 12)
+        first = datetime.datetime(2014, 1, 2)
+        last = datetime.datetime(2014, 1, 4)
+        end = datetime.datetime(2014, 1, 4, 6)
+        self.rollup.rolled_days(showback.NOVA) \
+            .AndReturn((datetime.date(2013, 12, 1),
+                        datetime.date(2014, 1, 3)))
+        self.rollup._sum_days(showback.NOVA, ['t1'], first.date(),
+                              datetime.date(2014, 1, 3)) \
+            .AndReturn({('t1', 'm1.small'): [1, 2, 2 * 86400, None]})
+        self.engine.totals(showback.NOVA, start, first, ['t1']) \
+            .AndReturn([('t1', 'm1.small', 1, 0, 12 * 3600, None)])
+        self.engine.totals(showback.NOVA, last, end, ['t1']) \
+            .AndReturn([('t1', 'm1.small', 3, 0, 3 * 6 * 3600, None)])
+        self.mox.ReplayAll()
+
+        usage = self.rollup.usage(showback.NOVA, ['t1'], start, end)
+        self.assertEqual(usage['t1'].as_dict(),
+                         {'m1.small': {'count': 3, 'hours': 78}})
+
+    def test_usage_queries_raw_tables_outside_rolled_days(self):
+        start = datetime.datetime(2014, 1, 1)
+        first = datetime.datetime(2014, 1, 2)
+        last = datetime.datetime(2014, 1, 3)
+        end = datetime.datetime(2014, 1, 5)
+        # Only the 2nd was rolled up: the 1st, and the 3rd and 4th, come
+        # from the raw tables.
+        self.rollup.rolled_days(showback.CINDER) \
+            .AndReturn((first.date(), first.date()))
+        self.rollup._sum_days(showback.CINDER, ['t1'], first.date(),
+                              first.date()) \
+            .AndReturn({('t1', 'vol'): [1, 0, 86400, 10]})
+        self.engine.totals(showback.CINDER, start, first, ['t1']) \
+            .AndReturn([('t1', 'vol', 1, 1, 86400, 10)])
+        self.engine.totals(showback.CINDER, last, end, ['t1']) \
+            .AndReturn([('t1', 'vol', 1, 0, 2 * 86400, 10)])
+        self.mox.ReplayAll()
+
+        usage = self.rollup.usage(showback.CINDER, ['t1'], start, end)
+        self.assertEqual(usage['t1'].as_dict(),
+                         {'vol': {'count': 1, 'hours': 96, 'size': 10}})
+
+    def test_usage_falls_back_until_rolled_up(self):
+        start = datetime.datetime(2014, 1, 1)
+        end = datetime.datetime(2014, 1, 5)
+        self.rollup.rolled_days(showback.CINDER).AndReturn(None)
+        self.engine.usage(showback.CINDER, ['t1'], start, end) \
+            .AndReturn({'t1': 'raw'})
+        self.rollup.rolled_days(showback.CINDER) \
+            .AndReturn((datetime.date(2014, 2, 1),
+                        datetime.date(2014, 2, 2)))
+        self.engine.usage(showback.CINDER, ['t1'], start, end) \
+            .AndReturn({'t1': 'raw'})
+        self.mox.ReplayAll()
+
+        for i in range(2):
+            self.assertEqual(
+                self.rollup.usage(showback.CINDER, ['t1'], start, end),
+                {'t1': 'raw'})
+
+
+class ShowbackRollupEquivalenceTests(test.TestCase):
+    def test_usage_matches_engine(self):
+        day = datetime.datetime(2014, 1, 1)
+        hour = datetime.timedelta(hours=1)
+        # Whole hours only: the rollup rounds each name's total seconds,
+        # the engine each resource's.
+        engine = InMemoryEngine([
+            ('t1', 'm1.small', day - 48 * hour, None),
+            ('t1', 'm1.small', day + 5 * hour, day + 30 * hour),
+            ('t1', 'm1.large', day + 26 * hour, day + 100 * hour),
+            ('t1', 'm1.large', day + 70 * hour, None),
+            ('t2', 'm1.small', day - 3 * hour, day + 2 * hour),
+            ('t2', 'm1.tiny', day + 95 * hour, day + 97 * hour),
+            ('t3', 'm1.small', day, None)])
+        rollup = InMemoryRollup(engine)
+        rollup.refresh(showback.NOVA, datetime.date(2014, 1, 2),
+                       datetime.date(2014, 1, 4))
+
+        tenants = ['t1', 't2', 't3']
+        windows = [(day, day + 120 * hour),
+                   (day + 3 * hour, day + 90 * hour),
+                   (day + 24 * hour, day + 72 * hour),
+                   (day + 30 * hour, day + 50 * hour),
+                   (day + 50 * hour, day + 110 * hour)]
+        for start, end in windows:
+            expected = engine.usage(showback.NOVA, tenants, start, end)
+            usage = rollup.usage(showback.NOVA, tenants, start, end)
+            for tenant in tenants:
+                self.assertEqual(expected[tenant].as_dict(),
+                                 usage[tenant].as_dict(),
+                                 "%s over %s - %s" % (tenant, start, end))
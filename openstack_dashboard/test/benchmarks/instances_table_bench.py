@@ -0,0 +1,112 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Times rendering the rows of the project ``InstancesTable`` for 1k and 10k
+synthetic servers, with ``api.nova.Server`` resolving its attributes
+through the class level attribute set and through the former per access
+``__getattribute__`` override. Row and table actions are left out since
+they call out to the services.
+
+    $ python -m openstack_dashboard.test.benchmarks.instances_table_bench
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openstack_dashboard.settings")
+
+from django.test import client
+
+from openstack_dashboard.api import nova
+from openstack_dashboard.dashboards.project.instances import tables
+
+
+class LegacyServer(nova.Server):
+    """``Server`` with the former attribute lookup."""
+
+    def __getattribute__(self, attr):
+        try:
+            return object.__getattribute__(self, attr)
+        except AttributeError:
+            if attr not in self._attrs:
+                raise
+            return getattr(self._apiresource, attr)
+
+
+class BenchInstancesTable(tables.InstancesTable):
+    class Meta:
+        name = "instances"
+        status_columns = ["status", "task"]
+        row_class = tables.UpdateRow
+        table_actions = ()
+        row_actions = ()
+
+
+class FakeFlavor(object):
+    name = 'm1.small'
+    ram = 2048
+    vcpus = 1
+    disk = 20
+
+
+class FakeServer(object):
+    def __init__(self, index):
+        self.id = 'server-%d' % index
+        self.name = 'instance-%d' % index
+        self.status = 'ACTIVE'
+        self.image = {'id': 'image', 'name': 'cirros'}
+        self.flavor = {'id': '1'}
+        self.key_name = 'keypair'
+        self.tenant_id = 'tenant'
+        self.addresses = {'private': [{'addr': '10.0.%d.%d'
+                                       % (index // 256 % 256, index % 256),
+                                       'version': 4,
+                                       'OS-EXT-IPS:type': 'fixed'}]}
+        setattr(self, 'OS-EXT-STS:power_state', 1)
+        setattr(self, 'OS-EXT-STS:task_state', None)
+        setattr(self, 'OS-EXT-AZ:availability_zone', 'nova')
+
+
+def render_rows(request, server_class, count):
+    servers = []
+    for i in range(count):
+        server = server_class(FakeServer(i), request)
+        server.full_flavor = FakeFlavor
+        servers.append(server)
+
+    began = time.time()
+    table = BenchInstancesTable(request, data=servers)
+    for row in table.get_rows():
+        row.render()
+    return time.time() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[1000, 10000])
+    args = parser.parse_args()
+
+    request = client.RequestFactory().get('/project/instances/')
+    for count in args.rows:
+        legacy = render_rows(request, LegacyServer, count)
+        current = render_rows(request, nova.Server, count)
+        print("%6d rows: legacy %.3fs, current %.3fs"
+              % (count, legacy, current))
+
+
+if __name__ == '__main__':
+    main()
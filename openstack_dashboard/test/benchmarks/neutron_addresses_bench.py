@@ -0,0 +1,152 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Times ``api.neutron.servers_update_addresses`` for an admin page of 1000
+instances against a fake neutronclient, which sleeps for a fixed latency
+plus a per-id cost on every list call and records the longest query string
+it was sent. The former single-query, serial pipeline is timed alongside.
+
+    $ python -m openstack_dashboard.test.benchmarks.neutron_addresses_bench
+"""
+
+import argparse
+import collections
+import os
+import threading
+import time
+import urllib
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openstack_dashboard.settings")
+
+import netaddr
+
+from openstack_dashboard.api import neutron
+
+
+class FakeNeutronClient(object):
+    def __init__(self, servers, networks, latency, per_id):
+        self.latency = latency
+        self.per_id = per_id
+        self.longest_query = 0
+        self.lock = threading.Lock()
+        self.ports = []
+        self.floating_ips = []
+        self.networks = [{'id': 'net-%d' % i, 'name': 'network-%d' % i}
+                         for i in range(networks)]
+        for i, server in enumerate(servers):
+            port = {'id': 'port-%d' % i,
+                    'device_id': server.id,
+                    'network_id': 'net-%d' % (i % networks),
+                    'mac_address': 'fa:16:3e:00:%02x:%02x' % (i // 256 % 256,
+                                                              i % 256),
+                    'fixed_ips': [{'ip_address': '10.%d.%d.%d'
+                                   % (i // 65536 % 256, i // 256 % 256,
+                                      i % 256)}]}
+            self.ports.append(port)
+            if i % 4 == 0:
+                self.floating_ips.append(
+                    {'port_id': port['id'],
+                     'floating_ip_address': '172.24.%d.%d'
+                                            % (i // 256 % 256, i % 256)})
+
+    def _call(self, ids, params):
+        query = urllib.urlencode(params, doseq=True)
+        with self.lock:
+            self.longest_query = max(self.longest_query, len(query))
+        time.sleep(self.latency + self.per_id * len(ids))
+        return set(ids)
+
+    def list_ports(self, **params):
+        ids = self._call(params.get('device_id', []), params)
+        return {'ports': [p for p in self.ports if p['device_id'] in ids]}
+
+    def list_floatingips(self, **params):
+        ids = self._call(params.get('port_id', []), params)
+        return {'floatingips': [f for f in self.floating_ips
+                                if f['port_id'] in ids]}
+
+    def list_networks(self, **params):
+        ids = self._call(params.get('id', []), params)
+        return {'networks': [n for n in self.networks if n['id'] in ids]}
+
+
+class FakeServer(object):
+    def __init__(self, index):
+        self.id = 'a0b1c2d3-0000-4000-8000-%012d' % index
+        self.addresses = {}
+
+
+class FakeRequest(object):
+    class user(object):
+        tenant_id = 'admin'
+
+
+def legacy_update_addresses(client, servers):
+    """The former pipeline: unchunked id filters, one call at a time."""
+    ports = client.list_ports(
+        device_id=[server.id for server in servers])['ports']
+    floating_ips = client.list_floatingips(
+        tenant_id='admin', port_id=[port['id'] for port in ports])
+    networks = client.list_networks(
+        id=[port['network_id'] for port in ports])['networks']
+    names = dict((network['id'], network['name']) for network in networks)
+    fips = collections.defaultdict(list)
+    for fip in floating_ips['floatingips']:
+        fips[fip['port_id']].append(fip)
+    server_ports = collections.defaultdict(list)
+    for port in ports:
+        server_ports[port['device_id']].append(port)
+    for server in servers:
+        addresses = collections.defaultdict(list)
+        for port in server_ports[server.id]:
+            name = names[port['network_id']]
+            for ip in ([f['ip_address'] for f in port['fixed_ips']] +
+                       [f['floating_ip_address'] for f in fips[port['id']]]):
+                addresses[name].append({
+                    'version': netaddr.IPAddress(ip).version, 'addr': ip})
+        server.addresses = dict(addresses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--servers', type=int, default=1000)
+    parser.add_argument('--networks', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Seconds per neutron call.')
+    parser.add_argument('--per-id', type=float, default=0.0002,
+                        help='Additional seconds per filtered id.')
+    args = parser.parse_args()
+
+    servers = [FakeServer(i) for i in range(args.servers)]
+
+    client = FakeNeutronClient(servers, args.networks, args.latency,
+                               args.per_id)
+    began = time.time()
+    legacy_update_addresses(client, servers)
+    print("legacy:  %.3fs, longest query string %d bytes"
+          % (time.time() - began, client.longest_query))
+
+    client = FakeNeutronClient(servers, args.networks, args.latency,
+                               args.per_id)
+    neutron.neutronclient = lambda request: client
+    for run in ('cold', 'warm'):
+        began = time.time()
+        neutron.servers_update_addresses(FakeRequest, servers)
+        print("chunked (%s network names): %.3fs, longest query string "
+              "%d bytes" % (run, time.time() - began, client.longest_query))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Times ``usage.quotas.get_tenant_quota_data`` for many tenants (1000 by
+default), followed by a lookup of every quota field as the admin quota
+pages do, with the indexed ``QuotaSet`` and with the former list scanning
+one. The nova and cinder calls are replaced by in-memory fakes.
+
+    $ python -m openstack_dashboard.test.benchmarks.quota_bench
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openstack_dashboard.settings")
+
+from openstack_dashboard.api import base
+from openstack_dashboard.api import cinder
+from openstack_dashboard.api import nova
+from openstack_dashboard.usage import quotas
+
+
+class ListQuotaSet(base.QuotaSet):
+    """The former ``QuotaSet``: every lookup scans all of the quotas."""
+
+    def _set(self, quota):
+        self.items.append(quota)
+
+    def get(self, key, default=None):
+        match = [quota for quota in self.items if quota.name == key]
+        return match.pop() if len(match) else base.Quota(key, default)
+
+
+class FakeRequest(object):
+    class user(object):
+        tenant_id = None
+
+
+def fake_quota_get(fields, extra):
+    limits = dict((field, 10) for field in fields)
+    limits.update(('custom_%d' % i, i) for i in range(extra))
+
+    def tenant_quota_get(request, tenant_id):
+        return base.QuotaSet(limits)
+    return tenant_quota_get
+
+
+def run(quota_set_class, tenants, disabled):
+    real_quota_set = base.QuotaSet
+    base.QuotaSet = quota_set_class
+    try:
+        began = time.time()
+        for tenant in tenants:
+            qs = quotas.get_tenant_quota_data(FakeRequest,
+                                              disabled_quotas=disabled,
+                                              tenant_id=tenant)
+            for field in quotas.QUOTA_FIELDS:
+                qs.get(field)
+        return time.time() - began
+    finally:
+        base.QuotaSet = real_quota_set
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--extra-quotas', type=int, default=50,
+                        help='Additional quotas per service, e.g. for '
+                             'flavor or volume type specific limits.')
+    args = parser.parse_args()
+
+    nova.tenant_quota_get = fake_quota_get(quotas.NOVA_QUOTA_FIELDS,
+                                           args.extra_quotas)
+    cinder.tenant_quota_get = fake_quota_get(quotas.CINDER_QUOTA_FIELDS,
+                                             args.extra_quotas)
+    tenants = ['tenant-%d' % i for i in range(args.tenants)]
+    # Only nova and cinder quotas, so no neutron call is made.
+    disabled = list(quotas.NEUTRON_QUOTA_FIELDS)
+
+    list_seconds = run(ListQuotaSet, tenants, disabled)
+    indexed_seconds = run(base.QuotaSet, tenants, disabled)
+
+    print("list QuotaSet, %d tenants:    %.3fs" % (len(tenants),
+                                                  list_seconds))
+    print("indexed QuotaSet, %d tenants: %.3fs" % (len(tenants),
+                                                  indexed_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Compares the row-by-row nova showback computation with the SQL aggregated
+``ShowbackEngine`` on a synthetic ``instances`` table (1M rows by default).
+
+    $ python -m openstack_dashboard.test.benchmarks.showback_bench \\
+          --host localhost --user root --password secret --database bench
+"""
+
+import argparse
+import datetime
+import os
+import random
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openstack_dashboard.settings")
+
+import mysql.connector
+
+from openstack_dashboard.api import showback
+
+
+FLAVORS = ['m1.tiny', 'm1.small', 'm1.medium', 'm1.large', 'm1.xlarge']
+INSERT_BATCH = 10000
+
+
+class BenchEngine(showback.ShowbackEngine):
+    instances_table = 'bench_instances'
+    instance_types_table = 'bench_instance_types'
+
+
+def create_tables(conn, rows, tenants):
+    c = conn.cursor()
+    c.execute("DROP TABLE IF EXISTS bench_instances")
+    c.execute("DROP TABLE IF EXISTS bench_instance_types")
+    c.execute("CREATE TABLE bench_instance_types "
+              "(id INT PRIMARY KEY, name VARCHAR(255))")
+    c.execute("CREATE TABLE bench_instances "
+              "(id INT AUTO_INCREMENT PRIMARY KEY, "
+              "project_id VARCHAR(255), instance_type_id INT, "
+              "created_at DATETIME, deleted_at DATETIME NULL, "
+              "INDEX (project_id, created_at))")
+    c.executemany("INSERT INTO bench_instance_types VALUES (%s, %s)",
+                  list(enumerate(FLAVORS)))
+
+    rand = random.Random(42)
+    origin = datetime.datetime(2013, 1, 1)
+    batch = []
+    for i in range(rows):
+        created = origin + datetime.timedelta(hours=rand.randint(0, 17520))
+        deleted = None
+        if rand.random() < 0.8:
+            deleted = created + datetime.timedelta(
+                hours=rand.randint(1, 2000))
+        batch.append(('tenant-%d' % rand.randint(0, tenants - 1),
+                      rand.randint(0, len(FLAVORS) - 1), created, deleted))
+        if len(batch) == INSERT_BATCH:
+            c.executemany("INSERT INTO bench_instances (project_id, "
+                          "instance_type_id, created_at, deleted_at) "
+                          "VALUES (%s, %s, %s, %s)", batch)
+            batch = []
+    if batch:
+        c.executemany("INSERT INTO bench_instances (project_id, "
+                      "instance_type_id, created_at, deleted_at) "
+                      "VALUES (%s, %s, %s, %s)", batch)
+    conn.commit()
+
+
+def legacy_nova_usage(conn, tenant, start, end):
+    """The previous row-by-row algorithm, with the window clipped."""
+    c = conn.cursor()
+    c.execute("SELECT i.created_at, i.deleted_at, it.name "
+              "FROM bench_instances AS i "
+              "LEFT JOIN bench_instance_types AS it "
+              "ON i.instance_type_id = it.id "
+              "WHERE i.project_id = %s AND i.created_at < %s "
+              "AND (i.deleted_at > %s OR i.deleted_at IS NULL)",
+              (tenant, end, start))
+    usage = {}
+    for created_at, deleted_at, flavor in c.fetchall():
+        row_end = min(deleted_at or end, end)
+        hours = int((row_end - max(created_at, start)).total_seconds() /
+                    3600)
+        entry = usage.setdefault(flavor, {'count': 0, 'hours': 0})
+        entry['count'] += 1
+        entry['hours'] += hours
+    return usage
+
+
+def timed(func, *args):
+    began = time.time()
+    result = func(*args)
+    return result, time.time() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--skip-load', action='store_true',
+                        help='reuse the tables of a previous run')
+    args = parser.parse_args()
+
+    def connect(db=None):
+        return mysql.connector.connect(host=args.host, user=args.user,
+                                       passwd=args.password,
+                                       db=args.database)
+
+    if not args.skip_load:
+        conn = connect()
+        _, seconds = timed(create_tables, conn, args.rows, args.tenants)
+        conn.close()
+        print("Loaded %d rows in %.1fs" % (args.rows, seconds))
+
+    start = datetime.datetime(2014, 1, 1)
+    end = datetime.datetime(2014, 2, 1)
+    tenants = ['tenant-%d' % i for i in range(args.tenants)]
+    engine = BenchEngine(connect)
+
+    conn = connect()
+    legacy = {}
+    began = time.time()
+    for tenant in tenants:
+        legacy[tenant] = legacy_nova_usage(conn, tenant, start, end)
+    legacy_seconds = time.time() - began
+    conn.close()
+
+    single, single_seconds = timed(engine.nova_usage, tenants[:1],
+                                   start, end)
+    batch, batch_seconds = timed(engine.nova_usage, tenants, start, end)
+
+    for tenant in tenants:
+        if batch[tenant].as_dict() != legacy[tenant]:
+            print("MISMATCH for %s" % tenant)
+
+    print("row-by-row, %d tenants:    %.3fs" % (len(tenants),
+                                                legacy_seconds))
+    print("engine, 1 tenant:          %.3fs" % single_seconds)
+    print("engine, %d tenants batch: %.3fs" % (len(tenants),
+                                               batch_seconds))
+
+
+if __name__ == '__main__':
+    main()
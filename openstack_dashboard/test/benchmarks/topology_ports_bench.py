@@ -0,0 +1,148 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Times listing the ports of one project's network topology as an admin,
+against a fake neutronclient holding 20k ports (by default) spread over
+many projects. The fake sleeps for a fixed latency plus a per-port cost
+on every list call and counts the bytes of the JSON it answers with. The
+former unscoped ``port_list`` is timed alongside
+``port_list_for_topology``.
+
+    $ python -m openstack_dashboard.test.benchmarks.topology_ports_bench
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "openstack_dashboard.settings")
+
+from openstack_dashboard.api import neutron
+
+
+class FakeNeutronClient(object):
+    def __init__(self, ports, tenants, networks_per_tenant, latency,
+                 per_port):
+        self.latency = latency
+        self.per_port = per_port
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.bytes = 0
+        self.ports = []
+        networks = tenants * networks_per_tenant
+        for i in range(ports):
+            network = i % networks
+            owner = ('network:router_interface' if i % 50 == 0
+                     else 'network:dhcp' if i % 50 == 1
+                     else 'compute:nova')
+            self.ports.append({
+                'id': 'port-%d' % i,
+                'tenant_id': 'tenant-%d' % (network % tenants),
+                'network_id': 'net-%d' % network,
+                'device_id': 'device-%d' % (i // 2),
+                'device_owner': owner,
+                'name': '',
+                'mac_address': 'fa:16:3e:%02x:%02x:%02x'
+                               % (i // 65536 % 256, i // 256 % 256, i % 256),
+                'fixed_ips': [{'subnet_id': 'subnet-%d' % network,
+                               'ip_address': '10.%d.%d.%d'
+                                             % (i // 65536 % 256,
+                                                i // 256 % 256, i % 256)}],
+                'binding:vnic_type': 'normal',
+                'security_groups': ['default'],
+                'status': 'ACTIVE',
+                'admin_state_up': True})
+        # Each project has a router with a gateway on the external network.
+        for t in range(tenants):
+            self.ports.append({
+                'id': 'gateway-port-%d' % t,
+                'tenant_id': '',
+                'network_id': 'external',
+                'device_id': 'router-%d' % t,
+                'device_owner': 'network:router_gateway',
+                'name': '',
+                'mac_address': 'fa:16:3f:00:%02x:%02x' % (t // 256, t % 256),
+                'fixed_ips': [{'subnet_id': 'external-subnet',
+                               'ip_address': '172.24.%d.%d'
+                                             % (t // 256 % 256, t % 256)}],
+                'binding:vnic_type': 'normal',
+                'security_groups': [],
+                'status': 'ACTIVE',
+                'admin_state_up': True})
+
+    def list_ports(self, **params):
+        fields = params.pop('fields', None)
+        ports = self.ports
+        for name, value in params.items():
+            values = set(value if isinstance(value, list) else [value])
+            ports = [port for port in ports if port[name] in values]
+        if fields:
+            ports = [dict((field, port[field]) for field in fields)
+                     for port in ports]
+        size = len(json.dumps({'ports': ports}))
+        with self.lock:
+            self.calls += 1
+            self.bytes += size
+        time.sleep(self.latency + self.per_port * len(ports))
+        return {'ports': ports}
+
+
+class FakeRequest(object):
+    class user(object):
+        tenant_id = 'tenant-0'
+
+
+def run(label, client, list_ports):
+    began = time.time()
+    ports = list_ports()
+    print("%s: %.3fs, %d ports, %d calls, %d bytes received"
+          % (label, time.time() - began, len(ports), client.calls,
+             client.bytes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--ports', type=int, default=20000)
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--networks-per-tenant', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Seconds per neutron call.')
+    parser.add_argument('--per-port', type=float, default=0.00005,
+                        help='Additional seconds per returned port.')
+    args = parser.parse_args()
+
+    def make_client():
+        client = FakeNeutronClient(args.ports, args.tenants,
+                                   args.networks_per_tenant, args.latency,
+                                   args.per_port)
+        neutron.neutronclient = lambda request: client
+        return client
+
+    client = make_client()
+    run("unscoped port_list", client,
+        lambda: neutron.port_list(FakeRequest))
+
+    client = make_client()
+    network_ids = ['net-%d' % (n * args.tenants)
+                   for n in range(args.networks_per_tenant)] + ['external']
+    run("port_list_for_topology", client,
+        lambda: neutron.port_list_for_topology(FakeRequest, network_ids,
+                                               ['router-0']))
+
+
+if __name__ == '__main__':
+    main()
@@ -218,3 +218,28 @@ FLAVOR_EXTRA_KEYS = {
 
 # The openstack_auth.user.Token object isn't JSON-serializable ATM
 SESSION_SERIALIZER = 'django.contrib.sessions.serializers.PickleSerializer'
+
+# Most tests stub the calls behind usage.quotas.tenant_quota_usages, so its
+# cross-request cache must not leak results between them.
+QUOTA_USAGES_CACHE_TTL = 0
+
+# Tests stub glance.image_get, so image names must not be cached across them.
+IMAGE_NAME_CACHE_TTL = 0
+
+# Tests stub the nova flavor calls, so flavors must not be cached across them.
+NOVA_FLAVOR_CACHE_TTL = 0
+
+# Tests stub the neutron network listing, so network names must not be
+# cached across them.
+NEUTRON_NETWORK_NAME_CACHE_TTL = 0
+
+# Tests share one token id while changing its service catalog, so catalog
+# indexes must not be shared across them.
+SERVICE_CATALOG_INDEX_CACHE_SIZE = 0
+
+# Tests stub the extension listings, so they must not be cached across them.
+EXTENSION_CACHE_TTL = 0
+
+# Tests stub the nova and cinder listings call by call, so listings must not
+# be kept in changes-since snapshots across them.
+CHANGES_SINCE_CACHE_TTL = 0
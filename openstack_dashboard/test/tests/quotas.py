@@ -21,6 +21,7 @@
 
 from __future__ import absolute_import
 
+from django.core.cache import cache
 from django import http
 from mox import IsA  # noqa
 
@@ -198,3 +199,28 @@ class QuotaTests(test.APITestCase):
 
         # Compare internal structure of usages to expected.
         self.assertEqual(quota_usages.usages, expected_output)
+
+    def test_tenant_quota_usages_cached_until_invalidated(self):
+        computed = []
+
+        def tenant_quota_usages(request):
+            computed.append(request)
+            return quotas.QuotaUsage()
+
+        self.mox.stubs.Set(quotas, '_tenant_quota_usages',
+                           tenant_quota_usages)
+
+        def new_request():
+            request = http.HttpRequest()
+            request.user = self.request.user
+            return request
+
+        cache.clear()
+        with self.settings(QUOTA_USAGES_CACHE_TTL=10):
+            quotas.tenant_quota_usages(new_request())
+            quotas.tenant_quota_usages(new_request())
+            self.assertEqual(len(computed), 1)
+
+            api.base.invalidate_quota_usages(self.request)
+            quotas.tenant_quota_usages(new_request())
+            self.assertEqual(len(computed), 2)
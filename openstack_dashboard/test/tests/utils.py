@@ -15,9 +15,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+import threading
 import uuid
 
 from openstack_dashboard.test import helpers as test
+from openstack_dashboard.utils import concurrency
 from openstack_dashboard.utils import filters
 
 
@@ -40,3 +43,73 @@ class UtilsFilterTests(test.TestCase):
     def test_reject_random_string(self):
         val = '55WbJTpJDf'
         self.assertRaises(ValueError, filters.get_int_or_uuid, val)
+
+
+class WorkerPoolTests(test.TestCase):
+    def test_run_collects_results_and_errors(self):
+        def fail():
+            raise ValueError('boom')
+
+        pool = concurrency.WorkerPool(2)
+        outcome = pool.run({'a': lambda: 1, 'b': lambda: 2, 'c': fail})
+        self.assertEqual(outcome.results, {'a': 1, 'b': 2})
+        self.assertEqual(outcome.errors['c'][0], ValueError)
+        self.assertFalse(outcome.pending)
+        self.assertFalse(outcome.complete)
+
+    def test_run_returns_partial_results_at_deadline(self):
+        release = threading.Event()
+        pool = concurrency.WorkerPool(1)
+        outcome = pool.run({'a': lambda: 1, 'b': release.wait},
+                           timeout=0.1)
+        release.set()
+        self.assertIn('b', outcome.pending)
+        self.assertNotIn('b', outcome.results)
+
+    def test_queues_take_turns(self):
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+
+        def block():
+            started.set()
+            release.wait()
+
+        pool = concurrency.WorkerPool(1)
+        first = pool.queue()
+        second = pool.queue()
+        first.submit(block)
+        started.wait(1)
+        tasks = [first.submit(functools.partial(order.append, 'first'))
+                 for i in range(3)]
+        tasks.append(second.submit(functools.partial(order.append,
+                                                     'second')))
+        release.set()
+        for task in tasks:
+            self.assertTrue(task.wait(1))
+        # The call queued by the second request does not wait for all of
+        # the first request's calls.
+        self.assertEqual(order, ['first', 'second', 'first', 'first'])
+
+
+class ParallelFetchTests(test.TestCase):
+    def test_get_isolates_errors(self):
+        def fail(request):
+            raise ValueError('boom')
+
+        fetch = concurrency.ParallelFetch(self.request)
+        fetch.add('ok', lambda request, value: (request, value), args=(1,))
+        fetch.add('fail', fail)
+        self.assertEqual(fetch.get('ok'), (self.request, 1))
+        self.assertRaises(ValueError, fetch.get, 'fail')
+        self.assertIn('ok', fetch)
+        self.assertNotIn('missing', fetch)
+
+    def test_get_times_out(self):
+        release = threading.Event()
+        fetch = concurrency.ParallelFetch(self.request)
+        fetch.add('slow', lambda request: release.wait(), timeout=0.1)
+        try:
+            self.assertRaises(concurrency.FetchTimeout, fetch.get, 'slow')
+        finally:
+            release.set()
@@ -11,9 +11,12 @@
 # under the License.
 
 from collections import defaultdict
+import functools
 import itertools
 import logging
 
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import ugettext_lazy as _
 
 from horizon import exceptions
@@ -24,6 +27,7 @@ from openstack_dashboard.api import cinder
 from openstack_dashboard.api import network
 from openstack_dashboard.api import neutron
 from openstack_dashboard.api import nova
+from openstack_dashboard.utils import concurrency
 
 
 LOG = logging.getLogger(__name__)
@@ -189,40 +193,59 @@ def get_disabled_quotas(request):
     return disabled_quotas
 
 
-@memoized
-def tenant_quota_usages(request):
+def _get_flavors(request, flavor_ids):
+    """Fetches flavors missing from the flavor list (e.g. deleted ones).
+    Flavors which cannot be fetched map to ``{}``.
+    """
+    flavors = {}
+    if flavor_ids:
+        try:
+            flavors = nova.flavor_get_many(request, flavor_ids)
+        except Exception:
+            exceptions.handle(request, ignore=True)
+    return dict((flavor_id, flavors.get(flavor_id, {}))
+                for flavor_id in flavor_ids)
+
+
+def _tenant_quota_usages(request):
     # Get our quotas and construct our usage object.
     disabled_quotas = get_disabled_quotas(request)
 
+    # The quotas and usages come from independent services, so fetch
+    # them all at once.
+    calls = {
+        'quotas': functools.partial(get_tenant_quota_data, request,
+                                    disabled_quotas=disabled_quotas),
+        'floating_ips': functools.partial(network.tenant_floating_ip_list,
+                                          request),
+        'flavors': functools.partial(nova.flavor_list, request),
+        'instances': functools.partial(nova.server_list, request),
+    }
+    if 'volumes' not in disabled_quotas:
+        calls['volumes'] = functools.partial(cinder.volume_list, request)
+        calls['snapshots'] = functools.partial(cinder.volume_snapshot_list,
+                                               request)
+    results = concurrency.parallel(calls)
+
     usages = QuotaUsage()
-    for quota in get_tenant_quota_data(request,
-                                       disabled_quotas=disabled_quotas):
+    for quota in results['quotas']:
         usages.add_quota(quota)
 
-    # Get our usages.
-    floating_ips = network.tenant_floating_ip_list(request)
-    flavors = dict([(f.id, f) for f in nova.flavor_list(request)])
-    instances, has_more = nova.server_list(request)
+    flavors = dict([(f.id, f) for f in results['flavors']])
+    instances, has_more = results['instances']
     # Fetch deleted flavors if necessary.
-    missing_flavors = [instance.flavor['id'] for instance in instances
-                       if instance.flavor['id'] not in flavors]
-    for missing in missing_flavors:
-        if missing not in flavors:
-            try:
-                flavors[missing] = nova.flavor_get(request, missing)
-            except Exception:
-                flavors[missing] = {}
-                exceptions.handle(request, ignore=True)
+    missing_flavors = set(instance.flavor['id'] for instance in instances
+                          if instance.flavor['id'] not in flavors)
+    flavors.update(_get_flavors(request, missing_flavors))
 
     usages.tally('instances', len(instances))
-    usages.tally('floating_ips', len(floating_ips))
+    usages.tally('floating_ips', len(results['floating_ips']))
 
     if 'volumes' not in disabled_quotas:
-        volumes = cinder.volume_list(request)
-        snapshots = cinder.volume_snapshot_list(request)
+        volumes = results['volumes']
         usages.tally('gigabytes', sum([int(v.size) for v in volumes]))
         usages.tally('volumes', len(volumes))
-        usages.tally('snapshots', len(snapshots))
+        usages.tally('snapshots', len(results['snapshots']))
 
     # Sum our usage based on the flavors of the instances.
     for flavor in [flavors[instance.flavor['id']] for instance in instances]:
@@ -237,6 +260,26 @@ def tenant_quota_usages(request):
     return usages
 
 
+@memoized
+def tenant_quota_usages(request):
+    """Returns the ``QuotaUsage`` of the current project.
+
+    The result is cached per project for ``QUOTA_USAGES_CACHE_TTL``
+    seconds (0 disables the cache); the API calls which change usage or
+    limits drop it through ``api.base.invalidate_quota_usages``.
+    """
+    timeout = getattr(settings, 'QUOTA_USAGES_CACHE_TTL', 10)
+    if not timeout:
+        return _tenant_quota_usages(request)
+
+    key = base.quota_usages_cache_key(request.user.tenant_id)
+    usages = cache.get(key)
+    if usages is None:
+        usages = _tenant_quota_usages(request)
+        cache.set(key, usages, timeout)
+    return usages
+
+
 def tenant_limit_usages(request):
     #TODO(licostan): This method shall be removed from Quota module.
     #ProjectUsage/BaseUsage maybe used instead on volume/image dashboards.
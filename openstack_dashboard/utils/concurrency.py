@@ -0,0 +1,312 @@
+# vim: tabstop=4 shiftwidth=4 softtabstop=4
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Helpers for running independent backend calls concurrently.
+"""
+
+import collections
+import functools
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from horizon import exceptions
+
+
+class _Call(threading.Thread):
+    def __init__(self, func):
+        super(_Call, self).__init__()
+        self.daemon = True
+        self.func = func
+        self.result = None
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.result = self.func()
+        except Exception:
+            self.exc_info = sys.exc_info()
+
+
+def parallel(calls):
+    """Runs every callable in the ``calls`` dict in its own thread.
+
+    Returns a dict mapping the same keys to the return values, once all of
+    the calls have finished. If a call raised, the first exception (in key
+    order) is re-raised in the calling thread.
+    """
+    threads = dict((key, _Call(func)) for key, func in calls.items())
+    for thread in threads.values():
+        thread.start()
+    for thread in threads.values():
+        thread.join()
+
+    results = {}
+    for key in sorted(threads):
+        thread = threads[key]
+        if thread.exc_info:
+            raise thread.exc_info[0], thread.exc_info[1], thread.exc_info[2]
+        results[key] = thread.result
+    return results
+
+
+class BatchResult(object):
+    """Outcome of ``WorkerPool.run``.
+
+    ``results`` maps the key of every call that returned to its value,
+    ``errors`` maps the key of every call that raised to its
+    ``sys.exc_info()``, and ``pending`` holds the keys of the calls that
+    had not finished by the deadline.
+    """
+
+    def __init__(self, keys):
+        self.results = {}
+        self.errors = {}
+        self.pending = set(keys)
+
+    @property
+    def complete(self):
+        return not self.errors and not self.pending
+
+
+class _Batch(object):
+    def __init__(self, keys):
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.expired = False
+        self.result = BatchResult(keys)
+        if not keys:
+            self.done.set()
+
+    def run(self, key, func):
+        # Calls still queued when the deadline passed are skipped.
+        if self.expired:
+            return
+        value = exc_info = None
+        try:
+            value = func()
+        except Exception:
+            exc_info = sys.exc_info()
+        with self.lock:
+            if self.expired:
+                return
+            self.result.pending.discard(key)
+            if exc_info:
+                self.result.errors[key] = exc_info
+            else:
+                self.result.results[key] = value
+            if not self.result.pending:
+                self.done.set()
+
+    def expire(self):
+        with self.lock:
+            self.expired = True
+            return self.result
+
+
+class Task(object):
+    """A call queued on a ``WorkerPool`` with ``submit``."""
+
+    def __init__(self, func):
+        self.func = func
+        self.done = threading.Event()
+        self.cancelled = False
+        self.result = None
+        self.exc_info = None
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            self.result = self.func()
+        except Exception:
+            self.exc_info = sys.exc_info()
+        finally:
+            self.done.set()
+
+    def wait(self, timeout=None):
+        """Waits for the call and returns whether it has finished."""
+        self.done.wait(timeout)
+        return self.done.is_set()
+
+    def cancel(self):
+        """Skips the call if it has not started yet."""
+        self.cancelled = True
+
+
+class WorkQueue(object):
+    """The calls of one request on a ``WorkerPool``; see ``queue``."""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._calls = collections.deque()
+
+    def submit(self, func):
+        """Queues a single call and returns its ``Task``."""
+        task = Task(func)
+        self._pool._put(self, task.run)
+        return task
+
+
+class WorkerPool(object):
+    """A fixed number of worker threads fed from per-request queues.
+
+    Pools are meant to be shared by every request of a process (see
+    ``shared_pool``), so ``size`` bounds the number of concurrent calls to
+    a backend no matter how many calls or requests are queued. Each
+    request queues its calls on a ``WorkQueue`` of its own and the workers
+    take one call from each queue in turn, so a request with many calls
+    does not hold up the requests queued behind it.
+    """
+
+    def __init__(self, size):
+        self.size = max(1, int(size))
+        # The queues which have calls waiting, in turn order.
+        self._ready = collections.deque()
+        self._ready_cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _put(self, queue, call):
+        self._start()
+        with self._ready_cond:
+            if not queue._calls:
+                self._ready.append(queue)
+            queue._calls.append(call)
+            self._ready_cond.notify()
+
+    def _take(self):
+        with self._ready_cond:
+            while not self._ready:
+                self._ready_cond.wait()
+            queue = self._ready.popleft()
+            call = queue._calls.popleft()
+            if queue._calls:
+                # Its next call waits for the other queues' turn.
+                self._ready.append(queue)
+            return call
+
+    def _work(self):
+        while True:
+            self._take()()
+
+    def _start(self):
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = threading.Thread(target=self._work)
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+
+    def run(self, calls, timeout=None):
+        """Runs every callable in the ``calls`` dict on the pool.
+
+        Waits until all of them have finished or ``timeout`` seconds have
+        passed, whichever comes first, and returns a ``BatchResult``. Calls
+        which are still queued at the deadline are dropped and results
+        arriving after it are discarded.
+        """
+        queue = self.queue()
+        batch = _Batch(calls.keys())
+        for key, func in calls.items():
+            self._put(queue, functools.partial(batch.run, key, func))
+        batch.done.wait(timeout)
+        return batch.expire()
+
+    def queue(self):
+        """Returns a new ``WorkQueue`` for the calls of one request."""
+        return WorkQueue(self)
+
+    def submit(self, func):
+        """Queues a single call on a queue of its own and returns its
+        ``Task``.
+        """
+        return self.queue().submit(func)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def shared_pool(name, size):
+    """Returns the process-wide ``WorkerPool`` called ``name``.
+
+    The pool is created with ``size`` workers on first use.
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = WorkerPool(size)
+        return pool
+
+
+class FetchTimeout(exceptions.NotAvailable):
+    """A ``ParallelFetch`` call did not finish within its timeout."""
+
+
+class ParallelFetch(object):
+    """Runs the independent backend calls of one request concurrently.
+
+    Each call is added with ``add`` and starts right away on the fetch's
+    own queue of the shared ``fetch`` pool (``HORIZON_FETCH_CONCURRENCY``
+    workers). ``get`` waits
+    for one call and returns its value or re-raises its exception, so
+    every call keeps its own error handling where its result is used::
+
+        fetch = concurrency.ParallelFetch(request)
+        fetch.add('flavors', api.nova.flavor_list)
+        fetch.add('images', api.glance.image_list_detailed)
+        try:
+            flavors = fetch.get('flavors')
+        except Exception:
+            flavors = []
+            exceptions.handle(request, ignore=True)
+
+    A call which does not finish within its timeout (``HORIZON_FETCH_TIMEOUT``
+    seconds unless given to ``add``) raises ``FetchTimeout``, which
+    ``horizon.exceptions.handle`` treats as recoverable.
+    """
+
+    def __init__(self, request, timeout=None):
+        self.request = request
+        if timeout is None:
+            timeout = getattr(settings, 'HORIZON_FETCH_TIMEOUT', 30)
+        self.timeout = timeout
+        self._queue = None
+        self._tasks = {}
+
+    def add(self, name, func, args=(), kwargs=None, timeout=None):
+        """Starts ``func(request, *args, **kwargs)`` under ``name``."""
+        if self._queue is None:
+            self._queue = shared_pool(
+                'fetch',
+                getattr(settings, 'HORIZON_FETCH_CONCURRENCY', 20)).queue()
+        call = functools.partial(func, self.request, *args, **(kwargs or {}))
+        deadline = time.time() + (timeout or self.timeout)
+        self._tasks[name] = (self._queue.submit(call), deadline)
+
+    def __contains__(self, name):
+        return name in self._tasks
+
+    def get(self, name):
+        task, deadline = self._tasks[name]
+        if not task.wait(max(deadline - time.time(), 0)):
+            task.cancel()
+            raise FetchTimeout("Timed out fetching %s." % name)
+        if task.exc_info:
+            raise task.exc_info[0], task.exc_info[1], task.exc_info[2]
+        return task.result